@@ -1,23 +1,55 @@
 from django.apps import AppConfig
+from django.conf import settings
 import os
+import signal
+import sys
 import threading
 import time
-import schedule 
 from datetime import datetime
 
-from .devices.soil import SoilSensorSingleton
-from .devices.water import WaterSensorSingleton
-from .devices.gpio import GPIOSensorSingleton
-from .devices.LCD_display import LCDManager
+from .devices import backends
+from .devices.engine import AcquisitionEngineSingleton
+from .services.dbconn import db_job
+from .services.scheduler import JobSchedulerSingleton, OVERRUN_QUEUE
 
 
-def run_scheduler_loop():
+def run_scheduler_loop(scheduler):
     #print("[Debug] Run Scheduler Loop", flush=True)
     time.sleep(2)  # 초기 대기 시간
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    # 이동 평균 필터를 DB의 최근 값으로 채워둠 (ready()에서는 DB 접근을 피함)
+    from .services.filtering import prime_filter
+    try:
+        prime_filter()
+    except Exception as e:
+        print(f"[apps] Filter prime skipped: {e}", flush=True)
+
+    scheduler.run()
+
+def _flush_on_sigterm(writer):
+    """SIGTERM으로 종료될 때도 버퍼에 남은 RawData를 저장하도록 핸들러 연결"""
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handler(signum, frame):
+        writer.stop()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            sys.exit(0)
+
+    try:
+        signal.signal(signal.SIGTERM, handler)
+    except ValueError:
+        # 메인 스레드가 아니면 핸들러를 등록할 수 없음 (atexit만 사용)
+        pass
+
+def _attach_extra_probes(buses):
+    """settings.MODBUS_PROBES에 적힌 추가 토양/배액 프로브를 버스에 등록"""
+    for probe in getattr(settings, 'MODBUS_PROBES', []):
+        sensor = backends.probe_class(probe['kind'])(port=probe['port'], slave_address=probe['slave'],
+                                      name=probe['name'], primary=False)
+        sensor.attach_bus(buses, period=probe.get('period', 1.0), priority=probe.get('priority', 0))
+        buses.probes[probe['name']] = sensor
 
 class OmnitorConfig(AppConfig):
     name = "omnitor"
@@ -30,24 +62,58 @@ class OmnitorConfig(AppConfig):
             return
 
 
-        gpio = GPIOSensorSingleton.instance()
-        gpio.start()
-
-        soil = SoilSensorSingleton.instance()
-        soil.start()
-   
-        water = WaterSensorSingleton.instance()
-        water.start()
-
-        lcd_manager = LCDManager()
+        # settings.DEVICE_BACKEND에 따라 실제 센서 / 시뮬레이터
+        gpio = backends.gpio_sensor()
+        soil = backends.soil_sensor()
+        water = backends.water_sensor()
+
+        if getattr(settings, 'ACQUISITION_ENGINE', 'threads') == 'asyncio':
+            # 이벤트 루프 하나에서 모든 센서를 읽음
+            engine = AcquisitionEngineSingleton.instance()
+            gpio.attach(engine)
+            soil.attach(engine)
+            water.attach(engine)
+            engine.start()
+        elif getattr(settings, 'MODBUS_BUS_MANAGER', False) and not backends.is_simulated():
+            # RS-485 포트마다 스레드 하나로 여러 slave를 돌아가며 읽음
+            from .devices.modbus_bus import BusManagerSingleton
+            gpio.start()
+            buses = BusManagerSingleton.instance()
+            soil.attach_bus(buses)
+            water.attach_bus(buses)
+            _attach_extra_probes(buses)
+            buses.start()
+        else:
+            gpio.start()
+            soil.start()
+            water.start()
+
+        lcd_manager = backends.lcd_manager()
+
+        # RawData 버퍼 writer (종료 시 남은 샘플 flush)
+        from .services.ingest import RawDataWriterSingleton
+        writer = RawDataWriterSingleton.instance()
+        writer.start()
+        _flush_on_sigterm(writer)
+
+        # DB 장애 때 쌓인 로컬 스풀 재적재
+        from .services.spool import SampleSpoolSingleton
+        SampleSpoolSingleton.instance().start()
 
         def raw_data_job():
             " save_data.py에서 로우 데이터 저장하는 함수 "
             from .services.save_data import save_rawdata
             save_rawdata(gpio, soil, water)
 
-        # 1초마다 raw data 함수 실행
-        schedule.every(1).second.do(raw_data_job)
+        # 작업마다 전용 워커에서 실행 (느린 작업이 다른 작업을 막지 않음)
+        # db_job: 실행 전후로 오래되거나 끊긴 DB 연결 정리, 연결 에러가 밖으로 나오면 새 연결로 재실행
+        # save_rawdata / save_finaldata는 에러를 직접 처리(버퍼 / 스풀)하고 삼키므로 retry=False:
+        # 끊긴 연결은 실행 후 close_old_connections()가 닫고 다음 주기에 새로 연결
+        # (save_finaldata를 다시 실행하면 하루 누적값이 두 번 진행됨)
+        scheduler = JobSchedulerSingleton.instance()
+
+        # 1초마다 raw data 함수 실행 (초 경계에 맞춰서 RawData 격자 시각과 어긋나지 않게)
+        scheduler.every(1, db_job(raw_data_job, 'raw_data', retry=False), name='raw_data', align=True)
 
         # finaldata도 마찬가지 방식으로 처리
         def final_data_job():
@@ -55,13 +121,14 @@ class OmnitorConfig(AppConfig):
             from .services.save_data import save_finaldata
             save_finaldata()
             
-        schedule.every().minute.at(":00").do(final_data_job)
+        # 매분 :00 (벽시계 기준), 밀리면 끝나는 대로 한 번 더 실행
+        scheduler.every(60, db_job(final_data_job, 'final_data', retry=False), name='final_data', align=True,
+                        overrun=OVERRUN_QUEUE)
 
-        schedule.every(10).seconds.do(lcd_manager.update)
+        scheduler.every(10, db_job(lcd_manager.update, 'lcd'), name='lcd')
 
         def camera_job():
             " camera.py로 카메라 사진 찍는 함수"
-            from .devices.camera import take_photo
             from .models import FarmJournal
             now = datetime.now()
             current_time_str = now.strftime("%H:%M") # 현재 시간
@@ -76,14 +143,36 @@ class OmnitorConfig(AppConfig):
             # 비교해서 현재 시간이 설정 시간과 같으면 촬영
             if current_time_str == target_time_str:
                #print(f"[apps.camera_job] 촬영 시간 도달: ({current_time_str})", flush=True)
-                take_photo()
+                backends.take_photo()
             else:
                 # 디버깅용
                 #print(f"[apps.camera_job] 대기 중... 현재: {current_time_str} | 목표: {target_time_str}", flush=True)
                 pass
 
-        schedule.every(60).seconds.do(camera_job)
+        # HH:MM 비교라서 매분 정각에 맞춰 실행
+        scheduler.every(60, db_job(camera_job, 'camera'), name='camera', align=True)
+
+        def partition_job():
+            " RawData / FinalData 다음 달 파티션 미리 생성, 보관 기간 지난 파티션 DETACH (PostgreSQL 파티션 테이블일 때만) "
+            from .services.partitions import maintain
+            maintain()
+
+        scheduler.every(3600, db_job(partition_job, 'partitions'), name='partitions')
+
+        def retention_job():
+            " 보관 기간(RAWDATA_RETENTION_DAYS)이 지난 RawData를 하루 단위 Parquet 파일로 옮기고 DB에서 삭제 "
+            from .services.archive import run_retention
+            run_retention()
+
+        scheduler.every(3600, db_job(retention_job, 'rawdata_retention'), name='rawdata_retention')
+
+        def sqlite_job():
+            " SQLite 프로필이면 WAL checkpoint + PRAGMA optimize (PostgreSQL이면 아무것도 안 함) "
+            from .services.dbprofile import maintain
+            maintain()
+
+        scheduler.every(3600, db_job(sqlite_job, 'sqlite'), name='sqlite')
 
 
-        scheduler_thread = threading.Thread(target=run_scheduler_loop, daemon=True)
+        scheduler_thread = threading.Thread(target=run_scheduler_loop, args=(scheduler,), daemon=True)
         scheduler_thread.start()
@@ -25,7 +25,7 @@ class LCDManager:
 
 
         try:
-            data = FinalData.objects.last()
+            data = FinalData.objects.order_by('-timestamp').first()
             time.sleep(1)
 
             if data:
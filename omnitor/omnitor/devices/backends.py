@@ -0,0 +1,65 @@
+from django.conf import settings
+
+# 장치 구현 선택: 'hardware' (라즈베리파이 실제 센서) / 'simulated' (devices/simulated.py)
+# 하드웨어 라이브러리(board, RPi.GPIO, minimalmodbus, cv2, RPLCD ...)는 선택된 경우에만 import
+BACKEND = getattr(settings, 'DEVICE_BACKEND', 'hardware')
+
+
+def is_simulated():
+    return BACKEND == 'simulated'
+
+
+def gpio_sensor():
+    if is_simulated():
+        from .simulated import SimulatedGPIOSensorSingleton as singleton
+    else:
+        from .gpio import GPIOSensorSingleton as singleton
+    return singleton.instance()
+
+
+def soil_sensor():
+    if is_simulated():
+        from .simulated import SimulatedSoilSensorSingleton as singleton
+    else:
+        from .soil import SoilSensorSingleton as singleton
+    return singleton.instance()
+
+
+def water_sensor():
+    if is_simulated():
+        from .simulated import SimulatedWaterSensorSingleton as singleton
+    else:
+        from .water import WaterSensorSingleton as singleton
+    return singleton.instance()
+
+
+def probe_class(kind):
+    """추가 Modbus 프로브용 센서 클래스 ('soil' / 'water', 하드웨어 전용)"""
+    if kind == 'soil':
+        from .soil import SoilSensor
+        return SoilSensor
+    from .water import WaterSensor
+    return WaterSensor
+
+
+def lcd_manager():
+    if is_simulated():
+        from .simulated import SimulatedLCDManager
+        return SimulatedLCDManager()
+    from .LCD_display import LCDManager
+    return LCDManager()
+
+
+def take_photo():
+    if is_simulated():
+        from .simulated import take_photo as photo
+    else:
+        from .camera import take_photo as photo
+    return photo()
+
+
+def stats():
+    """시뮬레이터 장치별 샘플 / 고장 주입 통계 (하드웨어면 빈 dict)"""
+    if not is_simulated():
+        return {}
+    return {device.name: device.stats() for device in (gpio_sensor(), soil_sensor(), water_sensor())}
@@ -0,0 +1,176 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+BACKOFF_MIN = 0.5     # 재연결 대기 시작값 (초)
+BACKOFF_MAX = 30.0    # 재연결 대기 최대값 (초)
+HISTORY_SIZE = 200    # 읽기 지연 통계용 최근 기록 수
+
+
+def _jitter(delay):
+    """여러 장치가 동시에 재연결하지 않도록 ±20% 흔들기"""
+    return delay * random.uniform(0.8, 1.2)
+
+
+class DeviceTask:
+    """
+    엔진에 등록된 장치 하나
+    read: 값을 읽는 코루틴 함수, on_result: 읽은 값을 센서 객체에 반영하는 함수
+    open / close: 연결 / 해제 함수 (없으면 None)
+    """
+
+    def __init__(self, name, read, period, on_result, open=None, close=None, timeout=2.0):
+        self.name = name
+        self.read = read
+        self.period = period
+        self.on_result = on_result
+        self.open = open
+        self.close = close
+        self.timeout = timeout
+        self.connected = False
+
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.last_ok = None
+        self.latencies = deque(maxlen=HISTORY_SIZE)   # 읽기 지연 (ms)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            result = {
+                'period': self.period,
+                'connected': self.connected,
+                'reads': self.reads,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'reconnects': self.reconnects,
+                'age': time.monotonic() - self.last_ok if self.last_ok else None,
+            }
+        if latencies:
+            result['latency_ms_avg'] = sum(latencies) / len(latencies)
+            result['latency_ms_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            result['latency_ms_max'] = latencies[-1]
+        return result
+
+
+class AcquisitionEngine:
+    """
+    하나의 asyncio 이벤트 루프(스레드 1개)에서 모든 센서를 코루틴으로 읽는 수집 엔진
+    - 장치마다 주기, 읽기 timeout, 지수 backoff 재연결
+    - 장치별 읽기 지연 통계
+    센서 객체는 그대로 두고 on_result로 값만 갱신하므로 get_current_data()는 기존과 동일하게 동작
+    """
+
+    def __init__(self):
+        self._devices = []
+        self.running = False
+        self.loop = None
+        self.thread = None
+
+    def add(self, name, read, period, on_result, open=None, close=None, timeout=2.0):
+        device = DeviceTask(name, read, period, on_result, open, close, timeout)
+        self._devices.append(device)
+        return device
+
+    def start(self):
+        """이벤트 루프 스레드 시작 (apps.py에서 호출)"""
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(lambda: None)
+
+    def stats(self):
+        return {device.name: device.stats() for device in self._devices}
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self.loop.close()
+
+    async def _main(self):
+        await asyncio.gather(*(self._drive(device) for device in self._devices))
+
+    async def _drive(self, device):
+        """장치 하나를 주기적으로 읽는 코루틴 (연결 -> 읽기 -> 대기, 실패 시 backoff 후 재연결)"""
+        loop = asyncio.get_running_loop()
+        backoff = BACKOFF_MIN
+        next_at = loop.time()
+
+        while self.running:
+            if not device.connected:
+                try:
+                    if device.open:
+                        device.open()
+                    device.connected = True
+                except Exception as e:
+                    print(f"[engine] {device.name} 연결 실패: {e}", flush=True)
+                    with device._lock:
+                        device.errors += 1
+                    await asyncio.sleep(_jitter(backoff))
+                    backoff = min(backoff * 2, BACKOFF_MAX)
+                    continue
+
+            started = loop.time()
+            try:
+                result = await asyncio.wait_for(device.read(), device.timeout)
+            except Exception as e:
+                with device._lock:
+                    if isinstance(e, asyncio.TimeoutError):
+                        device.timeouts += 1
+                    else:
+                        device.errors += 1
+                    device.reconnects += 1
+                print(f"[engine] {device.name} 읽기 실패: {e!r}", flush=True)
+                if device.close:
+                    device.close()
+                device.connected = False
+                await asyncio.sleep(_jitter(backoff))
+                backoff = min(backoff * 2, BACKOFF_MAX)
+                next_at = loop.time()
+                continue
+
+            elapsed = loop.time() - started
+            with device._lock:
+                device.reads += 1
+                device.last_ok = time.monotonic()
+                device.latencies.append(elapsed * 1000.0)
+            backoff = BACKOFF_MIN
+
+            try:
+                device.on_result(result)
+            except Exception as e:
+                print(f"[engine] {device.name} 값 반영 실패: {e}", flush=True)
+
+            # 읽기 시간과 상관없이 일정 주기 유지
+            next_at += device.period
+            now = loop.time()
+            if next_at < now:
+                next_at = now
+            await asyncio.sleep(next_at - now)
+
+
+class AcquisitionEngineSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = AcquisitionEngine()
+            return cls._instance
@@ -1,5 +1,6 @@
 import time
 import threading
+import statistics
 import serial
 import board
 import adafruit_dht
@@ -10,6 +11,48 @@ try:
 except ImportError:
     import rpi_lgpio as GPIO
 
+from django.conf import settings
+
+from omnitor.services.sample_queue import publish
+
+# self.data 키 -> RawData 필드 이름
+FIELD_MAP = {
+    'temperature': 'air_temperature',
+    'humidity': 'air_humidity',
+}
+
+# 센서별 읽기 주기 (초). 느린 센서가 다른 센서를 기다리게 하지 않도록 센서마다 스레드를 따로 돌림
+# DHT22는 2초보다 자주 읽을 수 없음
+SAMPLE_PERIODS = {
+    'co2': 2.0,
+    'lux': 1.0,
+    'weight': 0.1,   # 관수 펄스를 잡기 위해 10Hz
+    'dht': 2.0,
+}
+SAMPLE_PERIODS.update(getattr(settings, 'GPIO_SAMPLE_PERIODS', {}))
+
+# HX711 오버샘플링: 한 번 읽을 때 N개를 읽어서 median / mean으로 합침
+# (HX711 기본 10SPS에서는 N개 읽는 데 약 N/10초가 걸리므로 주기와 함께 조정)
+WEIGHT_OVERSAMPLE = getattr(settings, 'GPIO_WEIGHT_OVERSAMPLE', 1)
+WEIGHT_REDUCER = getattr(settings, 'GPIO_WEIGHT_REDUCER', 'median')
+
+
+def lux_to_insolation(lux):
+    """조도(lx) -> 일사량 (PPFD 환산), 읽기 실패면 None"""
+    if lux is None:
+        return None
+    return (lux / 54.0) * (1.0 / 4.57)
+
+
+def reduce_samples(samples, reducer=WEIGHT_REDUCER):
+    """오버샘플링한 값들을 하나로 합침 (읽기 실패값 False/None 제외)"""
+    values = [v for v in samples if v is not None and v is not False]
+    if not values:
+        return None
+    if reducer == 'mean':
+        return statistics.fmean(values)
+    return statistics.median(values)
+
 class GPIOSensor:
     def __init__(self):
         self.running = False
@@ -72,6 +115,14 @@ class GPIOSensor:
         """리드 스위치 신호가 올 때마다 실행 (인터럽트)"""
         with self._lock:
             self.data["tip_count"] += 1
+            count = self.data["tip_count"]
+        publish('gpio', {'tip_count': count})
+
+    def _update(self, **values):
+        """최신 값 갱신 + 측정 시각과 함께 수집 큐에 발행 (RawData 필드 이름으로 변환)"""
+        with self._lock:
+            self.data.update(values)
+        publish('gpio', {FIELD_MAP.get(key, key): value for key, value in values.items()})
 
     def _calculate_checksum(self, packet):
         if len(packet) != 9: return 0
@@ -98,54 +149,115 @@ class GPIOSensor:
             pass
         return None
 
-    def _update_loop(self):
-        """백그라운드에서 센서 값을 주기적으로 갱신"""
+    def _read_lux(self):
+        """조도 센서 (BH1750, I2C)"""
+        if not self.bus:
+            return None
+        try:
+            raw = self.bus.read_i2c_block_data(self.BH1750_ADDR, 0x10, 2)
+            return (raw[0] << 8 | raw[1]) / 1.2
+        except:
+            return None
+
+    def _read_weight(self):
+        """로드셀 센서 (HX711)"""
+        if not self.hx:
+            return None
+        try:
+            w_raw = self.hx.get_raw_data(times=WEIGHT_OVERSAMPLE)
+            return reduce_samples(w_raw) if isinstance(w_raw, list) else w_raw # 리스트로 받는 값을 한 값으로 처리해서 저장
+        except:
+            return None
+
+    def _read_dht(self):
+        """온습도 센서 (DHT22)"""
+        if not self.dht:
+            return None, None
+        try:
+            return self.dht.temperature, self.dht.humidity
+        except RuntimeError:
+            return None, None
+
+    def _samplers(self):
+        """
+        센서 이름 -> (읽기 함수, 읽은 값을 self.data에 반영하는 함수)
+        tip_count는 callback에서 별도로 업데이트됨
+        """
+        return {
+            'co2': (self._read_co2, lambda v: self._update(co2=v)),
+            'lux': (self._read_lux, lambda v: self._update(insolation=lux_to_insolation(v))),
+            'weight': (self._read_weight, lambda v: self._update(weight=v)),
+            'dht': (self._read_dht, lambda v: self._update(temperature=v[0], humidity=v[1])),
+        }
+
+    def _sample_loop(self, name, read, on_result, period):
+        """센서 하나를 정해진 주기로 읽는 루프 (읽기 시간과 상관없이 일정 주기 유지)"""
+        next_at = time.monotonic()
         while self.running:
-            # CO2
-            co2 = self._read_co2()
-            
-            # 조도 센서
-            lux = None
-            if self.bus:
-                try:
-                    raw = self.bus.read_i2c_block_data(self.BH1750_ADDR, 0x10, 2)
-                    lux = (raw[0] << 8 | raw[1]) / 1.2
-                except: pass
-            
-            # 로드셀 센서
-            weight = None
-            if self.hx:
-                try:
-                    w_raw = self.hx.get_raw_data()
-                    weight = w_raw[0] if isinstance(w_raw, list) else w_raw # 리스트로 받는 값을 한 값으로 처리해서 저장
-                except: pass
-
-            # 온습도 센서
-            temp, hum = None, None
-            if self.dht:
-                try:
-                    temp = self.dht.temperature
-                    hum = self.dht.humidity
-                except RuntimeError:
-                    pass
-
-            # === 데이터 업데이트 ===
-            with self._lock:
-                self.data["co2"] = co2
-                self.data["insolation"] = (lux/54.0) * (1.0/4.57)
-                self.data["weight"] = weight
-                self.data["temperature"] = temp
-                self.data["humidity"] = hum
-                # tip_count는 callback에서 별도로 업데이트됨
-
-            time.sleep(2) # 2초마다 갱신
+            try:
+                on_result(read())
+            except Exception as e:
+                print(f"[GPIO] {name} 읽기 실패: {e}", flush=True)
+
+            next_at += period
+            now = time.monotonic()
+            if next_at < now:
+                next_at = now   # 읽기가 주기보다 오래 걸리면 밀린 만큼 건너뜀
+            time.sleep(next_at - now)
+
+    def attach(self, engine):
+        """
+        asyncio 수집 엔진에 등록 (자체 스레드 대신 엔진의 이벤트 루프가 읽음)
+        CO2(UART)는 논블로킹 시리얼, BH1750(I2C)은 루프에서 바로 읽고,
+        bit-bang 방식인 HX711 / DHT22만 루프의 기본 executor에서 실행
+        """
+        import asyncio
+        from .modbus_rtu import AsyncSerialPort
+
+        co2_port = None
+        if self.co2_ser is not None:
+            self.co2_ser.close()
+            self.co2_ser = None
+            co2_port = AsyncSerialPort('/dev/ttyAMA0', 9600)
+
+        async def read_co2():
+            co2_port.reset_input()
+            await co2_port.write(b"\xff\x01\x86\x00\x00\x00\x00\x00\x79")
+            await asyncio.sleep(0.1)
+            response = await co2_port.read_exactly(9, 1.0)
+            if response[0] == 0xFF and response[1] == 0x86 and self._calculate_checksum(response) == response[8]:
+                return response[2] * 256 + response[3]
+            return None
+
+        async def read_lux():
+            return self._read_lux()
+
+        async def read_weight():
+            return await asyncio.get_running_loop().run_in_executor(None, self._read_weight)
+
+        async def read_dht():
+            return await asyncio.get_running_loop().run_in_executor(None, self._read_dht)
+
+        samplers = self._samplers()
+        if co2_port is not None:
+            engine.add('gpio.co2', read_co2, SAMPLE_PERIODS['co2'], samplers['co2'][1],
+                       open=co2_port.open, close=co2_port.close)
+        engine.add('gpio.lux', read_lux, SAMPLE_PERIODS['lux'], samplers['lux'][1])
+        engine.add('gpio.weight', read_weight, SAMPLE_PERIODS['weight'], samplers['weight'][1],
+                   timeout=max(2.0, WEIGHT_OVERSAMPLE * 0.2))
+        engine.add('gpio.dht', read_dht, SAMPLE_PERIODS['dht'], samplers['dht'][1], timeout=3.0)
+        publish('gpio', {'tip_count': self.data["tip_count"]})
+        self.running = True
 
     def start(self):
         """GPIO 시작"""
+        publish('gpio', {'tip_count': self.data["tip_count"]})
         if not self.running:
             self.running = True
-            t = threading.Thread(target=self._update_loop, daemon=True)
-            t.start()
+            for name, (read, on_result) in self._samplers().items():
+                t = threading.Thread(target=self._sample_loop, args=(name, read, on_result, SAMPLE_PERIODS[name]),
+                                     name=f"gpio-{name}", daemon=True)
+                t.start()
 
     def get_current_data(self):
         """외부 호출용: 현재 저장된 최신 데이터 반환 (즉시 리턴)"""
@@ -0,0 +1,323 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from .modbus_rtu import ModbusError, build_read_request, char_time, frame_silence, parse_read_response
+
+MAX_REGISTERS = 125   # Modbus 한 번에 읽을 수 있는 최대 레지스터 수
+MAX_GAP = 4           # 이 개수 이하로 떨어진 레지스터 구간은 한 요청으로 합쳐서 읽음
+MIN_TIMEOUT = 0.05    # 자동 조정 시 최소 응답 대기 시간 (초)
+BACKOFF_MAX = 30.0    # 연속 실패 시 최대 재시도 간격 (초)
+HISTORY_SIZE = 100    # 지연 통계용 최근 기록 수
+
+
+class RegisterRead:
+    """등록된 읽기 요청 하나 (slave의 start부터 count개, 결과는 callback(values)로 전달)"""
+
+    def __init__(self, slave, start, count, callback, functioncode, name):
+        self.slave = slave
+        self.start = start
+        self.count = count
+        self.callback = callback
+        self.functioncode = functioncode
+        self.name = name
+
+
+class Poll:
+    """같은 slave / function code / 주기의 인접한 RegisterRead들을 합친 실제 요청 1개"""
+
+    def __init__(self, slave, functioncode, period, priority, reads):
+        self.slave = slave
+        self.functioncode = functioncode
+        self.period = period
+        self.priority = priority
+        self.reads = reads
+        self.start = min(r.start for r in reads)
+        self.count = max(r.start + r.count for r in reads) - self.start
+        self.due = 0.0
+        self.failures = 0
+
+
+class SlaveStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=HISTORY_SIZE)   # 요청~응답 시간 (ms)
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+        result = {
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'error_rate': (self.errors + self.timeouts) / self.requests if self.requests else 0.0,
+        }
+        if latencies:
+            result['latency_ms_avg'] = sum(latencies) / len(latencies)
+            result['latency_ms_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            result['latency_ms_max'] = latencies[-1]
+        return result
+
+
+def coalesce(reads, max_gap=MAX_GAP, max_registers=MAX_REGISTERS):
+    """
+    시작 주소 순으로 정렬해서 가까운 구간끼리 묶음
+    반환: [[RegisterRead, ...], ...]
+    """
+    groups = []
+    for read in sorted(reads, key=lambda r: r.start):
+        if groups:
+            group = groups[-1]
+            group_start = group[0].start
+            group_end = max(r.start + r.count for r in group)
+            new_end = max(group_end, read.start + read.count)
+            if read.start - group_end <= max_gap and new_end - group_start <= max_registers:
+                group.append(read)
+                continue
+        groups.append([read])
+    return groups
+
+
+class ModbusBus:
+    """
+    RS-485 포트 하나를 소유하고 여러 slave의 레지스터 읽기를 스케줄링 (스레드 1개)
+    - 같은 slave의 인접한 레지스터 구간은 한 요청으로 합침
+    - 주기가 된 요청 중 priority가 높은 것부터, 같으면 먼저 예정된 것부터 (round-robin)
+    - 프레임 사이 3.5 문자 휴지 시간, slave별 응답 timeout 자동 조정
+    - slave별 지연 / 오류율 통계
+    """
+
+    def __init__(self, port, baudrate=9600, bytesize=8, parity='N', stopbits=1,
+                 timeout=1.0, turnaround=0.0, adaptive_timeout=True):
+        self.port = port
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.timeout = timeout
+        self.turnaround = turnaround            # 느린 slave를 위한 추가 대기 (초)
+        self.adaptive_timeout = adaptive_timeout
+        self.silence = frame_silence(baudrate, bytesize, parity, stopbits) + turnaround
+
+        self.serial = None
+        self.running = False
+        self.thread = None
+
+        self._reads = []       # (RegisterRead, period, priority)
+        self._seq = itertools.count()
+        self._last_frame_end = 0.0
+        self._lock = threading.Lock()
+        self._stats = {}       # slave -> SlaveStats
+
+    def add(self, slave, start, count, callback, period=1.0, functioncode=3, priority=0, name=None):
+        """읽기 요청 등록 (start() 전에 호출)"""
+        read = RegisterRead(slave, start, count, callback, functioncode, name or f"slave{slave}")
+        with self._lock:
+            self._reads.append((read, period, priority))
+            self._stats.setdefault(slave, SlaveStats())
+        return read
+
+    def _build_polls(self):
+        """등록된 요청을 (slave, fc, 주기) 별로 묶어서 합친 Poll 목록 생성"""
+        buckets = {}
+        for read, period, priority in self._reads:
+            key = (read.slave, read.functioncode, period)
+            bucket = buckets.setdefault(key, {'reads': [], 'priority': priority})
+            bucket['reads'].append(read)
+            bucket['priority'] = max(bucket['priority'], priority)
+
+        polls = []
+        for (slave, functioncode, period), bucket in buckets.items():
+            for group in coalesce(bucket['reads']):
+                polls.append(Poll(slave, functioncode, period, bucket['priority'], group))
+        return polls
+
+    def start(self):
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        self._close()
+
+    def _open(self):
+        if self.serial is not None and self.serial.is_open:
+            return
+        import serial   # pyserial은 실제로 포트를 열 때만 필요 (URLconf / manage.py check는 없어도 동작)
+        self.serial = serial.Serial(self.port, baudrate=self.baudrate, bytesize=self.bytesize,
+                                    parity=self.parity, stopbits=self.stopbits, timeout=self.timeout)
+        print(f"[ModbusBus] {self.port} 연결 성공!", flush=True)
+
+    def _close(self):
+        if self.serial is not None:
+            try:
+                self.serial.close()
+            except Exception:
+                pass
+            self.serial = None
+
+    def _loop(self):
+        with self._lock:
+            polls = self._build_polls()
+        now = time.monotonic()
+        heap = []
+        for poll in polls:
+            poll.due = now
+            heapq.heappush(heap, (poll.due, next(self._seq), poll))
+
+        backoff = 1.0
+        while self.running:
+            if not heap:
+                time.sleep(1)
+                continue
+
+            try:
+                self._open()
+                backoff = 1.0
+            except Exception as e:
+                print(f"[ModbusBus] {self.port} 연결 실패: {e}", flush=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+                continue
+
+            now = time.monotonic()
+            if heap[0][0] > now:
+                time.sleep(heap[0][0] - now)
+                continue
+
+            # 주기가 된 요청 중 priority가 가장 높은 것 선택 (같으면 먼저 예정된 것)
+            due = []
+            while heap and heap[0][0] <= now:
+                due.append(heapq.heappop(heap))
+            due.sort(key=lambda item: (-item[2].priority, item[0], item[1]))
+            _, _, poll = due[0]
+            for item in due[1:]:
+                heapq.heappush(heap, item)
+
+            ok = self._execute(poll)
+            if ok:
+                poll.failures = 0
+                poll.due += poll.period
+                if poll.due < time.monotonic():
+                    poll.due = time.monotonic()
+            else:
+                poll.failures += 1
+                poll.due = time.monotonic() + min(poll.period * (2 ** poll.failures), BACKOFF_MAX)
+            heapq.heappush(heap, (poll.due, next(self._seq), poll))
+
+    def _slave_timeout(self, stats):
+        """최근 응답 시간의 4배 (최소 MIN_TIMEOUT, 최대 설정값)"""
+        if not self.adaptive_timeout or len(stats.latencies) < 10:
+            return self.timeout
+        frame = (5 + MAX_REGISTERS * 2) * char_time(self.baudrate, self.bytesize, self.parity, self.stopbits)
+        return min(self.timeout, max(MIN_TIMEOUT + frame, 4 * max(stats.latencies) / 1000.0))
+
+    def _execute(self, poll):
+        """합쳐진 요청 하나를 보내고 결과를 각 RegisterRead의 callback으로 나눠줌"""
+        stats = self._stats[poll.slave]
+
+        # 프레임 사이 휴지 시간
+        wait = self._last_frame_end + self.silence - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        started = time.monotonic()
+        stats.requests += 1
+        try:
+            self.serial.timeout = self._slave_timeout(stats)
+            self.serial.reset_input_buffer()
+            self.serial.write(build_read_request(poll.slave, poll.start, poll.count, poll.functioncode))
+            self.serial.flush()
+
+            head = self.serial.read(3)
+            if len(head) < 3:
+                stats.timeouts += 1
+                return False
+            rest_length = 2 if head[1] & 0x80 else head[2] + 2
+            rest = self.serial.read(rest_length)
+            if len(rest) < rest_length:
+                stats.timeouts += 1
+                return False
+            values = parse_read_response(head + rest, poll.slave, poll.count, poll.functioncode)
+        except ModbusError as e:
+            stats.errors += 1
+            print(f"[ModbusBus] {self.port} slave {poll.slave} 오류: {e}", flush=True)
+            return False
+        except OSError as e:   # serial.SerialException은 OSError(IOError)의 하위 클래스
+            stats.errors += 1
+            print(f"[ModbusBus] {self.port} 통신 오류, 재연결: {e}", flush=True)
+            self._close()
+            return False
+        finally:
+            self._last_frame_end = time.monotonic()
+
+        with self._lock:
+            stats.latencies.append((self._last_frame_end - started) * 1000.0)
+
+        for read in poll.reads:
+            offset = read.start - poll.start
+            try:
+                read.callback(values[offset:offset + read.count])
+            except Exception as e:
+                print(f"[ModbusBus] {read.name} 값 반영 실패: {e}", flush=True)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {slave: s.as_dict() for slave, s in self._stats.items()}
+
+
+class BusManager:
+    """포트별 ModbusBus 관리 (포트 하나당 버스 하나)"""
+
+    def __init__(self):
+        self._buses = {}
+        self._lock = threading.Lock()
+        self.probes = {}   # 이름 -> 추가 프로브 센서 객체 (get_current_data()로 값 조회)
+
+    def bus(self, port, **options):
+        """포트의 버스를 반환 (없으면 생성). 같은 포트는 같은 통신 설정을 사용해야 함"""
+        with self._lock:
+            bus = self._buses.get(port)
+            if bus is None:
+                bus = ModbusBus(port, **options)
+                self._buses[port] = bus
+            elif options.get('baudrate', bus.baudrate) != bus.baudrate:
+                print(f"[ModbusBus] {port} baudrate 불일치 ({options['baudrate']} != {bus.baudrate})", flush=True)
+            return bus
+
+    def start(self):
+        with self._lock:
+            buses = list(self._buses.values())
+        for bus in buses:
+            bus.start()
+
+    def stop(self):
+        with self._lock:
+            buses = list(self._buses.values())
+        for bus in buses:
+            bus.stop()
+
+    def stats(self):
+        with self._lock:
+            buses = list(self._buses.items())
+        return {port: bus.stats() for port, bus in buses}
+
+
+class BusManagerSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = BusManager()
+            return cls._instance
@@ -0,0 +1,150 @@
+import asyncio
+import struct
+
+
+class ModbusError(Exception):
+    """Modbus 응답 오류 (CRC 불일치, 예외 응답, 길이 오류 등)"""
+
+
+def crc16(data):
+    """Modbus RTU CRC-16 (little endian으로 프레임 끝에 붙음)"""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+    return crc
+
+
+def build_read_request(slave, start, count, functioncode=3):
+    """레지스터 읽기 요청 프레임 (FC 3 / 4)"""
+    body = struct.pack('>BBHH', slave, functioncode, start, count)
+    return body + struct.pack('<H', crc16(body))
+
+
+def parse_read_response(frame, slave, count, functioncode=3):
+    """응답 프레임 -> 레지스터 값 리스트"""
+    if len(frame) < 5:
+        raise ModbusError(f"응답이 너무 짧음 ({len(frame)} bytes)")
+    if struct.unpack('<H', frame[-2:])[0] != crc16(frame[:-2]):
+        raise ModbusError("CRC 불일치")
+    if frame[0] != slave:
+        raise ModbusError(f"slave 주소 불일치 ({frame[0]} != {slave})")
+    if frame[1] == functioncode | 0x80:
+        raise ModbusError(f"예외 응답 code={frame[2]}")
+    if frame[1] != functioncode or frame[2] != count * 2 or len(frame) != 5 + count * 2:
+        raise ModbusError("응답 형식 오류")
+    return list(struct.unpack(f'>{count}H', frame[3:3 + count * 2]))
+
+
+def char_time(baudrate, bytesize=8, parity='N', stopbits=1):
+    """문자 1개 전송 시간 (초)"""
+    bits = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+    return bits / baudrate
+
+
+def frame_silence(baudrate, bytesize=8, parity='N', stopbits=1):
+    """프레임 사이 최소 휴지 시간 (3.5 문자, 19200bps 초과 시 1.75ms 고정)"""
+    if baudrate > 19200:
+        return 0.00175
+    return 3.5 * char_time(baudrate, bytesize, parity, stopbits)
+
+
+class AsyncSerialPort:
+    """
+    asyncio용 논블로킹 시리얼 포트
+    pyserial을 timeout=0으로 열고 이벤트 루프의 add_reader로 수신을 기다림 (별도 스레드 없음)
+    """
+
+    def __init__(self, port, baudrate, bytesize=8, parity='N', stopbits=1):
+        self.port = port
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.serial = None
+
+    @property
+    def is_open(self):
+        return self.serial is not None and self.serial.is_open
+
+    def open(self):
+        if self.is_open:
+            return
+        import serial   # pyserial은 실제로 포트를 열 때만 필요
+        self.serial = serial.Serial(self.port, baudrate=self.baudrate, bytesize=self.bytesize,
+                                    parity=self.parity, stopbits=self.stopbits,
+                                    timeout=0, write_timeout=0)
+
+    def close(self):
+        if self.serial is not None:
+            try:
+                self.serial.close()
+            except Exception:
+                pass
+            self.serial = None
+
+    def reset_input(self):
+        self.serial.reset_input_buffer()
+
+    async def write(self, data):
+        """프레임 전송 후 실제로 선로에 나갈 때까지 대기"""
+        self.serial.write(data)
+        await asyncio.sleep(len(data) * char_time(self.baudrate, self.bytesize, self.parity, self.stopbits))
+
+    async def read_exactly(self, n, timeout):
+        """n바이트를 받을 때까지 대기 (timeout 초과 시 asyncio.TimeoutError)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        buf = bytearray()
+        fd = self.serial.fileno()
+
+        while len(buf) < n:
+            chunk = self.serial.read(n - len(buf))
+            if chunk:
+                buf += chunk
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            ready = loop.create_future()
+            loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                await asyncio.wait_for(ready, remaining)
+            finally:
+                loop.remove_reader(fd)
+        return bytes(buf)
+
+
+class AsyncModbusRTU:
+    """AsyncSerialPort 위에서 동작하는 Modbus RTU 마스터 (레지스터 읽기 전용)"""
+
+    def __init__(self, port, baudrate, bytesize=8, parity='N', stopbits=1, timeout=1.0):
+        self.port = AsyncSerialPort(port, baudrate, bytesize, parity, stopbits)
+        self.timeout = timeout
+        self.silence = frame_silence(baudrate, bytesize, parity, stopbits)
+        self._lock = asyncio.Lock()
+
+    def open(self):
+        self.port.open()
+
+    def close(self):
+        self.port.close()
+
+    async def read_registers(self, slave, start, count, functioncode=3):
+        async with self._lock:
+            await asyncio.sleep(self.silence)
+            self.port.reset_input()
+            await self.port.write(build_read_request(slave, start, count, functioncode))
+
+            head = await self.port.read_exactly(3, self.timeout)
+            if head[1] & 0x80:
+                # 예외 응답: slave, fc|0x80, code, crc(2)
+                frame = head + await self.port.read_exactly(2, self.timeout)
+            else:
+                frame = head + await self.port.read_exactly(head[2] + 2, self.timeout)
+            return parse_read_response(frame, slave, count, functioncode)
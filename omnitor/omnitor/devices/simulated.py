@@ -0,0 +1,444 @@
+import base64
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+
+from omnitor.services.sample_queue import publish
+
+# 시뮬레이터 설정 (settings.SIMULATED_DEVICES로 덮어씀)
+CONFIG = {
+    'sample_rates': {'gpio': 10.0, 'soil': 2.0, 'water': 1.0},   # 장치별 샘플링 속도 (Hz, kHz까지 가능)
+    'fault_rate': 0.01,        # 읽기 실패 확률 (샘플당)
+    'spike_rate': 0.001,       # 값이 튀는 확률 (샘플당)
+    'dropout_rate': 0.0002,    # 연결이 끊기는 확률 (샘플당)
+    'dropout_seconds': 30.0,   # 끊긴 뒤 다시 연결될 때까지 시간 (초)
+    'seed': None,              # 같은 값이면 같은 노이즈/고장 순서
+}
+# 중첩 dict(sample_rates 등)는 키 단위로 합침 (예: {'sample_rates': {'gpio': 1000.0}}이면 soil / water는 기본값 유지)
+for _key, _value in getattr(settings, 'SIMULATED_DEVICES', {}).items():
+    if isinstance(_value, dict) and isinstance(CONFIG.get(_key), dict):
+        CONFIG[_key] = {**CONFIG[_key], **_value}
+    else:
+        CONFIG[_key] = _value
+
+MAX_CATCH_UP = 1000   # 밀렸을 때 한 번에 몰아서 만드는 최대 샘플 수
+
+TIP_CAPACITY = 5          # 배액 전도 1회 용량 (mL), services/accumulators.py와 같음
+IRRIGATION_SETPOINT = 9500.0   # 배지 무게가 이 값(g)보다 내려가면 관수
+IRRIGATION_VOLUME = 250.0      # 1회 관수량 (mL = g)
+DRAINAGE_RATIO = 0.2           # 관수량 중 배액 비율
+DRAIN_RATE = 2.0               # 배액이 흘러나오는 속도 (mL/s)
+
+
+class SimulatedFault(IOError):
+    """시뮬레이터가 일부러 낸 읽기 실패"""
+
+
+@dataclass
+class SoilData:
+    # devices/soil.py의 SoilData와 같은 필드 (하드웨어 라이브러리를 import하지 않으려고 따로 정의)
+    soil_temperature: float
+    soil_humidity: float
+    soil_ec: int
+    soil_ph: float
+
+
+@dataclass
+class WaterData:
+    # devices/water.py의 WaterData와 같은 필드
+    water_temperature: float
+    water_ec: float
+    water_ph: float
+
+
+def _hour(t):
+    """epoch 초 -> 현지 시각의 시간 (0~24, 소수)"""
+    local = time.localtime(t)
+    return local.tm_hour + local.tm_min / 60.0 + (t % 60) / 3600.0
+
+
+def lux_to_insolation(lux):
+    """devices/gpio.py의 lux_to_insolation과 같은 환산"""
+    if lux is None:
+        return None
+    return (lux / 54.0) * (1.0 / 4.57)
+
+
+class GreenhouseModel:
+    """
+    하루 주기로 변하는 온실 환경 + 배지 무게 / 배액 모델
+    - 06~18시 일사, 14시 최고 기온 / 최저 습도, 낮에는 CO2가 떨어짐
+    - 일사량에 비례해서 배지 무게가 줄고, 설정값 아래로 내려가면 관수 -> 일부가 배액되어 전도 카운트 증가
+    여러 시뮬레이터 센서가 같은 모델을 공유해서 값들이 서로 맞게 움직임
+    """
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.weight = IRRIGATION_SETPOINT + IRRIGATION_VOLUME
+        self.tip_count = 0
+        self.irrigations = 0
+        self._pending_drain = 0.0
+        self._drained = 0.0
+        self._last = None
+
+    def noise(self, sigma):
+        return self.random.gauss(0.0, sigma)
+
+    def climate(self, t):
+        hour = _hour(t)
+        sun = max(0.0, math.sin(math.pi * (hour - 6.0) / 12.0))
+        daily = math.cos(2 * math.pi * (hour - 14.0) / 24.0)   # 14시에 1, 02시에 -1
+        with self._lock:
+            cloud = 1.0 - 0.3 * abs(self.noise(0.5))
+            return {
+                'sun': sun,
+                'lux': max(0.0, 60000.0 * sun * cloud + self.noise(20.0)),
+                'temperature': 20.0 + 7.0 * daily + self.noise(0.1),
+                'humidity': min(100.0, max(20.0, 70.0 - 20.0 * daily + self.noise(0.5))),
+                'co2': max(350.0, 420.0 + 250.0 * (1.0 - sun) + self.noise(5.0)),
+            }
+
+    def _advance(self, t):
+        """t까지 배지 수분 상태를 진행 (self._lock 안에서 호출)"""
+        if self._last is not None and t > self._last:
+            dt = t - self._last
+            sun = max(0.0, math.sin(math.pi * (_hour(t) - 6.0) / 12.0))
+            # 증산: 밤 0.5 g/min, 한낮 8 g/min
+            self.weight -= (0.5 + 7.5 * sun) / 60.0 * dt
+            if self.weight < IRRIGATION_SETPOINT:
+                self.weight += IRRIGATION_VOLUME
+                self.irrigations += 1
+                self._pending_drain += IRRIGATION_VOLUME * DRAINAGE_RATIO
+            if self._pending_drain > 0:
+                drained = min(self._pending_drain, DRAIN_RATE * dt)
+                self._pending_drain -= drained
+                self.weight -= drained
+                self._drained += drained
+                while self._drained >= TIP_CAPACITY:
+                    self._drained -= TIP_CAPACITY
+                    self.tip_count += 1
+        if self._last is None or t > self._last:
+            self._last = t
+
+    def advance(self, t):
+        """노이즈 없이 배지 상태만 진행 (과거 데이터 생성 시 청크 경계 상태를 미리 구할 때)"""
+        with self._lock:
+            self._advance(t)
+
+    def substrate(self, t):
+        """t까지 배지 수분 상태를 진행시키고 (무게, 전도 카운트, 배지 수분) 반환"""
+        with self._lock:
+            self._advance(t)
+            moisture = 30.0 + 40.0 * (self.weight - (IRRIGATION_SETPOINT - 500.0)) / 1000.0
+            return self.weight + self.noise(2.0), self.tip_count, min(100.0, max(0.0, moisture))
+
+    def water(self, climate):
+        """양액 온도 / EC / pH (양액 온도는 기온을 천천히 따라감)"""
+        with self._lock:
+            return {
+                'water_temperature': round(18.0 + 0.2 * (climate['temperature'] - 20.0) + self.noise(0.05), 1),
+                'water_ec': round(2.0 + self.noise(0.02), 2),
+                'water_ph': round(6.0 + self.noise(0.02), 2),
+            }
+
+    def snapshot(self):
+        """배지 상태 (restore()로 다른 모델 / 프로세스에서 이어서 진행)"""
+        with self._lock:
+            return {
+                'weight': self.weight,
+                'tip_count': self.tip_count,
+                'irrigations': self.irrigations,
+                'pending_drain': self._pending_drain,
+                'drained': self._drained,
+                'last': self._last,
+            }
+
+    def restore(self, state):
+        with self._lock:
+            self.weight = state['weight']
+            self.tip_count = state['tip_count']
+            self.irrigations = state['irrigations']
+            self._pending_drain = state['pending_drain']
+            self._drained = state['drained']
+            self._last = state['last']
+
+
+class SimulatedDevice:
+    """
+    시뮬레이터 장치 공통 부분: 정해진 속도로 샘플을 만들고 고장을 주입
+    스레드가 밀리면 놓친 샘플을 원래 측정 시각으로 몰아서 만듦 (kHz에서도 샘플 수 유지)
+    """
+
+    name = None
+
+    def __init__(self, model, rate):
+        self.model = model
+        self.rate = rate
+        self.running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._latest = None
+        self._dropout_until = 0.0
+        self.samples = 0
+        self.faults = 0
+        self.spikes = 0
+        self.dropouts = 0
+
+    def _generate(self, t):
+        """시각 t의 측정값 {필드: 값} (장치별 구현)"""
+        raise NotImplementedError
+
+    def _store(self, values, t):
+        """최신 값 갱신 + 수집 큐에 발행 (장치별 구현)"""
+        raise NotImplementedError
+
+    def read(self, t):
+        """고장 주입을 거친 측정값 (실패 시 SimulatedFault)"""
+        rnd = self.model.random
+        if t < self._dropout_until:
+            raise SimulatedFault(f"{self.name} 연결 끊김")
+        if rnd.random() < CONFIG['dropout_rate']:
+            self._dropout_until = t + CONFIG['dropout_seconds']
+            self.dropouts += 1
+            raise SimulatedFault(f"{self.name} 연결 끊김")
+        if rnd.random() < CONFIG['fault_rate']:
+            raise SimulatedFault(f"{self.name} 읽기 실패")
+
+        values = self._generate(t)
+        if rnd.random() < CONFIG['spike_rate']:
+            field = rnd.choice([f for f, v in values.items() if isinstance(v, float)])
+            values[field] *= rnd.uniform(5.0, 10.0)
+            self.spikes += 1
+        return values
+
+    def _tick(self, t):
+        try:
+            values = self.read(t)
+        except SimulatedFault:
+            self.faults += 1
+            return
+        self.samples += 1
+        self._store(values, t)
+
+    def start(self):
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name=f"sim-{self.name}", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        period = 1.0 / self.rate
+        next_at = time.time()
+        while self.running:
+            now = time.time()
+            n = 0
+            while next_at <= now and n < MAX_CATCH_UP:
+                self._tick(next_at)
+                next_at += period
+                n += 1
+            if next_at <= now:
+                next_at = now   # 너무 밀리면 나머지는 건너뜀
+            time.sleep(max(0.0, next_at - time.time()))
+
+    def attach(self, engine):
+        """asyncio 수집 엔진에 등록 (실패는 엔진의 재연결 / backoff 경로로 처리됨)"""
+        async def read():
+            t = time.time()
+            return t, self.read(t)
+
+        def on_result(result):
+            self.samples += 1
+            self._store(result[1], result[0])
+
+        engine.add(self.name, read, 1.0 / self.rate, on_result)
+        self.running = True
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'samples': self.samples,
+            'faults': self.faults,
+            'spikes': self.spikes,
+            'dropouts': self.dropouts,
+        }
+
+
+class SimulatedGPIOSensor(SimulatedDevice):
+    """GPIOSensor 대체: CO2 / 조도 / 로드셀 / 온습도 / 배액 전도 카운트"""
+
+    name = 'gpio'
+
+    def _generate(self, t):
+        climate = self.model.climate(t)
+        weight, tip_count, _ = self.model.substrate(t)
+        return {
+            'co2': float(round(climate['co2'])),
+            'lux': climate['lux'],
+            'weight': weight,
+            'temperature': climate['temperature'],
+            'humidity': climate['humidity'],
+            'tip_count': tip_count,
+        }
+
+    def _store(self, values, t):
+        data = dict(values, insolation=lux_to_insolation(values['lux']))
+        with self._lock:
+            self._latest = data
+        publish('gpio', {
+            'co2': data['co2'],
+            'insolation': data['insolation'],
+            'weight': data['weight'],
+            'air_temperature': data['temperature'],
+            'air_humidity': data['humidity'],
+            'tip_count': data['tip_count'],
+        }, acquired_at=t)
+
+    def get_current_data(self):
+        with self._lock:
+            if self._latest is None:
+                return {"co2": None, "lux": None, "weight": None, "temperature": None,
+                        "humidity": None, "tip_count": self.model.tip_count}
+            return dict(self._latest)
+
+    def cleanup(self):
+        self.running = False
+
+
+class SimulatedSoilSensor(SimulatedDevice):
+    """SoilSensor 대체: 배지 온도 / 수분 / EC / pH"""
+
+    name = 'soil'
+
+    def _generate(self, t):
+        climate = self.model.climate(t)
+        _, _, moisture = self.model.substrate(t)
+        return {
+            'soil_temperature': round(climate['temperature'] - 2.0 + self.model.noise(0.05), 1),
+            'soil_humidity': round(moisture, 1),
+            'soil_ec': int(1500 + self.model.noise(20.0)),
+            'soil_ph': round(6.2 + self.model.noise(0.02), 1),
+        }
+
+    def _store(self, values, t):
+        with self._lock:
+            self._latest = SoilData(**values)
+        publish(self.name, values, acquired_at=t)
+
+    def get_current_data(self):
+        with self._lock:
+            return self._latest
+
+
+class SimulatedWaterSensor(SimulatedDevice):
+    """WaterSensor 대체: 양액 온도 / EC / pH"""
+
+    name = 'water'
+
+    def _generate(self, t):
+        return self.model.water(self.model.climate(t))
+
+    def _store(self, values, t):
+        with self._lock:
+            self._latest = WaterData(**values)
+        publish(self.name, values, acquired_at=t)
+
+    def get_current_data(self):
+        with self._lock:
+            return self._latest
+
+
+class SimulatedLCDManager:
+    """LCDManager 대체: 화면에 쓸 두 줄을 self.lines에 보관"""
+
+    def __init__(self):
+        self.available = True
+        self.lines = ("Waiting for", "data...")
+
+    def update(self):
+        from omnitor.models import FinalData
+
+        try:
+            data = FinalData.objects.order_by('-timestamp').first()
+            if data:
+                self.lines = (
+                    f"{data.air_temperature or 0:.1f}°C  {data.weight or 0:.1f}g",
+                    f"{data.air_humidity or 0:.1f}%  {data.total_irrigation or 0:.1f}mL",
+                )
+        except Exception as e:
+            print(f"[simulated] LCD Update Error: {e}")
+
+
+# 1x1 회색 JPEG (카메라 시뮬레이터가 저장하는 이미지)
+PLACEHOLDER_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQEASABIAAD/2wBDAP//////////////////////////////////////////////////////////////////////////////////////"
+    "wgALCAABAAEBAREA/8QAFBABAAAAAAAAAAAAAAAAAAAAAP/aAAgBAQABPxA="
+)
+
+
+def take_photo():
+    """camera.take_photo 대체: journal_images에 같은 파일명 규칙으로 이미지 저장"""
+    image_dir = os.path.join(settings.MEDIA_ROOT, 'journal_images')   # camera.SAVE_DIR_NAME (cv2 import 피함)
+    os.makedirs(image_dir, exist_ok=True)
+    filename = f"{datetime.now().strftime('%Y-%m-%d_%H-%M')}.jpg"
+    with open(os.path.join(image_dir, filename), 'wb') as f:
+        f.write(PLACEHOLDER_JPEG)
+
+
+class GreenhouseModelSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = GreenhouseModel(CONFIG['seed'])
+            return cls._instance
+
+
+class SimulatedGPIOSensorSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SimulatedGPIOSensor(GreenhouseModelSingleton.instance(), CONFIG['sample_rates']['gpio'])
+            return cls._instance
+
+
+class SimulatedSoilSensorSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SimulatedSoilSensor(GreenhouseModelSingleton.instance(), CONFIG['sample_rates']['soil'])
+            return cls._instance
+
+
+class SimulatedWaterSensorSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SimulatedWaterSensor(GreenhouseModelSingleton.instance(), CONFIG['sample_rates']['water'])
+            return cls._instance
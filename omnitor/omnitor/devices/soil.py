@@ -2,9 +2,11 @@ import serial
 import minimalmodbus
 import time
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from threading import Lock
 
+from omnitor.services.sample_queue import publish
+
 @dataclass
 class SoilData:
     soil_temperature: float
@@ -14,12 +16,14 @@ class SoilData:
 
 
 class SoilSensor:
-    def __init__(self):
+    def __init__(self, port="/dev/ttyUSB1", slave_address=1, name='soil', primary=True):
         self.instrument = None
-        self.port = "/dev/ttyUSB1" # 포트
+        self.port = port # 포트
+        self.name = name
+        self.primary = primary  # True면 RawData 필드로 발행 (추가 프로브는 값만 보관)
         
         # Modbus 설정
-        self.slave_address = 1
+        self.slave_address = slave_address
         self.baudrate = 4800 
         self.bytesize = 8
         self.parity = serial.PARITY_NONE
@@ -82,6 +86,50 @@ class SoilSensor:
             self.instrument = None
             return False
 
+    def _store(self, data):
+        """최신 값 갱신 + 측정 시각과 함께 수집 큐에 발행"""
+        with self.data_lock:
+            self._latest_data = data
+        if self.primary:
+            publish(self.name, asdict(data))
+
+    def _decode(self, values):
+        """레지스터 값 -> SoilData"""
+        return SoilData(
+            soil_temperature=values[1] / 10.0,
+            soil_humidity=values[0] / 10.0,
+            soil_ec=int(values[2]),
+            soil_ph=values[3] / 10.0
+        )
+
+    def attach(self, engine):
+        """
+        asyncio 수집 엔진에 등록 (자체 스레드 대신 엔진이 논블로킹 Modbus RTU로 읽음)
+        """
+        from .modbus_rtu import AsyncModbusRTU
+
+        client = AsyncModbusRTU(self.port, self.baudrate, self.bytesize, self.parity, self.stopbits, self.timeout)
+
+        async def read():
+            return await client.read_registers(self.slave_address, 0, 4, functioncode=3)
+
+        def on_result(values):
+            self._store(self._decode(values))
+
+        engine.add(self.name, read, 0.5, on_result, open=client.open, close=client.close,
+                   timeout=self.timeout * 2)
+        self.running = True
+
+    def attach_bus(self, manager, period=0.5, priority=0):
+        """
+        RS-485 버스 매니저에 등록 (포트를 혼자 쓰지 않고 같은 버스의 다른 slave와 공유)
+        """
+        bus = manager.bus(self.port, baudrate=self.baudrate, bytesize=self.bytesize, parity=self.parity,
+                          stopbits=self.stopbits, timeout=self.timeout)
+        bus.add(self.slave_address, 0, 4, lambda values: self._store(self._decode(values)),
+                period=period, priority=priority, name=self.name)
+        self.running = True
+
     def _loop(self):
         """
         연결이 끊기면 재연결을 시도하고, 데이터를 읽어 변수에 저장하는 무한 루프 함수
@@ -96,16 +144,10 @@ class SoilSensor:
             try:
                 values = self.instrument.read_registers(0, 4, functioncode=3)
                 
-                new_data = SoilData(
-                    soil_temperature=values[1] / 10.0,
-                    soil_humidity=values[0] / 10.0,
-                    soil_ec=int(values[2]),
-                    soil_ph=values[3] / 10.0
-                )
+                new_data = self._decode(values)
 
                 # 성공 시 데이터 업데이트
-                with self.data_lock:
-                    self._latest_data = new_data
+                self._store(new_data)
                 
                 time.sleep(0.5) # 0.5초 간격 갱신
 
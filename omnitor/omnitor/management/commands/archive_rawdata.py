@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from omnitor.services import archive
+
+
+class Command(BaseCommand):
+    help = "보관 기간이 지난 RawData를 하루 단위 Parquet 파일로 옮기고 DB에서 삭제 (스케줄러 작업을 바로 실행)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=archive.RETENTION_DAYS,
+                            help="DB에 남길 기간 (일, 기본은 settings.RAWDATA_RETENTION_DAYS)")
+
+    def handle(self, *args, **options):
+        if not archive.available():
+            raise CommandError("pyarrow가 설치되어 있지 않습니다. (pip install pyarrow)")
+        if options['retention_days'] is None:
+            raise CommandError("보관 기간이 설정되지 않았습니다. (--retention-days 또는 RAWDATA_RETENTION_DAYS)")
+
+        done = archive.run_retention(options['retention_days'])
+        for day, count in done:
+            self.stdout.write(f"{day}: {count}행 -> {archive.day_path(day)}")
+        self.stdout.write(f"{len(done)}일 보관, 총 {sum(count for _, count in done)}행")
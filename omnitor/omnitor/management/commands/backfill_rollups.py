@@ -0,0 +1,38 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from omnitor.services import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "기존 FinalData로 10분 / 1시간 / 1일 구간 요약(FinalDataRollup)을 다시 계산합니다. "
+        "generate_history / 복구 적재 뒤나 요약이 어긋났을 때 실행 (같은 구간은 덮어씀)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', default=None, help="시작 날짜 (YYYY-MM-DD, 기본은 처음부터)")
+        parser.add_argument('--end', default=None, help="끝 날짜 (YYYY-MM-DD, 이 날 포함, 기본은 끝까지)")
+
+    def handle(self, *args, **options):
+        start = self._date(options['start'])
+        end = self._date(options['end'])
+
+        def on_progress(count, ts):
+            self.stdout.write(f"[backfill_rollups] {count}행 ({ts:%Y-%m-%d %H:%M})")
+
+        started = time.perf_counter()
+        count = rollups.backfill(start, end, on_progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"FinalData {count}행 요약, {elapsed:.1f}s")
+
+    def _date(self, value):
+        if value is None:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"날짜 형식이 올바르지 않습니다: {value}")
+        return datetime.combine(day, datetime.min.time())
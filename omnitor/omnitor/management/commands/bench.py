@@ -0,0 +1,269 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+
+# 데이터 분량 (초)
+SIZES = {
+    '1d': 86400,
+    '30d': 30 * 86400,
+    '1y': 365 * 86400,
+}
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'bench', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "수집 / 필터 / 그래프 경로 마이크로벤치마크. "
+        "테스트 DB에 1일 / 30일 / 1년 분량의 RawData, FinalData를 채우고 경로별 시간과 최대 메모리를 측정해 "
+        "기준값(baseline)과 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1d,30d,1y', help="데이터 분량 (쉼표 구분, 1d / 30d / 1y)")
+        parser.add_argument('--repeat', type=int, default=5, help="경로별 반복 횟수 (중앙값 사용)")
+        parser.add_argument('--raw-step', type=int, default=1, help="채울 RawData 간격 (초)")
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="기준값 JSON 파일")
+        parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준값으로 저장")
+        parser.add_argument('--threshold', type=float, default=0.25, help="허용 성능 저하 비율 (0.25 = 25%%)")
+        parser.add_argument('--output', help="결과를 JSON으로 저장할 파일")
+        parser.add_argument('--compare', help="다른 DB에서 저장한 결과 JSON (--output)과 나란히 비교, 성능 저하 판정은 하지 않음")
+        parser.add_argument('--no-keepdb', action='store_true',
+                            help="끝나면 테스트 DB 삭제 (기본은 유지해서 다음 실행 때 다시 채우지 않음)")
+
+    def handle(self, *args, **options):
+        sizes = [s.strip() for s in options['sizes'].split(',') if s.strip()]
+        unknown = [s for s in sizes if s not in SIZES]
+        if unknown:
+            raise CommandError(f"알 수 없는 분량: {', '.join(unknown)}")
+        sizes.sort(key=SIZES.get)
+
+        keepdb = not options['no_keepdb']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb, serialize=False)
+        try:
+            self._isolate_state()
+            results = {}
+            for size in sizes:
+                self._seed(SIZES[size], options['raw_step'])
+                for case, ms, peak in self._run_cases(SIZES[size], options['repeat']):
+                    results[f"{size}:{case}"] = {'ms': ms, 'peak_kb': peak}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+        if options['compare']:
+            # 예: PostgreSQL 결과와 OMNITOR_DB=sqlite 결과를 같은 장비에서 비교
+            other = self._load_json(options['compare'])
+            self.stdout.write(f"{connection.vendor} vs {other.get('database')} ({options['compare']})")
+            self._report(results, other.get('results', {}), options['threshold'])
+            if options['output']:
+                self._write_json(options['output'], results)
+            return
+
+        baseline = self._load_baseline(options['baseline'])
+        regressions = self._report(results, baseline, options['threshold'])
+
+        if options['output']:
+            self._write_json(options['output'], results)
+        if options['save_baseline']:
+            self._write_json(options['baseline'], results)
+            self.stdout.write(f"기준값 저장: {options['baseline']}")
+        elif regressions:
+            raise CommandError(f"성능 저하 {len(regressions)}건: {', '.join(regressions)}")
+
+    # ===== 준비 =====
+    def _isolate_state(self):
+        """save_finaldata가 실제 누적값 체크포인트 파일을 건드리지 않도록 임시 파일 사용"""
+        from omnitor.services.accumulators import DailyAccumulator, DailyAccumulatorSingleton
+
+        state_dir = tempfile.mkdtemp(prefix='omnitor-bench-')
+        DailyAccumulatorSingleton._instance = DailyAccumulator(os.path.join(state_dir, 'daily_totals.json'))
+
+    def _span(self, model):
+        """(가장 오래된, 가장 최근) timestamp의 epoch 초, 데이터가 없으면 None"""
+        first = model.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if first is None:
+            return None
+        last = model.objects.order_by('-timestamp').values_list('timestamp', flat=True).first()
+        return first.timestamp(), last.timestamp()
+
+    def _seed(self, seconds, raw_step):
+        """
+        최근 시각(anchor)부터 seconds만큼 과거까지 채워지도록 부족한 앞부분만 추가
+        (keepdb로 유지된 데이터는 다시 넣지 않음)
+        """
+        from omnitor.models import RawData, FinalData
+        from omnitor.services.bulkload import load
+        from omnitor.services.history import FINAL_STEP, final_values, raw_values
+
+        # FinalData는 같은 seed의 1초 RawData를 1분으로 묶은 값 (기존 첫 행과 겹치지 않게 끝 시각 제외)
+        makers = (
+            (RawData, raw_step, lambda start, end: raw_values(start, end, raw_step)),
+            (FinalData, FINAL_STEP, lambda start, end: final_values(start, end, include_end=False)),
+        )
+        for model, step, values in makers:
+            span = self._span(model)
+            if span is None:
+                anchor = time.time() // FINAL_STEP * FINAL_STEP
+                first = anchor
+            else:
+                first, anchor = span[0], span[1] + step
+            start = anchor - seconds
+            if start >= first:
+                continue
+            started = time.perf_counter()
+            count = load(model, values(start, first))
+            self.stdout.write(f"[bench] {model.__name__} {count}행 추가 ({time.perf_counter() - started:.1f}s)")
+
+    # ===== 측정 =====
+    def _measure(self, func, repeat):
+        """(중앙값 ms, 최대 메모리 KB). 시간은 tracemalloc 없이 재고 메모리는 한 번 더 실행해서 잼"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000.0)
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return statistics.median(timings), peak / 1024.0
+
+    def _run_cases(self, seconds, repeat):
+        import pandas as pd
+        from omnitor.models import FinalData, RawData
+        from omnitor.services import graphcache
+        from omnitor.services.filtering import MovingAverageFilterSingleton, maf_all, prime_filter
+        from omnitor.services.save_data import save_finaldata
+        from omnitor.views.api_graph import graph_api
+
+        factory = RequestFactory()
+        last = FinalData.objects.order_by('-timestamp').values_list('timestamp', flat=True).first()
+        fmt = '%Y-%m-%dT%H:%M:%S'
+
+        def graph(days, unit, cached=False):
+            """
+            cached=False: 응답 캐시를 끄고 매번 DB에서 계산 (cold)
+            cached=True: 빈 캐시에서 한 번 채운 뒤 캐시된 응답을 측정 (warm)
+            """
+            start = last - timedelta(days=days)
+            request = factory.get('/graph_api/', {
+                'start_date': start.strftime(fmt), 'end_date': last.strftime(fmt), 'time_unit': unit,
+            })
+
+            def call():
+                response = graph_api(request)
+                if response.status_code != 200:
+                    raise CommandError(f"graph_api {days}d/{unit}: HTTP {response.status_code}")
+
+            def run():
+                enabled = graphcache.ENABLED
+                graphcache.ENABLED = cached
+                try:
+                    call()
+                finally:
+                    graphcache.ENABLED = enabled
+
+            if cached:
+                graphcache.GraphCacheSingleton._instance = None
+                run()
+            return run
+
+        # 필터: DB에서 읽는 경로 / 수집 프로세스의 메모리 경로
+        maf = MovingAverageFilterSingleton.instance()
+        maf._last_push = None
+
+        yield ('maf_all.db',) + self._measure(maf_all, repeat)
+
+        prime_filter()
+        latest = RawData.objects.order_by('-timestamp').first()
+
+        def maf_live():
+            maf.push(latest)
+            return maf_all()
+        yield ('maf_all.live',) + self._measure(maf_live, repeat)
+        maf._last_push = None
+
+        # save_finaldata는 close_old_connections()를 부르므로 트랜잭션으로 감싸지 않고 측정 후 삭제
+        max_id = FinalData.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        yield ('save_finaldata',) + self._measure(save_finaldata, repeat)
+        FinalData.objects.filter(id__gt=max_id).delete()
+
+        days = seconds // 86400
+        ranges = [(1, '1m')] + ([(7, '10m')] if days >= 7 else []) + [(days, '1h')]
+        for span, unit in ranges:
+            yield (f'graph_api.{span}d.{unit}',) + self._measure(graph(span, unit), repeat)
+            yield (f'graph_api.{span}d.{unit}.warm',) + self._measure(graph(span, unit, cached=True), repeat)
+        graphcache.GraphCacheSingleton._instance = None
+
+        # graph_api 안의 단계만 따로: DB 구간 집계, 응답 인코딩 (records / columns)
+        from omnitor.services import aggregation, wire
+
+        fields = [f.name for f in FinalData._meta.concrete_fields if f.name != 'id']
+        first = last - timedelta(days=days)
+
+        def aggregate():
+            return aggregation.aggregate(FinalData, first, last, 3600, fields)
+        if aggregation.supported():
+            yield ('aggregation.1h',) + self._measure(aggregate, repeat)
+
+        rows = list(FinalData.objects.filter(timestamp__gte=first).values(*fields).order_by('timestamp'))
+        frame = pd.DataFrame(rows)
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+        summary = {'total_insolation': 0, 'total_irrigation': 0, 'total_drainage': 0}
+
+        def encode(layout):
+            return lambda: wire.encode(frame, summary, 'json', layout)
+        yield ('wire.encode.records',) + self._measure(encode('records'), repeat)
+        yield ('wire.encode.columns',) + self._measure(encode('columns'), repeat)
+
+    # ===== 결과 =====
+    def _load_baseline(self, path):
+        if not os.path.exists(path):
+            self.stdout.write(f"기준값 없음 ({path}), --save-baseline으로 저장하세요.")
+            return {}
+        return self._load_json(path).get('results', {})
+
+    def _load_json(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"결과 파일을 읽을 수 없습니다: {path} ({e})")
+
+    def _write_json(self, path, results):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    def _report(self, results, baseline, threshold):
+        """결과 표 출력, 기준값 대비 threshold 넘게 느려지거나 메모리가 늘어난 항목 반환"""
+        regressions = []
+        self.stdout.write(f"{'case':<32}{'ms':>12}{'peak KB':>12}{'base ms':>12}{'change':>10}")
+        for key, result in results.items():
+            base = baseline.get(key)
+            line = f"{key:<32}{result['ms']:>12.2f}{result['peak_kb']:>12.0f}"
+            if base:
+                change = result['ms'] / base['ms'] - 1 if base['ms'] else 0.0
+                line += f"{base['ms']:>12.2f}{change:>+10.0%}"
+                if change > threshold or result['peak_kb'] > base['peak_kb'] * (1 + threshold):
+                    regressions.append(key)
+                    line += "  REGRESSION"
+            self.stdout.write(line)
+        return regressions
@@ -0,0 +1,73 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from omnitor.models import FinalData, RawData
+from omnitor.services import bulkload, history
+
+
+class Command(BaseCommand):
+    help = (
+        "운영 규모 재현용 과거 데이터 생성. "
+        "시뮬레이터 온실 모델(하루 주기 온도 / 일사, 관수에 따른 무게 변화, 배액 전도, 센서 끊김)로 "
+        "RawData(1초)와 FinalData(1분)를 만들고 PostgreSQL COPY로 여러 프로세스에서 동시에 적재합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=365, help="생성할 기간 (일, 끝 시각부터 과거로)")
+        parser.add_argument('--end', type=float, default=None,
+                            help="끝 시각 (epoch 초, 기본은 가장 오래된 기존 데이터 직전 또는 현재)")
+        parser.add_argument('--raw-step', type=int, default=1, help="RawData 간격 (초)")
+        parser.add_argument('--no-raw', action='store_true', help="RawData는 만들지 않음")
+        parser.add_argument('--no-final', action='store_true', help="FinalData는 만들지 않음")
+        parser.add_argument('--no-gaps', action='store_true', help="센서 끊김 구간 없이 생성")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="동시 적재 프로세스 수")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['days'] <= 0:
+            raise CommandError("--days는 0보다 커야 합니다.")
+
+        end = options['end']
+        if end is None:
+            end = self._default_end()
+        end = end // history.FINAL_STEP * history.FINAL_STEP
+        start = end - options['days'] * 86400
+
+        bounds = list(history.days(start, end))
+        jobs = []
+        if not options['no_raw']:
+            step = options['raw_step']
+            # 청크마다 다른 seed (같은 seed면 같은 데이터가 다시 만들어짐), 배지 상태는 앞 청크에서 이어짐
+            chunks = [(chunk_start, chunk_end, step, options['seed'] + i, not options['no_gaps'], state)
+                      for i, ((chunk_start, chunk_end), state) in enumerate(zip(bounds, history.states(bounds, step)))]
+            jobs.append((RawData, history.raw_values, chunks))
+        if not options['no_final']:
+            # RawData와 같은 seed / 상태의 1초 값을 1분으로 묶음 (마지막 청크는 끝 시각 행 제외)
+            chunks = [(chunk_start, chunk_end, options['seed'] + i, not options['no_gaps'], state, i < len(bounds) - 1)
+                      for i, ((chunk_start, chunk_end), state) in enumerate(zip(bounds, history.states(bounds)))]
+            jobs.append((FinalData, history.final_values, chunks))
+
+        method = 'COPY' if bulkload.copy_supported() else 'bulk_create'
+        for model, make_rows, chunks in jobs:
+            done = [0]
+
+            def on_done(args, count, model=model, total=len(chunks)):
+                done[0] += 1
+                if done[0] % 10 == 0 or done[0] == total:
+                    self.stdout.write(f"[generate_history] {model.__name__} {done[0]}/{total} 청크")
+
+            started = time.perf_counter()
+            count = bulkload.parallel_load(model, make_rows, chunks, options['workers'], on_done)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{model.__name__}: {count}행, {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} rows/s, {method})"
+            )
+
+    def _default_end(self):
+        """기존 데이터와 겹치지 않도록 가장 오래된 행 직전까지, 없으면 현재 시각"""
+        firsts = [model.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+                  for model in (RawData, FinalData)]
+        firsts = [ts.timestamp() for ts in firsts if ts is not None]
+        return min(firsts) if firsts else time.time()
@@ -0,0 +1,89 @@
+import glob
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from omnitor.models import FinalData, RawData
+from omnitor.services import bulkload, logimport
+
+
+class Command(BaseCommand):
+    help = (
+        "이전 로거 / 오프라인 장치의 CSV 로그(.csv, .gz, .bz2, .xz)를 RawData 또는 FinalData로 가져옵니다. "
+        "PostgreSQL이면 staging 테이블로 COPY한 뒤 이미 있는 timestamp를 빼고 한 번에 넣고, 파일 단위로 동시에 처리합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="로그 파일 또는 glob 패턴 (디렉터리면 안의 파일 전체)")
+        parser.add_argument('--model', choices=['raw', 'final'], default='raw', help="가져올 테이블")
+        parser.add_argument('--map', action='append', default=[], metavar='HEADER=FIELD',
+                            help="CSV 헤더 -> 필드 매핑 (여러 번 지정 가능, 예: --map 'Temp(C)=air_temperature')")
+        parser.add_argument('--time-format', default=None,
+                            help="timestamp 형식 (strptime, 기본은 ISO 형식 / epoch 초 자동 인식)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="동시 처리 프로세스 수")
+        parser.add_argument('--regenerate-final', action='store_true',
+                            help="RawData를 가져온 뒤 그 기간의 FinalData를 다시 계산 (이미 있는 분은 유지)")
+
+    def handle(self, *args, **options):
+        paths = self._expand(options['paths'])
+        if not paths:
+            raise CommandError("가져올 파일이 없습니다.")
+
+        overrides = {}
+        for item in options['map']:
+            header, sep, field = item.partition('=')
+            if not sep or not field:
+                raise CommandError(f"--map 형식이 올바르지 않습니다: {item} (HEADER=FIELD)")
+            overrides[header] = field.strip()
+
+        model = RawData if options['model'] == 'raw' else FinalData
+        method = 'COPY' if bulkload.copy_supported() else 'bulk_create'
+        self.stdout.write(f"{model.__name__}: 파일 {len(paths)}개 ({method})")
+
+        def on_done(result):
+            line = (f"{result['path']}: {result['read']}줄, {result['inserted']}행 추가, "
+                    f"중복 {result['duplicates']}, 건너뜀 {result['skipped']}")
+            if result['unmapped']:
+                line += f" (무시한 열: {', '.join(result['unmapped'])})"
+            self.stdout.write(line)
+
+        started = time.perf_counter()
+        try:
+            results = logimport.import_files(model, paths, overrides, options['time_format'],
+                                             options['workers'], on_done)
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        inserted = sum(r['inserted'] for r in results)
+        self.stdout.write(
+            f"총 {inserted}행 추가, 중복 {sum(r['duplicates'] for r in results)}, "
+            f"건너뜀 {sum(r['skipped'] for r in results)}, {elapsed:.1f}s "
+            f"({inserted / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+        stamps = [r[key] for r in results for key in ('first', 'last') if r[key] is not None]
+        if not stamps:
+            return
+        start, end = min(stamps), max(stamps)
+        if model is RawData and options['regenerate_final']:
+            count = logimport.regenerate_final(start, end)
+            self.stdout.write(f"FinalData {count}행 재생성 ({start} ~ {end})")
+        elif model is FinalData and inserted:
+            from omnitor.services import rollups
+            rollups.backfill(start, end)
+            self.stdout.write(f"FinalData 구간 요약 갱신 ({start} ~ {end})")
+
+    def _expand(self, patterns):
+        paths = []
+        for pattern in patterns:
+            if os.path.isdir(pattern):
+                paths.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                    if os.path.isfile(os.path.join(pattern, name))))
+                continue
+            matched = sorted(glob.glob(pattern))
+            if not matched:
+                raise CommandError(f"파일을 찾을 수 없습니다: {pattern}")
+            paths.extend(matched)
+        return paths
@@ -0,0 +1,198 @@
+import heapq
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class EndpointStats:
+    """엔드포인트 하나의 요청 결과 (지연 ms, 오류, 요청당 DB 쿼리 수, 쿼리 수를 잴 수 없던 응답 수)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+        self.queries = []
+        self.db_ms = []
+        self.bytes = 0
+        self.unmeasured = 0
+
+    def add(self, ms, status, size, queries, db_ms, unmeasured=False):
+        self.latencies.append(ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status == 0 or status >= 500:
+            self.errors += 1
+        self.bytes += size
+        if queries is not None:
+            self.queries.append(queries)
+        if db_ms is not None:
+            self.db_ms.append(db_ms)
+        if unmeasured:
+            self.unmeasured += 1
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def pct(p):
+            return latencies[min(count - 1, int(count * p))] if count else None
+
+        return {
+            'requests': count,
+            'rps': count / duration if duration else 0.0,
+            'errors': self.errors,
+            'error_rate': self.errors / count if count else 0.0,
+            'statuses': self.statuses,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+            'max_ms': latencies[-1] if count else None,
+            'avg_queries': sum(self.queries) / len(self.queries) if self.queries else None,
+            'max_queries': max(self.queries) if self.queries else None,
+            'avg_db_ms': sum(self.db_ms) / len(self.db_ms) if self.db_ms else None,
+            'queries_unmeasured': self.unmeasured,
+            'avg_kb': self.bytes / count / 1024.0 if count else 0.0,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "대시보드 / 보정 / 그래프 API 부하 테스트. "
+        "실행 중인 서버에 N명의 가상 사용자가 실제 화면과 같은 주기로 요청하고 "
+        "엔드포인트별 p50/p95/p99 지연, 처리량, 오류율, 요청당 DB 쿼리 수를 보고합니다. "
+        "쿼리 수는 서버의 settings.QUERY_COUNT_HEADER = True일 때만 나오고, "
+        "스트리밍 응답(CSV / 엑셀 내보내기)은 잴 수 없어서 '측정 안 됨'으로 표시합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="서버 주소")
+        parser.add_argument('--clients', type=int, default=10, help="동시 가상 사용자 수")
+        parser.add_argument('--duration', type=float, default=60.0, help="테스트 시간 (초)")
+        parser.add_argument('--calibrate-ratio', type=float, default=0.2,
+                            help="보정 화면을 열어둔 사용자 비율 (/calibrate_api/ 1초, /dashboard_api/ 5초)")
+        parser.add_argument('--graph-every', type=float, default=60.0,
+                            help="사용자마다 7일 그래프 조회 간격 (초, 0이면 안 함)")
+        parser.add_argument('--excel-every', type=float, default=600.0,
+                            help="사용자마다 엑셀 내보내기 간격 (초, 0이면 안 함)")
+        parser.add_argument('--timeout', type=float, default=30.0, help="요청 timeout (초)")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help="결과를 JSON으로 저장할 파일")
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1:
+            raise CommandError("--clients는 1 이상이어야 합니다.")
+
+        self.base_url = options['url'].rstrip('/')
+        self.timeout = options['timeout']
+        self.random = random.Random(options['seed'])
+        self.stats = {}
+        self._lock = threading.Lock()
+
+        deadline = time.monotonic() + options['duration']
+        threads = []
+        for i in range(options['clients']):
+            plan = self._plan(options, calibrate=i < round(options['clients'] * options['calibrate_ratio']))
+            t = threading.Thread(target=self._client, args=(plan, deadline), daemon=True)
+            threads.append(t)
+
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+
+        results = {name: stats.summary(elapsed) for name, stats in sorted(self.stats.items())}
+        self._report(results, options['clients'], elapsed)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'clients': options['clients'], 'duration': elapsed, 'endpoints': results},
+                          f, indent=2, ensure_ascii=False)
+
+    def _plan(self, options, calibrate):
+        """
+        가상 사용자 하나의 요청 목록 [(이름, 경로, 주기)]
+        - 모든 사용자: 대시보드 5초 폴링 (dashboard.html)
+        - 보정 화면 사용자: /calibrate_api/ 1초 폴링 (calibrate.html)
+        - 7일 그래프 조회, 엑셀 내보내기 (graph.html)
+        """
+        graph = {'time_range': '7d', 'time_unit': '10m'}
+        plan = [('dashboard', '/dashboard_api/', 5.0)]
+        if calibrate:
+            plan.append(('calibrate', '/calibrate_api/', 1.0))
+        if options['graph_every'] > 0:
+            plan.append(('graph_7d', '/graph_api/?' + urlencode(graph), options['graph_every']))
+        if options['excel_every'] > 0:
+            plan.append(('excel_7d', '/graph_api/?' + urlencode(dict(graph, format='excel')), options['excel_every']))
+        return plan
+
+    def _client(self, plan, deadline):
+        """브라우저 탭처럼 주기마다 요청 (시작 시각은 사용자마다 흩어짐)"""
+        now = time.monotonic()
+        with self._lock:
+            heap = [(now + self.random.uniform(0, period), i, name, path, period)
+                    for i, (name, path, period) in enumerate(plan)]
+        heapq.heapify(heap)
+
+        while heap:
+            due, i, name, path, period = heapq.heappop(heap)
+            if due >= deadline:
+                break
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._request(name, path)
+            # 응답이 늦으면 다음 요청도 밀림 (setInterval + await와 비슷하게)
+            heapq.heappush(heap, (max(due + period, time.monotonic()), i, name, path, period))
+
+    def _request(self, name, path):
+        started = time.perf_counter()
+        status, size, queries, db_ms, unmeasured = 0, 0, None, None, False
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=self.timeout) as response:
+                size = len(response.read())
+                status = response.status
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            status = e.code
+            size = len(e.read())
+            headers = e.headers
+        except Exception:
+            headers = None
+        ms = (time.perf_counter() - started) * 1000.0
+
+        if headers is not None:
+            if headers.get('X-DB-Queries') is not None:
+                queries = int(headers['X-DB-Queries'])
+            if headers.get('X-DB-Time') is not None:
+                db_ms = float(headers['X-DB-Time'])
+            unmeasured = headers.get('X-DB-Not-Measured') is not None
+
+        with self._lock:
+            self.stats.setdefault(name, EndpointStats()).add(ms, status, size, queries, db_ms, unmeasured)
+
+    def _report(self, results, clients, elapsed):
+        self.stdout.write(f"clients={clients} duration={elapsed:.1f}s")
+        self.stdout.write(f"{'endpoint':<12}{'req':>8}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}"
+                          f"{'max':>9}{'queries':>9}{'db ms':>8}{'KB':>8}")
+
+        def fmt(value, width):
+            return f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<12}{r['requests']:>8}{r['rps']:>8.2f}{r['error_rate'] * 100:>7.1f}"
+                f"{fmt(r['p50_ms'], 9)}{fmt(r['p95_ms'], 9)}{fmt(r['p99_ms'], 9)}"
+                f"{fmt(r['max_ms'], 9)}{fmt(r['avg_queries'], 9)}{fmt(r['avg_db_ms'], 8)}"
+                f"{r['avg_kb']:>8.1f}"
+            )
+
+        for name, r in results.items():
+            if r['queries_unmeasured']:
+                self.stdout.write(f"* {name}: 스트리밍 응답 {r['queries_unmeasured']}건은 DB 쿼리 수 / 시간 측정 안 됨 "
+                                  f"(본문을 보내면서 조회함)")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from omnitor.services import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "RawData / FinalData 월 단위 RANGE 파티션 관리 (PostgreSQL 전용). "
+        "--convert로 기존 테이블을 파티션 테이블로 바꾸고, 기본 실행은 다음 달 파티션 생성 + 보관 기간 지난 파티션 DETACH."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help="기존 테이블을 파티션 테이블로 변환 (기존 데이터는 legacy 파티션으로 붙임)")
+        parser.add_argument('--months-ahead', type=int, default=partitions.MONTHS_AHEAD,
+                            help="미리 만들어 둘 월 파티션 수")
+
+    def handle(self, *args, **options):
+        if not partitions.supported():
+            raise CommandError("파티셔닝은 PostgreSQL에서만 지원합니다.")
+
+        for model in partitions._models():
+            table = model._meta.db_table
+            if options['convert'] and partitions.convert(model):
+                self.stdout.write(f"{table}: 파티션 테이블로 변환")
+            if not partitions.is_partitioned(table):
+                partitions.ensure_brin(table)
+                self.stdout.write(f"{table}: 파티션 아님 (BRIN 인덱스만 확인, --convert로 변환)")
+                continue
+
+            created = partitions.ensure_partitions(model, options['months_ahead'])
+            detached = partitions.detach_expired(model, partitions.RETENTION_MONTHS.get(table))
+            for name in created:
+                self.stdout.write(f"{table}: {name} 생성")
+            for name in detached:
+                self.stdout.write(f"{table}: {name} DETACH (일반 테이블로 남음)")
+            for name, bound in partitions.partitions(table):
+                self.stdout.write(f"  {name}  {bound}")
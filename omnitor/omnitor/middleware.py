@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+class QueryCountMiddleware:
+    """
+    요청마다 실행된 DB 쿼리 수와 시간을 응답 헤더로 추가 (부하 테스트용, settings.QUERY_COUNT_HEADER)
+    - X-DB-Queries: 쿼리 수
+    - X-DB-Time: 쿼리 실행 시간 합계 (ms)
+    - 스트리밍 응답(CSV / 엑셀 내보내기)은 헤더를 보낸 뒤에 본문을 만들며 조회하므로 수를 셀 수 없음
+      -> 두 헤더 대신 X-DB-Not-Measured: streaming
+    DEBUG가 아니어도 동작하도록 connection.queries 대신 execute_wrapper 사용
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_COUNT_HEADER', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {'count': 0, 'seconds': 0.0}
+
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['count'] += 1
+                stats['seconds'] += time.perf_counter() - started
+
+        with connection.execute_wrapper(wrapper):
+            response = self.get_response(request)
+
+        if response.streaming:
+            response['X-DB-Not-Measured'] = 'streaming'
+            return response
+        response['X-DB-Queries'] = str(stats['count'])
+        response['X-DB-Time'] = f"{stats['seconds'] * 1000.0:.1f}"
+        return response
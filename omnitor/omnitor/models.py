@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import datetime
 
 
@@ -22,7 +23,7 @@ class RawData(models.Model):
     """ 센서 raw 데이터 모델 (아두이노 & 토양 포함)
         타임스탬프, 온도, 습도, CO2, 일사량, 수온, 무게(raw), pH(raw), EC(raw), 티핑게이지 카운트 """
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)  # 배치 저장 / 스풀 재적재 때 측정 시각을 그대로 유지
     
     # 환경 센서
     air_temperature = models.FloatField(null=True, blank=True)
@@ -50,11 +51,28 @@ class RawData(models.Model):
     def __str__(self):
         return f"Raw 데이터 at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}: {self.air_temperature}°C, {self.air_humidity}%, {self.co2}ppm, {self.insolation}lx, {self.weight}g, pH:{self.water_ph}, EC:{self.water_ec}, SoilT:{self.soil_temperature}°C, SoilH:{self.soil_humidity}%, SoilEC:{self.soil_ec}, SoilPH:{self.soil_ph}"
 
+class RawDataBlock(models.Model):
+
+    """
+    1분치 RawData를 한 행에 묶어 저장 (settings.RAWDATA_STORAGE = 'blocks'일 때, services/rawblocks.py)
+    values: 필드마다 60칸(초) float32 배열을 이어 붙인 바이너리 (rawblocks.FIELDS 순서)
+    valid: 칸별 유효 비트맵 (첫 줄은 샘플 존재 여부, 그 뒤로 필드별 값 유무)
+    """
+
+    minute = models.DateTimeField(unique=True)   # 분 시작 시각 (초 = 칸 번호)
+    count = models.SmallIntegerField(default=0)   # 샘플이 있는 칸 수
+    values = models.BinaryField()
+    valid = models.BinaryField()
+
+    def __str__(self):
+        return f"RawData 블록 at {self.minute.strftime('%Y-%m-%d %H:%M')}: {self.count}개"
+
+
 class FinalData(models.Model):
 
     """ 최종 보정된 센서 데이터 모델 """
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)  # 배치 저장 / 스풀 재적재 때 측정 시각을 그대로 유지
     
     # 환경
     air_temperature = models.FloatField(null=True, blank=True)
@@ -134,3 +152,26 @@ class CalibrationSettings(models.Model):
     def __str__(self):
         return "Calibration Settings (ID: 1)"
     
+
+
+class FinalDataRollup(models.Model):
+
+    """
+    FinalData 구간 요약 (10분 / 1시간 / 1일), 긴 기간 그래프 조회용
+    stats: {필드: {'n': 개수, 'sum': 합계, 'min': 최소, 'max': 최대, 'last': 구간 마지막 값}}
+    FinalData가 저장될 때마다 services/rollups.py에서 갱신
+    """
+
+    tier = models.CharField(max_length=8)           # '10m' / '1h' / '1d'
+    bucket = models.DateTimeField()                  # 구간 시작 시각 (현지 시간 기준으로 나눔)
+    count = models.IntegerField(default=0)           # 구간에 들어간 FinalData 행 수
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    stats = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tier', 'bucket'], name='finaldata_rollup_tier_bucket'),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.tier} at {self.bucket.strftime('%Y-%m-%d %H:%M')}: {self.count}개"
@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+# 하루 누적값 체크포인트 파일 (settings.py에서 덮어쓰기 가능)
+STATE_FILE = getattr(settings, 'ACCUMULATOR_STATE_FILE',
+                     os.path.join(settings.BASE_DIR, 'state', 'daily_totals.json'))
+
+TIP_CAPACITY = 5          # 티핑 게이지 한번 당 배액량 = 5 ml
+IRRIGATION_THRESHOLD = 100  # 무게가 이 값 이상 늘면 관수로 판단
+
+
+def _local(dt):
+    return timezone.localtime(dt) if timezone.is_aware(dt) else dt
+
+
+class DailyAccumulator:
+    """
+    하루 누적 일사량 / 관수량 / 배액량을 메모리에서 이어서 계산 (save_finaldata에서 1분마다 호출)
+    - 매 분 O(1) 계산, 결과는 작은 JSON 파일에 체크포인트
+    - 자정(로컬 시간)이 지나면 누적값 초기화
+    - 재시작 시 체크포인트와 오늘 마지막 FinalData 중 더 최신 쪽에서 복구
+    """
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.loaded = False
+
+        self.day = None
+        self.last_timestamp = None
+        self.total_insolation = 0.0
+        self.total_irrigation = 0.0
+        self.tips = 0               # 오늘 티핑 횟수
+        self.prev_weight = 0.0      # 이전 무게 값 (관수량 계산용)
+        self.last_tip_count = 0     # GPIO tip_count는 프로세스 시작 시 0부터 다시 셈
+
+    # ===== 복구 / 저장 =====
+    def load(self, now):
+        """체크포인트 또는 DB에서 오늘 누적값 복구"""
+        from omnitor.models import FinalData
+
+        today = _local(now).date()
+        state = self._read_state_file()
+
+        today_start = datetime.combine(today, datetime.min.time())
+        if timezone.is_aware(now):
+            today_start = timezone.make_aware(today_start)
+        try:
+            latest = FinalData.objects.filter(timestamp__gte=today_start).order_by('-timestamp').first()
+        except DatabaseError as e:
+            # DB 장애 중 시작: 체크포인트 파일만으로 복구 (FinalData는 스풀로 들어감)
+            print(f"[accumulators] FinalData 조회 실패, 체크포인트로 복구: {e}", flush=True)
+            latest = None
+
+        state_ts = None
+        if state and state['day'] == today.isoformat() and state['last_timestamp']:
+            state_ts = datetime.fromisoformat(state['last_timestamp'])
+
+        if latest and (state_ts is None or latest.timestamp > state_ts):
+            # 체크포인트가 없거나 DB가 더 최신이면 마지막 FinalData 행에서 복구
+            self.day = today
+            self.last_timestamp = latest.timestamp
+            self.total_insolation = latest.total_insolation or 0.0
+            self.total_irrigation = latest.total_irrigation or 0.0
+            self.tips = (latest.total_drainage or 0) // TIP_CAPACITY
+            self.prev_weight = latest.weight or 0.0
+        elif state_ts is not None:
+            self.day = today
+            self.last_timestamp = state_ts
+            self.total_insolation = state['total_insolation']
+            self.total_irrigation = state['total_irrigation']
+            self.tips = state['tips']
+            self.prev_weight = state['prev_weight']
+        else:
+            # 오늘 데이터가 없음: 무게만 이어받고 0부터 시작
+            self.day = today
+            self.prev_weight = state['prev_weight'] if state else self._last_weight()
+
+        self.last_tip_count = 0
+        self.loaded = True
+
+    def checkpoint(self):
+        """
+        현재 누적값을 파일로 저장
+        임시 파일 + os.replace로 원자적으로 교체 (SD 카드 마모를 줄이려고 fsync는 생략,
+        전원이 나가면 마지막 FinalData 행에서 복구)
+        """
+        with self._lock:
+            state = {
+                'day': self.day.isoformat(),
+                'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp else '',
+                'total_insolation': self.total_insolation,
+                'total_irrigation': self.total_irrigation,
+                'tips': self.tips,
+                'prev_weight': self.prev_weight,
+            }
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp = self.state_file + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            print(f"[accumulators] Checkpoint Error: {e}", flush=True)
+
+    def _read_state_file(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _last_weight(self):
+        from omnitor.models import FinalData
+        try:
+            latest = FinalData.objects.order_by('-timestamp').values_list('weight', flat=True).first()
+        except DatabaseError:
+            latest = None
+        return latest or 0.0
+
+    # ===== 매 분 계산 =====
+    def step(self, now, insolation, current_weight, tip_count):
+        """
+        1분치 값을 누적하고 FinalData에 들어갈 값을 반환
+        반환: irrigation, total_insolation, total_irrigation, total_drainage
+        """
+        if not self.loaded:
+            self.load(now)
+
+        with self._lock:
+            today = _local(now).date()
+            if today != self.day:
+                # 자정 롤오버
+                self.day = today
+                self.total_insolation = 0.0
+                self.total_irrigation = 0.0
+                self.tips = 0
+
+            # 관수량 (급수량) 계산
+            irrigation = 0
+            if self.prev_weight > 0 and current_weight > self.prev_weight + IRRIGATION_THRESHOLD:
+                irrigation = current_weight - self.prev_weight
+
+            # 배액: 이전 tip_count와의 차이만 더함 (카운터가 초기화되었으면 현재 값 전체)
+            if tip_count is not None:
+                delta = tip_count - self.last_tip_count
+                if delta < 0:
+                    delta = tip_count
+                self.tips += delta
+                self.last_tip_count = tip_count
+
+            self.total_insolation += insolation or 0
+            self.total_irrigation += irrigation
+            self.prev_weight = current_weight
+            self.last_timestamp = now
+
+            return {
+                'irrigation': irrigation,
+                'total_insolation': self.total_insolation,
+                'total_irrigation': self.total_irrigation,
+                'total_drainage': self.tips * TIP_CAPACITY,
+            }
+
+
+class DailyAccumulatorSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = DailyAccumulator()
+            return cls._instance
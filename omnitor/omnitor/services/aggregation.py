@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Avg, DateTimeField, Func, Max, Min, Sum, Value
+from django.utils import timezone
+
+from .rollups import LAST_METRICS, SUM_METRICS
+
+# 구간 대표값 계산 방법
+AGGREGATES = {
+    'mean': Avg,
+    'min': Min,
+    'max': Max,
+    'sum': Sum,
+    'last': None,     # 구간에서 timestamp가 가장 큰 행의 값 (GROUP BY 후 따로 조회)
+}
+
+LAST_FETCH_CHUNK = 1000
+
+ORIGIN = datetime(2000, 1, 1)     # 구간 기준 시각 (현지 자정, 7일 구간은 토요일 시작)
+ORIGIN_EPOCH = 946684800          # ORIGIN을 SQLite 문자열 시각 그대로 epoch로 본 값
+
+
+def supported():
+    """date_bin (PostgreSQL 14+) 또는 SQLite 정수 나눗셈으로 구간을 나눌 수 있는 DB인지"""
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def default_how(field):
+    """그래프 기본 대표값: 하루 누적값은 마지막 값, 관수량은 합계, 나머지는 평균 (rollups와 같음)"""
+    if field in LAST_METRICS:
+        return 'last'
+    if field in SUM_METRICS:
+        return 'sum'
+    return 'mean'
+
+
+def bin_start(ts, seconds):
+    """ts가 들어가는 구간의 시작 시각 (DateBin과 같은 경계, Python 쪽 계산용)"""
+    origin = timezone.make_aware(ORIGIN) if timezone.is_aware(ts) else ORIGIN
+    step = timedelta(seconds=seconds)
+    return origin + (ts - origin) // step * step
+
+
+def _origin():
+    """구간 기준 시각: 현지 자정 (1시간 / 1일 구간이 벽시계 경계에 맞도록)"""
+    return timezone.make_aware(ORIGIN) if settings.USE_TZ else ORIGIN
+
+
+class DateBin(Func):
+    """
+    timestamp를 seconds 간격 구간의 시작 시각으로 내림
+    PostgreSQL: date_bin(interval, ts, origin) / SQLite: epoch 초 정수 나눗셈
+    """
+
+    function = 'date_bin'
+
+    def __init__(self, expression, seconds, **extra):
+        self.seconds = int(seconds)
+        super().__init__(Value(timedelta(seconds=self.seconds)), expression, Value(_origin()),
+                         output_field=DateTimeField(), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # 파라미터 타입을 명시 (psycopg 클라이언트 측 바인딩에서 date_bin 오버로드가 모호하지 않도록)
+        _, expression, _ = self.get_source_expressions()
+        expr_sql, expr_params = compiler.compile(expression)
+        cast = 'timestamptz' if settings.USE_TZ else 'timestamp'
+        sql = f"date_bin(%s::interval, {expr_sql}, %s::{cast})"
+        return sql, (timedelta(seconds=self.seconds), *expr_params, _origin())
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite는 timestamp를 'YYYY-MM-DD HH:MM:SS' 문자열로 저장 (현지 시각 그대로 epoch로 보고 나눈 뒤 되돌림)
+        _, expression, _ = self.get_source_expressions()
+        expr_sql, expr_params = compiler.compile(expression)
+        n = self.seconds
+        origin = ORIGIN_EPOCH
+        sql = (f"datetime((CAST(strftime('%%s', {expr_sql}) AS INTEGER) - {origin}) / {n} * {n} + {origin}, "
+               f"'unixepoch')")
+        return sql, expr_params
+
+
+def aggregate(model, start, end, seconds, fields, how=None):
+    """
+    [start, end] 구간의 model 행을 seconds 간격으로 묶어 DB에서 바로 집계
+    how: {필드: 'mean' | 'min' | 'max' | 'sum' | 'last'} (없는 필드는 default_how)
+    반환: [{'timestamp': 구간 시작, 필드: 대표값, ...}] (구간 순, 행이 없는 구간은 빠짐)
+    전송 / 메모리는 원본 행 수가 아니라 구간 수에 비례
+    """
+    how = how or {}
+    fields = [f for f in fields if f != 'timestamp']
+    methods = {field: how.get(field) or default_how(field) for field in fields}
+    unknown = {m for m in methods.values() if m not in AGGREGATES}
+    if unknown:
+        raise ValueError(f"알 수 없는 집계 방법: {', '.join(sorted(unknown))}")
+
+    # 모델 필드와 같은 이름으로는 annotate할 수 없어서 별칭 사용
+    annotations = {f'agg_{field}': AGGREGATES[m](field) for field, m in methods.items() if m != 'last'}
+    last_fields = [field for field, m in methods.items() if m == 'last']
+    if last_fields:
+        annotations['last_ts'] = Max('timestamp')
+
+    rows = list(
+        model.objects.filter(timestamp__range=(start, end))
+        .annotate(bucket=DateBin('timestamp', seconds))
+        .values('bucket')
+        .annotate(**annotations)
+        .order_by('bucket')
+    )
+
+    last_values = _last_values(model, [row['last_ts'] for row in rows], last_fields) if last_fields else {}
+
+    result = []
+    for row in rows:
+        item = {'timestamp': row['bucket']}
+        for field in fields:
+            if methods[field] == 'last':
+                item[field] = last_values.get(row['last_ts'], {}).get(field)
+            else:
+                item[field] = row[f'agg_{field}']
+        result.append(item)
+    return result
+
+
+def _last_values(model, stamps, fields):
+    """구간마다 가장 최근 행의 값 {timestamp: {필드: 값}} (timestamp 인덱스로 구간 수만큼만 읽음)"""
+    values = {}
+    stamps = [ts for ts in stamps if ts is not None]
+    for i in range(0, len(stamps), LAST_FETCH_CHUNK):
+        chunk = stamps[i:i + LAST_FETCH_CHUNK]
+        for row in model.objects.filter(timestamp__in=chunk).values('timestamp', *fields):
+            values[row['timestamp']] = row
+    return values
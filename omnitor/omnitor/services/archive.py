@@ -0,0 +1,249 @@
+import math
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import models, transaction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 오래된 RawData를 하루 단위 Parquet 파일로 옮겨두는 곳
+ARCHIVE_DIR = getattr(settings, 'RAWDATA_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive', 'rawdata'))
+
+# DB에 남겨두는 기간 (일), None이면 보관 작업 안 함
+RETENTION_DAYS = getattr(settings, 'RAWDATA_RETENTION_DAYS', None)
+
+COMPRESSION = 'zstd'
+FETCH_CHUNK = 20000
+
+_warned = False
+
+
+def available():
+    return pq is not None
+
+
+def _fields():
+    from omnitor.models import RawData
+    return [f for f in RawData._meta.concrete_fields if f.name != 'id']
+
+
+def _arrow_type(field):
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+    if isinstance(field, (models.IntegerField, models.BigIntegerField)):
+        return pa.int64()
+    return pa.float64()
+
+
+def _schema():
+    return pa.schema([(f.name, _arrow_type(f)) for f in _fields()])
+
+
+def day_path(day):
+    return os.path.join(ARCHIVE_DIR, f"{day.year:04d}", f"{day.isoformat()}.parquet")
+
+
+def archived_days():
+    """보관된 날짜 목록 (오래된 순)"""
+    days = []
+    if not os.path.isdir(ARCHIVE_DIR):
+        return days
+    for year in sorted(os.listdir(ARCHIVE_DIR)):
+        for name in sorted(os.listdir(os.path.join(ARCHIVE_DIR, year))):
+            if name.endswith('.parquet'):
+                days.append(datetime.strptime(name[:-8], '%Y-%m-%d').date())
+    return days
+
+
+def _local_date(dt):
+    from django.utils import timezone
+    return timezone.localtime(dt).date()
+
+
+def _day_range(day):
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    if settings.USE_TZ:
+        from django.utils import timezone
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start, end
+
+
+def _write(path, table):
+    """임시 파일에 쓰고 fsync 후 교체 (중간에 죽어도 반쯤 쓴 파일이 남지 않음)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    pq.write_table(table, tmp, compression=COMPRESSION)
+    with open(tmp, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _block_columns(start, end, names):
+    """분 단위 블록 저장분(RawDataBlock)을 archive_day의 열 형식으로 {필드: [값]} (값 없으면 None)"""
+    from . import rawblocks
+
+    block = rawblocks.read(start, end, names)
+    columns = {}
+    for name in names:
+        if name == 'timestamp':
+            stamps = block['timestamp'].astype(datetime)
+            if settings.USE_TZ:
+                stamps = [ts.replace(tzinfo=dt_timezone.utc) for ts in stamps]
+            columns[name] = list(stamps)
+            continue
+        integer = name in rawblocks.INT_FIELDS
+        columns[name] = [None if math.isnan(v) else (int(round(v)) if integer else v)
+                         for v in block[name].tolist()]
+    return columns
+
+
+def archive_day(day):
+    """
+    하루치 RawData(1초 행 + RAWDATA_STORAGE='blocks'면 분 단위 블록)를 Parquet 파일로 옮기고 DB에서 삭제,
+    옮긴 행 수 반환
+    이미 파일이 있으면 (이전 실행이 삭제 전에 멈춘 경우) 합쳐서 timestamp 중복 제거
+    """
+    from omnitor.models import RawData, RawDataBlock
+
+    fields = _fields()
+    names = [f.name for f in fields]
+    start, end = _day_range(day)
+    rows = RawData.objects.filter(timestamp__gte=start, timestamp__lt=end).order_by('timestamp')
+
+    columns = {name: [] for name in names}
+    for values in rows.values_list(*names).iterator(chunk_size=FETCH_CHUNK):
+        for name, value in zip(names, values):
+            columns[name].append(value)
+
+    # 블록 저장으로 바꾸기 전후가 섞인 날은 두 곳에 다 있을 수 있음 (아래에서 timestamp 중복 제거)
+    blocks = RawDataBlock.objects.filter(minute__gte=start, minute__lt=end)
+    has_blocks = blocks.exists()
+    mixed = has_blocks and bool(columns['timestamp'])
+    if has_blocks:
+        for name, values in _block_columns(start, end, names).items():
+            columns[name].extend(values)
+
+    count = len(columns['timestamp'])
+    if count == 0:
+        return 0
+
+    schema = _schema()
+    table = pa.table({name: pa.array(columns[name], type=schema.field(name).type) for name in names}, schema=schema)
+
+    path = day_path(day)
+    if os.path.exists(path) or mixed:
+        tables = [pq.read_table(path, schema=schema), table] if os.path.exists(path) else [table]
+        merged = pa.concat_tables(tables).to_pandas()
+        merged = merged.drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+        table = pa.Table.from_pandas(merged, schema=schema, preserve_index=False)
+    _write(path, table)
+
+    # 파일이 디스크에 확실히 남은 뒤에 한 번에 삭제
+    with transaction.atomic():
+        RawData.objects.filter(timestamp__gte=start, timestamp__lt=end).delete()
+        blocks.delete()
+    return count
+
+
+def _oldest():
+    """DB에 남은 가장 오래된 RawData 시각 (1초 행 / 분 단위 블록 중), 없으면 None"""
+    from omnitor.models import RawData, RawDataBlock
+
+    stamps = [
+        RawData.objects.order_by('timestamp').values_list('timestamp', flat=True).first(),
+        RawDataBlock.objects.order_by('minute').values_list('minute', flat=True).first(),
+    ]
+    stamps = [ts for ts in stamps if ts is not None]
+    return min(stamps) if stamps else None
+
+
+def run_retention(retention_days=RETENTION_DAYS, now=None):
+    """
+    retention_days보다 오래된 날의 RawData를 하루씩 보관 (apps.py 스케줄러에서 호출)
+    반환: [(날짜, 행 수)]
+    """
+    global _warned
+
+    if retention_days is None:
+        return []
+    if not available():
+        if not _warned:
+            print("[archive] pyarrow가 없어서 RawData 보관을 건너뜀", flush=True)
+            _warned = True
+        return []
+
+    cutoff = (now or datetime.now()).date() - timedelta(days=retention_days)
+    oldest = _oldest()
+    if oldest is None:
+        return []
+
+    done = []
+    day = oldest.date() if not settings.USE_TZ else _local_date(oldest)
+    while day < cutoff:
+        count = archive_day(day)
+        if count:
+            print(f"[archive] RawData {day}: {count}행 보관", flush=True)
+            done.append((day, count))
+        day += timedelta(days=1)
+    return done
+
+
+def read_rawdata(start, end, fields=None):
+    """
+    [start, end) 구간의 RawData를 pandas DataFrame으로 반환 (timestamp 순)
+    DB에서 이미 보관된 날은 Parquet 파일에서 읽어서 합침 (호출하는 쪽은 어디에 있는지 몰라도 됨)
+    """
+    import pandas as pd
+    from omnitor.models import RawData
+
+    names = ['timestamp'] + [f for f in (fields or [f.name for f in _fields()]) if f != 'timestamp']
+    frames = []
+
+    if available():
+        day = _local_date(start) if settings.USE_TZ else start.date()
+        last_day = _local_date(end) if settings.USE_TZ else end.date()
+        while day <= last_day:
+            path = day_path(day)
+            if os.path.exists(path):
+                table = pq.read_table(path, columns=names,
+                                      filters=[('timestamp', '>=', start), ('timestamp', '<', end)])
+                frames.append(table.to_pandas())
+            day += timedelta(days=1)
+
+    db_rows = list(RawData.objects.filter(timestamp__gte=start, timestamp__lt=end)
+                   .order_by('timestamp').values_list(*names))
+    if db_rows:
+        frames.append(pd.DataFrame.from_records(db_rows, columns=names))
+
+    # 분 단위 블록 저장 모드로 쌓인 구간
+    from . import rawblocks
+    if rawblocks.enabled():
+        block = rawblocks.read(start, end, names)
+        if len(block['timestamp']):
+            frames.append(pd.DataFrame(block, columns=names))
+
+    if not frames:
+        return pd.DataFrame(columns=names)
+    df = pd.concat(frames, ignore_index=True)
+    # 보관 도중이라 양쪽에 다 있는 행은 하나만
+    return df.drop_duplicates('timestamp', keep='last').sort_values('timestamp').reset_index(drop=True)
+
+
+def stats():
+    days = archived_days()
+    size = sum(os.path.getsize(day_path(day)) for day in days)
+    return {
+        'available': available(),
+        'retention_days': RETENTION_DAYS,
+        'days': len(days),
+        'first_day': days[0].isoformat() if days else None,
+        'last_day': days[-1].isoformat() if days else None,
+        'bytes': size,
+    }
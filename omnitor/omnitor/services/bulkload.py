@@ -0,0 +1,126 @@
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from django.apps import apps
+from django.db import connection
+
+from .dbconn import close_for_fork
+
+BATCH_SIZE = 5000         # bulk_create 한 번에 넣는 행 수 (COPY를 못 쓰는 DB)
+COPY_BLOCK_ROWS = 20000   # COPY로 한 번에 보내는 행 수
+
+
+def copy_supported():
+    """PostgreSQL이면 COPY FROM STDIN 사용 (psycopg 3 / psycopg2 모두 지원)"""
+    return connection.vendor == 'postgresql'
+
+
+def _copy_text(value):
+    """COPY text 형식으로 값 변환 (None -> \\N)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _copy_block(cursor, sql, lines):
+    block = '\n'.join(lines) + '\n'
+    if hasattr(cursor, 'copy'):
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(block)
+    else:
+        # psycopg2
+        cursor.copy_expert(sql, io.StringIO(block))
+
+
+def copy_rows(model, rows, block_rows=COPY_BLOCK_ROWS, table=None):
+    """dict 행들을 COPY로 적재, 넣은 행 수 반환 (id는 DB가 채움, table을 주면 같은 컬럼의 다른 테이블로)"""
+    count = 0
+    sql = None
+    columns = None
+    lines = []
+    with connection.cursor() as cursor:
+        raw = cursor.cursor   # Django CursorWrapper 아래의 psycopg cursor
+        for row in rows:
+            if columns is None:
+                columns = list(row)
+                quoted = ', '.join(connection.ops.quote_name(model._meta.get_field(c).column) for c in columns)
+                sql = f"COPY {connection.ops.quote_name(table or model._meta.db_table)} ({quoted}) FROM STDIN"
+            lines.append('\t'.join(_copy_text(row[c]) for c in columns))
+            if len(lines) >= block_rows:
+                _copy_block(raw, sql, lines)
+                count += len(lines)
+                lines = []
+        if lines:
+            _copy_block(raw, sql, lines)
+            count += len(lines)
+    return count
+
+
+def bulk_insert(model, rows, batch_size=BATCH_SIZE):
+    """dict 행들을 batch_size씩 bulk_create (multi-row INSERT), 넣은 행 수 반환"""
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(model(**row))
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def load(model, rows):
+    """가장 빠른 방법으로 적재 (PostgreSQL이면 COPY, 아니면 bulk_create)"""
+    if copy_supported():
+        return copy_rows(model, rows)
+    return bulk_insert(model, rows)
+
+
+def _load_chunk(model_label, make_rows, args):
+    """워커 프로세스에서 청크 하나 생성 + 적재"""
+    try:
+        return load(apps.get_model(model_label), make_rows(*args))
+    finally:
+        connection.close()
+
+
+def parallel_load(model, make_rows, chunks, workers=None, on_done=None):
+    """
+    청크별로 make_rows(*args)가 만든 행들을 여러 프로세스에서 동시에 적재
+    chunks: [args, ...], on_done(args, count): 청크가 끝날 때마다 호출
+    SQLite처럼 동시 쓰기가 안 되는 DB면 한 프로세스에서 순서대로 적재
+    """
+    label = model._meta.label
+    if workers == 1 or not copy_supported():
+        total = 0
+        for args in chunks:
+            count = load(model, make_rows(*args))
+            total += count
+            if on_done:
+                on_done(args, count)
+        return total
+
+    # fork된 자식이 부모의 DB 연결 / pool을 같이 쓰지 않도록 먼저 닫음
+    close_for_fork()
+    total = 0
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(_load_chunk, label, make_rows, args): args for args in chunks}
+        for future in as_completed(futures):
+            count = future.result()
+            total += count
+            if on_done:
+                on_done(futures[future], count)
+    return total
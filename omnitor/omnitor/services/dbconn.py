@@ -0,0 +1,116 @@
+import functools
+import threading
+import time
+
+from django.db import InterfaceError, OperationalError, close_old_connections, connection, connections
+
+# 연결이 끊겨서 난 에러 (Postgres 재시작 / 네트워크 단절 등): 연결을 버리고 한 번 다시 실행
+RECONNECT_ERRORS = (OperationalError, InterfaceError)
+
+
+class ConnectionStats:
+    """백그라운드 작업별 DB 연결 통계 (작업마다 전용 워커 스레드 = 전용 연결)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def record(self, name, reconnected=False, error=None):
+        with self._lock:
+            s = self._jobs.setdefault(name, {'runs': 0, 'reconnects': 0, 'errors': 0, 'last_error': None,
+                                             'last_error_at': None})
+            s['runs'] += 1
+            if reconnected:
+                s['reconnects'] += 1
+            if error is not None:
+                s['errors'] += 1
+                s['last_error'] = str(error)
+                s['last_error_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(s) for name, s in self._jobs.items()}
+
+
+class ConnectionStatsSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = ConnectionStats()
+            return cls._instance
+
+
+def db_job(func, name=None, retry=True):
+    """
+    스케줄러 작업을 웹 요청처럼 감싸서 DB 연결 수명을 관리
+    - 실행 전: CONN_MAX_AGE가 지났거나 에러가 났던 연결은 닫음 (다음 쿼리에서 CONN_HEALTH_CHECKS로 확인 후 재연결)
+    - 연결 에러: 연결을 닫고 retry=True면 새 연결로 한 번 더 실행
+      (func 밖으로 예외가 나올 때만 해당. 에러를 안에서 처리하고 삼키는 작업은 retry=False로 등록,
+       그래도 Django가 연결에 에러 표시를 남기므로 실행 후 close_old_connections()가 끊긴 연결을 닫음)
+    - 실행 후: 열린 트랜잭션 없이 연결을 돌려놓음 (pool을 쓰면 pool로 반환)
+    """
+    name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = ConnectionStatsSingleton.instance()
+        close_old_connections()
+        try:
+            result = func(*args, **kwargs)
+        except RECONNECT_ERRORS as e:
+            connection.close()
+            if not retry or connection.in_atomic_block:
+                # 다시 실행하지 않으므로 재연결로 세지 않음 (다음 실행이 새 연결을 염)
+                stats.record(name, error=e)
+                raise
+            print(f"[dbconn] {name}: 연결 끊김, 다시 연결해서 재실행 ({e})", flush=True)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e2:
+                stats.record(name, reconnected=True, error=e2)
+                raise
+            stats.record(name, reconnected=True)
+            return result
+        except Exception as e:
+            stats.record(name, error=e)
+            raise
+        finally:
+            close_old_connections()
+        stats.record(name)
+        return result
+
+    return wrapper
+
+
+def close_for_fork():
+    """
+    fork 전에 모든 연결과 pool을 닫음 (자식 프로세스가 부모의 소켓 / pool 스레드를 물려받지 않도록)
+    자식은 처음 쿼리할 때 자기 연결(pool)을 새로 만듦
+    """
+    connections.close_all()
+    if getattr(connection, 'pool', None) is not None:
+        connection.close_pool()
+
+
+def pool_stats():
+    """psycopg 연결 pool 통계 (settings DB_POOL을 켰을 때만, 없으면 None)"""
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    stats.update(min_size=pool.min_size, max_size=pool.max_size)
+    return stats
+
+
+def stats():
+    settings_dict = connection.settings_dict
+    return {
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+        'pool': pool_stats(),
+        'jobs': ConnectionStatsSingleton.instance().stats(),
+    }
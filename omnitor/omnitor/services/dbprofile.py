@@ -0,0 +1,48 @@
+import os
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+PROFILE = getattr(settings, 'DATABASE_PROFILE', 'postgresql')
+
+# 상태 API에 보여줄 SQLite PRAGMA
+PRAGMAS = ['journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'page_size', 'page_count', 'freelist_count']
+
+
+def is_sqlite():
+    return connection.vendor == 'sqlite'
+
+
+def maintain():
+    """
+    SQLite: WAL 파일을 본 DB에 합쳐서 비우고(TRUNCATE) 통계 갱신 (apps.py 스케줄러에서 1시간마다)
+    SD 카드에서 WAL이 계속 커지지 않도록 함, PostgreSQL은 autovacuum이 하므로 아무것도 안 함
+    """
+    if not is_sqlite():
+        return None
+    close_old_connections()
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize')
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        busy, log_frames, checkpointed = cursor.fetchone()
+    if busy:
+        print(f"[dbprofile] WAL checkpoint busy ({checkpointed}/{log_frames} frames)", flush=True)
+    return {'busy': busy, 'log_frames': log_frames, 'checkpointed': checkpointed}
+
+
+def stats():
+    result = {'profile': PROFILE, 'vendor': connection.vendor}
+    if not is_sqlite():
+        return result
+    try:
+        with connection.cursor() as cursor:
+            for name in PRAGMAS:
+                cursor.execute(f'PRAGMA {name}')
+                result[name] = cursor.fetchone()[0]
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+    path = str(connection.settings_dict['NAME'])
+    result['db_bytes'] = os.path.getsize(path) if os.path.exists(path) else 0
+    result['wal_bytes'] = os.path.getsize(path + '-wal') if os.path.exists(path + '-wal') else 0
+    return result
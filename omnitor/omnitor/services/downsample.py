@@ -0,0 +1,108 @@
+import numpy as np
+
+# 그래프 점 수 줄이기 (모양 유지)
+# - lttb: Largest-Triangle-Three-Buckets, 구간마다 앞뒤 점과 만드는 삼각형이 가장 큰 점 (봉우리 / 계단 유지)
+# - minmax: 구간마다 최솟값 / 최댓값 두 점 (관수 순간값 같은 짧은 튐을 절대 놓치지 않음)
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, n):
+    """
+    x, y (NaN 없음)에서 n개 점의 인덱스 (첫 / 마지막 점 포함, x 순서)
+    구간 반복은 n번, 구간 안의 삼각형 넓이 계산은 numpy로 한 번에
+    """
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    # 첫 / 마지막 점을 뺀 나머지를 n - 2개 구간으로
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    selected = np.empty(n, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        # 다음 구간 평균 점 (마지막 구간이면 마지막 점)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            cx, cy = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x, y, n):
+    """구간마다 최솟값 / 최댓값 점의 인덱스 (약 n개, 첫 / 마지막 점 포함, x 순서)"""
+    size = len(y)
+    if n >= size or size < 4:
+        return np.arange(size)
+    buckets = max((n - 2) // 2, 1)    # 구간마다 2점 + 첫 / 마지막 점이 n을 넘지 않도록
+
+    width = -(-size // buckets)     # 올림
+    padded = np.full(buckets * width, np.nan)
+    padded[:size] = y
+    grid = padded.reshape(buckets, width)
+    valid = ~np.all(np.isnan(grid), axis=1)
+    offsets = np.arange(buckets)[valid] * width
+    lo = offsets + np.nanargmin(grid[valid], axis=1)
+    hi = offsets + np.nanargmax(grid[valid], axis=1)
+    return _clamp(np.unique(np.concatenate(([0, size - 1], lo, hi))), n)
+
+
+def _clamp(index, n):
+    """인덱스가 n개를 넘으면 고르게 n개만 (첫 / 마지막 포함)"""
+    if len(index) <= n:
+        return index
+    return index[np.unique(np.linspace(0, len(index) - 1, n).round().astype(np.int64))]
+
+
+def select(x, y, n, method='lttb'):
+    """
+    시리즈 하나에서 남길 점의 인덱스 (y의 NaN은 건너뛰고 원래 인덱스로 반환)
+    x: 시각 (정수 / datetime64), y: 값 (NaN = 없음)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    index = np.flatnonzero(~np.isnan(y))
+    if len(index) <= n:
+        return index
+    if n < 3:
+        return _clamp(index, n)
+    xv = np.asarray(x)[index].astype('int64')
+    yv = y[index]
+    picked = lttb(xv, yv, n) if method == 'lttb' else minmax(xv, yv, n)
+    return index[picked]
+
+
+def frame(df, max_points, method='lttb', time_column='timestamp'):
+    """
+    DataFrame을 max_points행 이하로 줄임 (모든 시리즈가 같은 행을 공유, 시리즈당 점 수도 max_points 이하)
+    값이 있는 시리즈마다 max_points / 시리즈 수 만큼 모양을 유지하는 점을 고르고 그 행들의 합집합을 남김
+    (남은 행의 다른 시리즈 값도 실제 측정값이라 그대로 둠)
+    """
+    if len(df) <= max_points:
+        return df
+
+    columns = [c for c in df.columns if c != time_column and df[c].notna().any()]
+    per_series = max_points // len(columns) if columns else 0
+    if per_series < 3:
+        # 시리즈가 너무 많으면 고른 간격으로
+        keep = np.unique(np.linspace(0, len(df) - 1, max_points).round().astype(np.int64))
+        return df.iloc[keep].reset_index(drop=True)
+
+    times = df[time_column]
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    x = times.to_numpy().astype('int64')     # 상대적인 간격만 필요
+    keep = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        keep[select(x, values, per_series, method)] = True
+    return df[keep].reset_index(drop=True)
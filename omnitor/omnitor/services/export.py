@@ -0,0 +1,254 @@
+import csv
+import math
+import zipfile
+from datetime import timedelta
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from . import aggregation, rollups
+
+# 내보내기 (graph_api ?format=csv|excel)
+# 행을 DB 커서에서 조금씩 읽어 바로 써 보냄: 첫 바이트는 바로 나가고 메모리는 기간과 상관없이 일정
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'excel': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+FETCH_CHUNK = 2000            # 서버 측 커서에서 한 번에 가져오는 행 수
+WRITE_CHUNK = 1000            # 이만큼 모아서 한 번에 내보냄
+WINDOW_BUCKETS = 1440         # 구간 집계를 이 구간 수 단위로 나눠서 조회 (1분 단위면 하루씩)
+RAW_WINDOW = timedelta(hours=1)
+XLSX_MAX_ROWS = 1048575       # 엑셀 시트 최대 행 수 (머리글 제외), 넘으면 다음 시트로
+VALUE_DIGITS = 6
+
+
+def _format_time(ts):
+    if timezone.is_aware(ts):
+        ts = timezone.localtime(ts)
+    return ts.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _cell(value):
+    """값 -> 내보낼 값 (없음 / NaN은 None, 시각은 현지 시각 문자열)"""
+    if value is None:
+        return None
+    if hasattr(value, 'strftime'):
+        return _format_time(value)
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, VALUE_DIGITS)
+    if hasattr(value, 'item'):     # numpy 스칼라
+        return _cell(value.item())
+    return value
+
+
+# ---- 행 소스 (모두 timestamp 순 튜플을 하나씩 yield) ----
+
+def final_rows(start, end, fields):
+    """FinalData 원본 행 (서버 측 커서)"""
+    from omnitor.models import FinalData
+
+    rows = (FinalData.objects.filter(timestamp__range=(start, end))
+            .order_by('timestamp').values_list(*fields))
+    yield from rows.iterator(chunk_size=FETCH_CHUNK)
+
+
+def _windows(start, end, seconds):
+    """
+    [start, end]를 aggregation.ORIGIN 기준으로 정렬된 seconds 길이 창으로 나눔
+    창 경계가 구간 경계와 맞아서 구간이 두 창에 걸치지 않음 (창 끝은 다음 창 시작 직전)
+    """
+    step = timedelta(seconds=seconds)
+    window = aggregation.bin_start(start, seconds)
+    while window <= end:
+        following = window + step
+        yield max(start, window), min(end, following - timedelta(microseconds=1))
+        window = following
+
+
+def bucket_rows(start, end, unit_minutes, fields, how=None):
+    """
+    단위별 구간 대표값 (graph_api와 같은 방식: 요약 테이블 또는 DB 집계)
+    한 번에 WINDOW_BUCKETS 구간씩만 조회
+    """
+    from omnitor.models import FinalData
+
+    tier = rollups.tier_for(unit_minutes)
+    for window_start, window_end in _windows(start, end, unit_minutes * 60 * WINDOW_BUCKETS):
+        if tier and rollups.covers(tier, window_start, window_end):
+            items = rollups.values(tier, window_start, window_end, fields, how, unit_minutes)
+        else:
+            items = aggregation.aggregate(FinalData, window_start, window_end, unit_minutes * 60, fields, how)
+        for item in items:
+            yield tuple(item.get(field) for field in fields)
+
+
+def raw_fields():
+    from omnitor.models import RawData
+    return [f.name for f in RawData._meta.concrete_fields if f.name != 'id']
+
+
+def raw_rows(start, end, fields):
+    """
+    1초 RawData (DB 행 / 분 단위 블록 / Parquet 보관분을 archive.read_rawdata로 합쳐서)
+    RAW_WINDOW씩 읽으므로 메모리는 한 시간치
+    """
+    from . import archive
+
+    window = start
+    while window <= end:
+        following = min(window + RAW_WINDOW, end + timedelta(microseconds=1))
+        df = archive.read_rawdata(window, following, fields)
+        yield from df[fields].itertuples(index=False, name=None)
+        window = following
+
+
+# ---- 인코딩 ----
+
+def _chunks(rows, size=WRITE_CHUNK):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """csv.writer가 쓴 문자열을 그대로 돌려줌"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(rows, header):
+    """CSV bytes 조각 (엑셀에서 한글 / UTF-8로 열리도록 BOM 포함)"""
+    writer = csv.writer(_Echo())
+    yield ('\ufeff' + writer.writerow(header)).encode()
+    for chunk in _chunks(rows):
+        yield ''.join(writer.writerow(['' if v is None else v for v in map(_cell, row)]) for row in chunk).encode()
+
+
+class _Pipe:
+    """zipfile이 쓴 bytes를 모아뒀다가 꺼내감 (seek 불가 스트림이라 zipfile이 data descriptor 방식으로 씀)"""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _column_name(index):
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+def _xlsx_row(number, values, columns):
+    cells = []
+    for column, value in zip(columns, values):
+        if value is None:
+            continue
+        ref = f'{column}{number}'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_parts(sheets):
+    """시트 수가 정해진 뒤 마지막에 쓰는 workbook / 관계 / content type 파일"""
+    main = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    rel = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    package_rel = 'http://schemas.openxmlformats.org/package/2006/relationships'
+    sheet_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+    head = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    numbers = range(1, sheets + 1)
+    return {
+        '[Content_Types].xml': (
+            head + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="{sheet_type}"/>'
+                      for n in numbers)
+            + '</Types>'),
+        '_rels/.rels': (
+            head + f'<Relationships xmlns="{package_rel}">'
+            f'<Relationship Id="rId1" Type="{rel}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'),
+        'xl/workbook.xml': (
+            head + f'<workbook xmlns="{main}" xmlns:r="{rel}"><sheets>'
+            + ''.join(f'<sheet name="data{"" if n == 1 else n}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers)
+            + '</sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': (
+            head + f'<Relationships xmlns="{package_rel}">'
+            + ''.join(f'<Relationship Id="rId{n}" Type="{rel}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                      for n in numbers)
+            + '</Relationships>'),
+    }
+
+
+def xlsx_stream(rows, header, max_rows=XLSX_MAX_ROWS):
+    """
+    XLSX bytes 조각: 시트 XML을 zip 항목에 바로 써 내려가고, workbook 등 목록 파일은 마지막에 씀
+    값은 숫자 / 문자열(inline) 셀, max_rows를 넘으면 머리글을 반복해서 다음 시트로
+    """
+    pipe = _Pipe()
+    columns = [_column_name(i) for i in range(len(header))]
+    sheets = 0
+    with zipfile.ZipFile(pipe, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        sheet = None
+        number = 0
+        for chunk in _chunks(rows):
+            parts = []
+            for row in chunk:
+                if sheet is None or number > max_rows:
+                    if sheet is not None:
+                        sheet.write((''.join(parts) + _SHEET_TAIL).encode())
+                        sheet.close()
+                        parts = []
+                    sheets += 1
+                    sheet = zf.open(f'xl/worksheets/sheet{sheets}.xml', 'w', force_zip64=True)
+                    parts.append(_SHEET_HEAD + _xlsx_row(1, header, columns))
+                    number = 1
+                number += 1
+                parts.append(_xlsx_row(number, [_cell(v) for v in row], columns))
+            sheet.write(''.join(parts).encode())
+            yield pipe.take()
+
+        if sheet is None:
+            sheets = 1
+            sheet = zf.open('xl/worksheets/sheet1.xml', 'w')
+            sheet.write((_SHEET_HEAD + _xlsx_row(1, header, columns)).encode())
+        sheet.write(_SHEET_TAIL.encode())
+        sheet.close()
+        for name, content in _xlsx_parts(sheets).items():
+            zf.writestr(name, content)
+    yield pipe.take()
+
+
+def stream(fmt, rows, header):
+    return csv_stream(rows, header) if fmt == 'csv' else xlsx_stream(rows, header)
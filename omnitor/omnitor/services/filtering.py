@@ -1,35 +1,152 @@
-from omnitor.models import RawData
-from django.forms.models import model_to_dict
+import math
+import threading
+import time
+from array import array
+
+from django.conf import settings
+
+from .ingest import recent_rawdata
 
 WINDOW_SIZE = 5
 
+# 필드별 윈도우 크기 (없으면 WINDOW_SIZE). 예: {'weight': 300}
+WINDOW_SIZES = getattr(settings, 'FILTER_WINDOW_SIZES', {})
+
+# 마지막 샘플 이후 이 시간(초)이 지나면 메모리 필터 대신 DB에서 계산 (수집 스레드가 없는 프로세스 등)
+STALE_AFTER = getattr(settings, 'FILTER_STALE_AFTER', 5.0)
+
 # 평균을 낼 필드 목록을 미리 정의 (timestamp 등 제외)
 TARGET_FIELDS = [
-    'air_temperature', 'air_humidity', 'co2', 'insolation', 
-    'weight', 'water_ph', 'water_ec', 'water_temperature', 
+    'air_temperature', 'air_humidity', 'co2', 'insolation',
+    'weight', 'water_ph', 'water_ec', 'water_temperature',
     'soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph'
-] 
+]
+
+
+def window_size(field):
+    return WINDOW_SIZES.get(field, WINDOW_SIZE)
+
+
+class RingBuffer:
+    """
+    고정 크기 array 기반 링 버퍼 + 누적 합계
+    None 값은 NaN으로 저장하고 평균 계산에서 제외
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = array('d', [math.nan] * size)
+        self.pos = 0
+        self.total = 0.0
+        self.valid = 0
+
+    def push(self, value):
+        old = self.values[self.pos]
+        if not math.isnan(old):
+            self.total -= old
+            self.valid -= 1
+
+        if value is None:
+            self.values[self.pos] = math.nan
+        else:
+            self.values[self.pos] = value
+            self.total += value
+            self.valid += 1
+
+        self.pos += 1
+        if self.pos == self.size:
+            self.pos = 0
+            # 부동소수점 누적 오차 방지: 한 바퀴 돌 때마다 합계를 다시 계산 (평균 O(1))
+            self.total = math.fsum(v for v in self.values if not math.isnan(v))
+
+    def mean(self):
+        if not self.valid:
+            return None
+        return self.total / self.valid
+
+
+class MovingAverageFilter:
+    """
+    수집 경로(save_rawdata)에서 샘플을 받아 필드별 이동 평균을 유지하는 필터
+    값 조회는 O(1)이고 DB를 읽지 않음. 스케줄러 스레드와 웹 요청에서 동시에 사용 가능
+    """
+
+    def __init__(self, window_sizes=None):
+        sizes = window_sizes if window_sizes is not None else WINDOW_SIZES
+        self._buffers = {field: RingBuffer(sizes.get(field, WINDOW_SIZE)) for field in TARGET_FIELDS}
+        self._lock = threading.Lock()
+        self._last_push = None
+
+    def push(self, sample, live=True):
+        """RawData 인스턴스 또는 dict 한 개를 필터에 추가"""
+        get = sample.get if isinstance(sample, dict) else (lambda f: getattr(sample, f, None))
+        with self._lock:
+            for field, buf in self._buffers.items():
+                buf.push(get(field))
+            if live:
+                self._last_push = time.monotonic()
+
+    def prime(self, records):
+        """재시작 직후 DB의 최근 샘플(오래된 -> 최신 순)로 버퍼를 채움"""
+        for record in records:
+            self.push(record, live=False)
+
+    def is_live(self):
+        """최근 STALE_AFTER초 안에 수집 경로에서 샘플이 들어왔는지"""
+        with self._lock:
+            last = self._last_push
+        return last is not None and time.monotonic() - last <= STALE_AFTER
+
+    def mean(self, field):
+        with self._lock:
+            return self._buffers[field].mean()
+
+    def values(self):
+        with self._lock:
+            return {field: buf.mean() for field, buf in self._buffers.items()}
+
+
+class MovingAverageFilterSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = MovingAverageFilter()
+            return cls._instance
+
+
+def prime_filter():
+    """DB에 남아있는 최근 RawData로 필터 초기화 (apps.py에서 호출)"""
+    size = max([WINDOW_SIZE] + list(WINDOW_SIZES.values()))
+    MovingAverageFilterSingleton.instance().prime(reversed(recent_rawdata(size)))
+
 
 def maf_all():
     """
-    DB에서 최신 window_size개를 가져와 평균을 계산하여 반환
+    필드별 이동 평균을 반환
+    수집 스레드가 도는 프로세스면 메모리 필터에서 바로 읽고, 아니면 최신 데이터를 가져와 계산
     """
-    # 1. 최신 데이터 N개 가져오기 (내림차순 정렬 후 슬라이싱)
-    latest_records = RawData.objects.order_by('-timestamp')[:WINDOW_SIZE]
+    maf = MovingAverageFilterSingleton.instance()
+    if maf.is_live():
+        return {field: (value if value is not None else 0) for field, value in maf.values().items()}
+
+    # 1. 최신 데이터 N개 가져오기 (버퍼 + DB, 최신 순)
+    size = max(window_size(field) for field in TARGET_FIELDS)
+    latest_records = recent_rawdata(size)
 
     if not latest_records:
         return None
 
-    # 2. 데이터를 딕셔너리 리스트로 변환
-    data_list = [model_to_dict(record) for record in latest_records]
-
     filtered_result = {}
 
-    # 3. 각 필드별로 평균 계산
+    # 2. 각 필드별로 평균 계산
     for field in TARGET_FIELDS:
         # 해당 필드의 값들만 모음 (None 제외)
-        values = [d[field] for d in data_list if d.get(field) is not None]
-        
+        values = [getattr(r, field) for r in latest_records[:window_size(field)] if getattr(r, field) is not None]
+
         if values:
             filtered_result[field] = sum(values) / len(values)
         else:
@@ -39,12 +156,15 @@ def maf_all():
 
 def avg(field_name):
     """
-    DB에서 특정 필드의 최신 값 WINDOW_SIZE개를 가져와 평균을 계산하여 반환
+    특정 필드의 이동 평균을 반환
     (None 값은 제외하고 계산하여 에러 방지)
     """
+    maf = MovingAverageFilterSingleton.instance()
+    if maf.is_live():
+        return maf.mean(field_name) or 0
 
     # 1. 최신 데이터 가져오기 (None 포함될 수 있음)
-    val_5 = RawData.objects.values_list(field_name, flat=True).order_by('-timestamp')[:WINDOW_SIZE]
+    val_5 = [getattr(record, field_name) for record in recent_rawdata(window_size(field_name))]
 
     # 2. None 값 제거 (List Comprehension)
     valid_values = [v for v in val_5 if v is not None]
@@ -52,8 +172,8 @@ def avg(field_name):
     # 3. 유효한 데이터가 없으면 0 반환
     if not valid_values:
         return 0
-    
+
     # 4. 평균 계산
     average_val = sum(valid_values) / len(valid_values)
-    
+
     return average_val
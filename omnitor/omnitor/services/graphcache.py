@@ -0,0 +1,239 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min
+
+from . import aggregation
+
+# graph_api 캐시
+# - 닫힌 구간(지금 시각이 들어간 구간보다 앞)은 시리즈별로 한 번만 계산해서 보관
+# - 열린 구간은 FinalData 최대 pk(watermark)가 바뀔 때만 다시 조회 (save_finaldata / 스풀 재적재 / import_logs 모두 pk를 올림)
+# - 늦게 들어온 과거 행(스풀 재적재 / import)이 있으면 그 시각 이후 구간만 버림
+# - 인코딩된 응답 본문은 (요청, 데이터 버전)으로 보관, ETag도 같은 값에서 만들어서 계산 전에 304 가능
+ENABLED = getattr(settings, 'GRAPH_CACHE', True)
+MAX_ROWS = getattr(settings, 'GRAPH_CACHE_MAX_ROWS', 100000)       # 닫힌 구간 행 수 합계 상한 (넘으면 오래 안 쓴 시리즈부터 버림)
+MAX_RESPONSES = getattr(settings, 'GRAPH_CACHE_RESPONSES', 64)
+
+RAW_STEP = 60    # 단위 없는 조회의 구간 (FinalData는 1분에 한 행)
+
+_BOOT = str(time.time())    # 재시작 전 ETag와 겹치지 않도록 (버전 번호가 0부터 다시 시작하므로)
+
+
+def quantize(start, end, seconds):
+    """조회 범위를 구간 경계로 맞춤: [start가 든 구간 시작, end가 든 구간의 끝] (같은 화면 요청이 같은 키가 되도록)"""
+    step = timedelta(seconds=seconds)
+    return aggregation.bin_start(start, seconds), aggregation.bin_start(end, seconds) + step - timedelta(microseconds=1)
+
+
+def watermark():
+    """FinalData 최대 pk (행이 없으면 None)"""
+    from omnitor.models import FinalData
+    return FinalData.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+
+class _Series:
+    """같은 (단위, 필드, 대표값) 조회가 나눠 쓰는 구간별 행"""
+
+    def __init__(self, step):
+        self.step = step
+        self.buckets = {}          # 닫힌 구간 시작 -> [행, ...] (행이 없던 구간은 빈 목록)
+        self.closed_until = None   # 이 시각 전 구간만 buckets에 있음
+        self.epoch = 0             # 닫힌 구간을 버릴 때마다 증가 (응답 버전)
+        self.open = None           # (열린 구간 시작, 조회 끝, watermark, 행 목록)
+        self.rows = 0
+
+
+class GraphCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = OrderedDict()
+        self._responses = OrderedDict()
+        self._seen = None
+        self._stats = {'responses': 0, 'not_modified': 0, 'bucket_hits': 0, 'bucket_fetches': 0,
+                       'open_fetches': 0, 'invalidations': 0, 'evictions': 0}
+
+    # ---- 무효화 ----
+
+    def sync(self):
+        """
+        FinalData watermark를 확인하고, 지난번 이후 들어온 행 중 닫힌 구간에 속한 것이 있으면 그 구간부터 버림
+        반환: 현재 watermark
+        """
+        from omnitor.models import FinalData
+
+        mark = watermark()
+        with self._lock:
+            seen = self._seen
+            if seen is None:
+                # 처음: 캐시가 비어 있으므로 기준만 잡음
+                self._seen = mark or 0
+                return mark
+            if (mark or 0) < seen:
+                # 테이블이 비워짐 / 다시 만들어짐
+                self._clear()
+                self._seen = mark or 0
+                return mark
+            if mark == seen:
+                return mark
+
+        earliest = FinalData.objects.filter(pk__gt=seen, pk__lte=mark).aggregate(first=Min('timestamp'))['first']
+        with self._lock:
+            if earliest is not None:
+                self._invalidate(earliest)
+            self._seen = max(self._seen, mark)
+        return mark
+
+    def _invalidate(self, ts):
+        for series in self._series.values():
+            if series.closed_until is None or ts >= series.closed_until:
+                continue
+            start = aggregation.bin_start(ts, series.step)
+            for bucket in [b for b in series.buckets if b >= start]:
+                series.rows -= len(series.buckets.pop(bucket))
+            series.closed_until = start
+            series.epoch += 1
+            self._stats['invalidations'] += 1
+
+    def _clear(self):
+        self._series.clear()
+        self._responses.clear()
+
+    # ---- 행 ----
+
+    def _get_series(self, key, step):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(step)
+        self._series.move_to_end(key)
+        return series
+
+    def version(self, key, step, end, now, mark):
+        """응답 버전: 닫힌 구간 epoch (+ 범위가 열린 구간까지 오면 watermark)"""
+        with self._lock:
+            series = self._get_series(key, step)
+            is_open = end >= aggregation.bin_start(now, step)
+            return series.epoch, mark if is_open else None
+
+    def rows(self, key, step, start, end, now, mark, fetch):
+        """
+        [start, end] 행 목록 (timestamp 순)
+        fetch(start, end): 캐시에 없는 부분을 DB에서 읽는 함수 (graph_api의 조회 경로 그대로)
+        """
+        delta = timedelta(seconds=step)
+        open_start = aggregation.bin_start(now, step)
+        closed = []
+        bucket = start
+        while bucket <= end and bucket < open_start:
+            closed.append(bucket)
+            bucket += delta
+
+        with self._lock:
+            series = self._get_series(key, step)
+            epoch = series.epoch
+            missing = [b for b in closed if b not in series.buckets]
+            self._stats['bucket_hits'] += len(closed) - len(missing)
+
+        grouped = {}
+        if missing:
+            # 빠진 구간을 한 번에 조회 (중간에 캐시된 구간이 있어도 같이 읽음)
+            fetched = fetch(missing[0], min(missing[-1] + delta - timedelta(microseconds=1), end))
+            for row in fetched:
+                grouped.setdefault(aggregation.bin_start(row['timestamp'], step), []).append(row)
+            with self._lock:
+                self._stats['bucket_fetches'] += len(missing)
+                # 조회 도중 무효화됐으면 보관하지 않음 (이번 응답에만 씀)
+                if series.epoch == epoch:
+                    for b in closed[closed.index(missing[0]):closed.index(missing[-1]) + 1]:
+                        if b not in series.buckets:
+                            items = grouped.get(b, [])
+                            series.buckets[b] = items
+                            series.rows += len(items)
+                    series.closed_until = max(series.closed_until or open_start, open_start)
+                    self._evict()
+
+        with self._lock:
+            result = []
+            for b in closed:
+                items = series.buckets.get(b)
+                if items is None:
+                    items = grouped.get(b, [])
+                result.extend(items)
+            cached_open = series.open
+
+        if end >= open_start:
+            if cached_open and cached_open[:3] == (open_start, end, mark):
+                result.extend(cached_open[3])
+            else:
+                open_rows = list(fetch(max(start, open_start), end))
+                with self._lock:
+                    series.open = (open_start, end, mark, open_rows)
+                    self._stats['open_fetches'] += 1
+                result.extend(open_rows)
+        return result
+
+    def _evict(self):
+        total = sum(series.rows for series in self._series.values())
+        while total > MAX_ROWS and len(self._series) > 1:
+            _, series = self._series.popitem(last=False)
+            total -= series.rows
+            self._stats['evictions'] += 1
+
+    # ---- 응답 ----
+
+    def etag(self, key, version):
+        digest = hashlib.sha1(repr((_BOOT, key, version)).encode()).hexdigest()[:20]
+        return f'W/"{digest}"'
+
+    def response(self, key, version):
+        """보관된 (본문, content type, 저장 시각) 또는 None"""
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._responses.move_to_end(key)
+            self._stats['responses'] += 1
+            return entry[1:]
+
+    def store_response(self, key, version, body, content_type):
+        with self._lock:
+            modified = time.time()
+            previous = self._responses.get(key)
+            if previous is not None and previous[1] == body:
+                modified = previous[3]     # 내용이 같으면 Last-Modified 유지
+            self._responses[key] = (version, body, content_type, modified)
+            self._responses.move_to_end(key)
+            while len(self._responses) > MAX_RESPONSES:
+                self._responses.popitem(last=False)
+            return modified
+
+    def not_modified(self):
+        with self._lock:
+            self._stats['not_modified'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': ENABLED,
+                'series': len(self._series),
+                'rows': sum(series.rows for series in self._series.values()),
+                'cached_responses': len(self._responses),
+                'watermark': self._seen,
+                **self._stats,
+            }
+
+
+class GraphCacheSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = GraphCache()
+            return cls._instance
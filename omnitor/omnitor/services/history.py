@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+from omnitor.devices.simulated import GreenhouseModel, lux_to_insolation
+
+RAW_STEP = 1        # RawData 간격 (초)
+FINAL_STEP = 60     # FinalData 간격 (초)
+GAP_RATE = 0.02     # 장치 그룹별 센서 끊김 발생 확률 (시간당)
+OUTAGE_RATE = 0.002 # 수집 중단 (행 없음) 발생 확률 (시간당)
+
+
+def _as_datetime(epoch):
+    """epoch 초 -> 모델 timestamp (USE_TZ 설정에 맞춤)"""
+    if settings.USE_TZ:
+        return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+    return datetime.fromtimestamp(epoch)
+
+
+class GapInjector:
+    """
+    센서 끊김 구간 생성
+    장치 그룹(gpio / soil / water)마다 시간당 gap_rate 확률로 1~30분 동안 값이 없음 (None),
+    전원 / 수집 프로세스 중단(outage)이면 행 자체가 없음
+    """
+
+    GROUPS = {
+        'gpio': ['air_temperature', 'air_humidity', 'co2', 'insolation', 'weight'],
+        'soil': ['soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph'],
+        'water': ['water_temperature', 'water_ph', 'water_ec'],
+    }
+
+    def __init__(self, rnd, gap_rate=GAP_RATE, outage_rate=OUTAGE_RATE):
+        self.random = rnd
+        self.gap_rate = gap_rate
+        self.outage_rate = outage_rate
+        self.until = {group: 0.0 for group in self.GROUPS}
+        self.outage_until = 0.0
+
+    def _start(self, t, step, rate):
+        # 시간당 확률 -> step초당 확률
+        if self.random.random() < rate * step / 3600.0:
+            return t + self.random.uniform(60.0, 1800.0)
+        return None
+
+    def apply(self, t, step, row):
+        """행에 끊김을 반영, 행이 아예 없어야 하면 None 반환"""
+        if t >= self.outage_until:
+            self.outage_until = self._start(t, step, self.outage_rate) or 0.0
+        if t < self.outage_until:
+            return None
+        for group, fields in self.GROUPS.items():
+            if t >= self.until[group]:
+                self.until[group] = self._start(t, step, self.gap_rate) or 0.0
+            if t < self.until[group]:
+                for field in fields:
+                    row[field] = None
+        return row
+
+
+def days(start, end):
+    """
+    [start, end)를 현지 자정 기준 하루 단위 구간으로 나눔
+    (FinalData 하루 누적값이 청크 중간에서 끊기지 않도록)
+    """
+    chunk_start = start
+    while chunk_start < end:
+        day = datetime.fromtimestamp(chunk_start).date() + timedelta(days=1)
+        chunk_end = min(datetime.combine(day, datetime.min.time()).timestamp(), end)
+        yield chunk_start, chunk_end
+        chunk_start = chunk_end
+
+
+def states(bounds, step=RAW_STEP):
+    """
+    청크([(시작, 끝)], 시간 순서)마다 시작 시점의 배지 상태 (무게 / 전도 카운트 / 배액 대기량)
+    청크를 따로 (여러 프로세스에서) 만들어도 앞 청크가 끝난 상태에서 이어지도록
+    노이즈 없이 배지 모델만 같은 step 간격으로 미리 진행해서 구함
+    """
+    model = GreenhouseModel()
+    result = []
+    t = bounds[0][0] if bounds else 0
+    for chunk_start, _ in bounds:
+        while t < chunk_start:
+            model.advance(t)
+            t += step
+        result.append(model.snapshot())
+    return result
+
+
+def raw_values(start, end, step=RAW_STEP, seed=0, gaps=True, state=None):
+    """
+    start ~ end (epoch 초) 구간의 RawData 필드 값 dict를 step초 간격으로 생성
+    값은 시뮬레이터와 같은 온실 모델에서 나옴 (하루 주기 + 관수 / 배액)
+    gaps면 센서 끊김 / 수집 중단 구간을 섞음, state(states())가 있으면 그 배지 상태에서 이어서 진행
+    """
+    model = GreenhouseModel(seed)
+    if state is not None:
+        model.restore(state)
+    injector = GapInjector(model.random) if gaps else None
+    t = start
+    while t < end:
+        climate = model.climate(t)
+        weight, tip_count, moisture = model.substrate(t)
+        row = {
+            'timestamp': _as_datetime(t),
+            'air_temperature': climate['temperature'],
+            'air_humidity': climate['humidity'],
+            'co2': int(climate['co2']),
+            'insolation': lux_to_insolation(climate['lux']),
+            'weight': weight,
+            'tip_count': tip_count,
+            'soil_temperature': round(climate['temperature'] - 2.0, 1),
+            'soil_humidity': round(moisture, 1),
+            'soil_ec': 1500 + round(model.noise(20.0)),
+            'soil_ph': round(6.2 + model.noise(0.02), 1),
+        }
+        row.update(model.water(climate))
+        row['water_temperature'] = round(row['water_temperature'])   # RawData 열은 정수형
+        if injector is None or injector.apply(t, step, row) is not None:
+            yield row
+        t += step
+
+
+def final_values(start, end, seed=0, gaps=True, state=None, include_end=True):
+    """
+    start ~ end 구간의 FinalData 필드 값 dict (1분 간격)
+    같은 seed / state의 1초 RawData(raw_values)를 실시간 경로와 같은 계산(logimport.final_rows)으로 묶어서 만듦
+    - 같은 인자로 만든 RawData와 값이 맞음, 하루 누적값은 자정마다 초기화
+    - 각 행은 직전 1분 샘플로 계산하므로 timestamp는 start 다음 분 ~ end
+      (이어지는 청크는 그대로 맞물림, 마지막 청크는 include_end=False로 기존 데이터의 첫 행과 겹치지 않게 함)
+    """
+    from .accumulators import DailyAccumulator
+    from .logimport import final_rows
+
+    accumulator = DailyAccumulator(state_file=None)
+    accumulator.loaded = True
+    if state is not None:
+        accumulator.prev_weight = state['weight']
+    skip = () if include_end else {_as_datetime(end)}
+    yield from final_rows(raw_values(start, end, RAW_STEP, seed, gaps, state), accumulator, skip=skip)
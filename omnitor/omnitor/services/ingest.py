@@ -0,0 +1,288 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from . import rawblocks
+
+# 배치 설정 (settings.py에서 덮어쓰기 가능)
+BATCH_SIZE = getattr(settings, 'RAWDATA_BATCH_SIZE', 30)          # 이 개수만큼 쌓이면 즉시 flush
+FLUSH_INTERVAL = getattr(settings, 'RAWDATA_FLUSH_INTERVAL', 30.0)  # 최대 대기 시간 (초)
+MAX_PENDING = getattr(settings, 'RAWDATA_MAX_PENDING', 3600)       # 메모리에 보관할 최대 샘플 수
+SUBMIT_TIMEOUT = getattr(settings, 'RAWDATA_SUBMIT_TIMEOUT', 0.2)  # 버퍼가 가득 찼을 때 기다리는 시간 (초)
+RETRY_DELAY = 5.0
+
+
+class RawDataWriter:
+    """
+    RawData를 메모리에 모았다가 bulk_create로 한 번에 저장하는 버퍼형 writer
+    - BATCH_SIZE개가 쌓이거나 FLUSH_INTERVAL초가 지나면 flush
+    - DB가 느려서 버퍼가 가득 차면 SUBMIT_TIMEOUT 동안 기다린 뒤 가장 오래된 샘플부터 버림 (backpressure)
+    - 프로세스 종료 시 남은 샘플 flush
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self.running = False
+        self.thread = None
+
+        self._pending = deque()   # 아직 DB에 쓰지 않은 샘플 (오래된 것 -> 최신 순)
+        self._inflight = []       # 지금 bulk_create 중인 샘플
+        self._latest = None       # 마지막으로 받은 샘플 (flush 후에도 유지, DB 장애 중 save_finaldata가 사용)
+        self._cond = threading.Condition()
+        self._last_flush = time.monotonic()
+        self._flush_requested = False
+
+        # 통계
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'dropped': 0,
+            'spooled': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    def start(self):
+        """flush 스레드 시작 (apps.py에서 호출)"""
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+        return True
+
+    def stop(self, timeout=10.0):
+        """flush 스레드를 멈추고 남은 샘플을 모두 저장"""
+        if not self.running:
+            return
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout)
+        # 스레드가 못 끝낸 나머지는 현재 스레드에서 직접 저장
+        self._drain()
+
+    def submit(self, obj):
+        """
+        저장되지 않은 RawData 인스턴스를 버퍼에 추가 (save_data.save_rawdata()에서 호출)
+        반환값: 버퍼가 넘쳐 샘플을 버렸으면 False
+        """
+        accepted = True
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                # backpressure: flush 스레드가 비워줄 때까지 잠깐 대기
+                deadline = time.monotonic() + SUBMIT_TIMEOUT
+                while len(self._pending) >= self.max_pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.notify_all()
+                    self._cond.wait(remaining)
+
+                if len(self._pending) >= self.max_pending:
+                    self._pending.popleft()
+                    self._stats['dropped'] += 1
+                    accepted = False
+
+            self._pending.append(obj)
+            self._latest = obj
+            self._stats['submitted'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return accepted
+
+    def flush(self, timeout=10.0):
+        """버퍼를 즉시 비우도록 요청하고 완료될 때까지 대기"""
+        if not self.running:
+            self._drain()
+            return True
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def latest(self):
+        """이 프로세스에서 마지막으로 받은 샘플 (없으면 None)"""
+        with self._cond:
+            return self._latest
+
+    def recent(self, n):
+        """아직 DB에 없는 샘플 중 최신 n개 (최신 -> 오래된 순)"""
+        with self._cond:
+            buffered = self._inflight + list(self._pending)
+        return buffered[::-1][:n]
+
+    def stats(self):
+        with self._cond:
+            result = dict(self._stats)
+            result['pending'] = len(self._pending) + len(self._inflight)
+        result['avg_flush_ms'] = result['total_flush_ms'] / result['flushes'] if result['flushes'] else 0.0
+        return result
+
+    def _take_batch(self):
+        """pending에서 최대 batch_size개를 꺼내 inflight로 옮김 (lock 안에서 호출)"""
+        count = min(len(self._pending), self.batch_size)
+        self._inflight = [self._pending.popleft() for _ in range(count)]
+        return self._inflight
+
+    def _should_flush(self):
+        if not self._pending:
+            return False
+        if self._flush_requested or not self.running:
+            return True
+        if len(self._pending) >= self.batch_size:
+            return True
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self.running and not self._should_flush():
+                    wait = self.flush_interval - (time.monotonic() - self._last_flush)
+                    self._cond.wait(max(wait, 0.1))
+                if not self.running:
+                    return
+                batch = self._take_batch()
+
+            if not self._write(batch):
+                time.sleep(RETRY_DELAY)
+
+    def _drain(self):
+        """남은 샘플을 현재 스레드에서 모두 저장 (종료 시)"""
+        while True:
+            with self._cond:
+                if not self._pending:
+                    return
+                batch = self._take_batch()
+            if not self._write(batch):
+                with self._cond:
+                    # 스풀 기록까지 실패해서 되돌려진 경우에만 중단
+                    if self._pending and self._pending[0] is batch[0]:
+                        return
+
+    def _spool(self, batch):
+        """DB 저장에 실패한 batch를 로컬 스풀에 기록 (재적재는 spool.SampleSpool이 담당)"""
+        from .spool import SampleSpoolSingleton
+
+        try:
+            SampleSpoolSingleton.instance().append('raw', batch)
+        except Exception as e:
+            print(f"[ingest] 스풀 기록 실패, 메모리에 보관: {e}", flush=True)
+            return False
+        with self._cond:
+            self._inflight = []
+            self._stats['spooled'] += len(batch)
+            self._stats['failed_flushes'] += 1
+            self._cond.notify_all()
+        return True
+
+    def _write(self, batch):
+        """batch를 bulk_create로 저장. 실패하면 스풀에 기록하고, 그것도 안 되면 pending 앞쪽으로 되돌림"""
+        from omnitor.models import RawData
+
+        started = time.monotonic()
+        try:
+            close_old_connections()
+            if rawblocks.enabled():
+                rawblocks.append(batch)
+            else:
+                RawData.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception as e:
+            print(f"[ingest] RawData bulk_create 실패 ({len(batch)}개): {e}", flush=True)
+            if self._spool(batch):
+                return False
+            with self._cond:
+                self._pending.extendleft(reversed(batch))
+                # 되돌린 뒤 최대 개수를 넘으면 오래된 것부터 버림
+                while len(self._pending) > self.max_pending:
+                    self._pending.popleft()
+                    self._stats['dropped'] += 1
+                self._inflight = []
+                self._stats['failed_flushes'] += 1
+                self._cond.notify_all()
+            return False
+
+        elapsed_ms = (time.monotonic() - started) * 1000.0
+        with self._cond:
+            self._inflight = []
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                self._flush_requested = False
+            s = self._stats
+            s['written'] += len(batch)
+            s['flushes'] += 1
+            s['last_batch_size'] = len(batch)
+            s['max_batch_size'] = max(s['max_batch_size'], len(batch))
+            s['last_flush_ms'] = elapsed_ms
+            s['max_flush_ms'] = max(s['max_flush_ms'], elapsed_ms)
+            s['total_flush_ms'] += elapsed_ms
+            self._cond.notify_all()
+        return True
+
+
+class RawDataWriterSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = RawDataWriter()
+            return cls._instance
+
+
+def recent_rawdata(n):
+    """
+    최신 RawData n개 (최신 -> 오래된 순)
+    아직 버퍼에 있는 샘플을 먼저 포함하고, 부족한 만큼 DB에서 채움
+    """
+    from omnitor.models import RawData
+
+    records = RawDataWriterSingleton.instance().recent(n)
+    if len(records) < n:
+        seen = {r.timestamp for r in records}
+        try:
+            stored = list(rawblocks.recent(n) if rawblocks.enabled() else RawData.objects.order_by('-timestamp')[:n])
+        except DatabaseError as e:
+            # DB 장애 중이면 버퍼에 있는 것만
+            print(f"[ingest] RawData 조회 실패, 버퍼만 사용: {e}", flush=True)
+            stored = []
+        for row in stored:
+            if row.timestamp not in seen:
+                records.append(row)
+            if len(records) >= n:
+                break
+    return records
+
+
+def latest_rawdata():
+    """
+    가장 최근 RawData 1개 (버퍼 포함). 없으면 None
+    수집 중인 프로세스면 마지막으로 받은 샘플을 DB 조회 없이 반환
+    """
+    latest = RawDataWriterSingleton.instance().latest()
+    if latest is not None:
+        return latest
+    records = recent_rawdata(1)
+    return records[0] if records else None
@@ -0,0 +1,391 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from . import bulkload, rawblocks
+from .dbconn import close_for_fork
+
+# CSV 헤더 -> 모델 필드 (소문자 / 공백 제거 후 비교, 필드 이름과 같으면 그대로 사용)
+ALIASES = {
+    'time': 'timestamp', 'datetime': 'timestamp', 'date_time': 'timestamp', 'ts': 'timestamp',
+    'temp': 'air_temperature', 'temperature': 'air_temperature',
+    'humi': 'air_humidity', 'humidity': 'air_humidity', 'rh': 'air_humidity',
+    'lux': 'insolation', 'solar': 'insolation',
+    'ph': 'water_ph', 'ec': 'water_ec', 'water_temp': 'water_temperature',
+    'tip': 'tip_count', 'tips': 'tip_count',
+    'soil_temp': 'soil_temperature', 'soil_moisture': 'soil_humidity',
+}
+
+# 값 없음으로 볼 문자열
+MISSING = {'', 'na', 'n/a', 'nan', 'null', 'none', '-'}
+
+BATCH_SIZE = bulkload.BATCH_SIZE
+
+
+def open_log(path):
+    """확장자에 맞춰 압축을 풀면서 텍스트로 읽음 (.gz / .bz2 / .xz / 그 외 평문)"""
+    if path.endswith('.gz'):
+        raw = gzip.open(path, 'rb')
+    elif path.endswith('.bz2'):
+        raw = bz2.open(path, 'rb')
+    elif path.endswith('.xz'):
+        raw = lzma.open(path, 'rb')
+    else:
+        raw = open(path, 'rb')
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+
+def _normalize(name):
+    return name.strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def column_map(header, model, overrides=None):
+    """
+    CSV 헤더 -> {열 번호: 필드 이름}, 매핑 안 된 헤더 목록
+    overrides: {'CSV 헤더': '필드'} (--map 옵션, 별칭보다 우선)
+    """
+    fields = {f.name for f in model._meta.concrete_fields if f.name != 'id'}
+    overrides = {_normalize(k): v for k, v in (overrides or {}).items()}
+    mapping, unmapped = {}, []
+    for i, name in enumerate(header):
+        key = _normalize(name)
+        field = overrides.get(key) or (key if key in fields else ALIASES.get(key))
+        if field in fields and field not in mapping.values():
+            mapping[i] = field
+        else:
+            unmapped.append(name)
+    if 'timestamp' not in mapping.values():
+        raise ValueError(f"timestamp 열을 찾을 수 없습니다: {header}")
+    return mapping, unmapped
+
+
+def parse_timestamp(value, time_format=None):
+    """문자열 -> 모델 timestamp (ISO 형식 / time_format / epoch 초·밀리초, USE_TZ 설정에 맞춤)"""
+    value = value.strip()
+    try:
+        epoch = float(value)
+    except ValueError:
+        epoch = None
+
+    if epoch is not None:
+        if epoch > 1e11:      # 밀리초
+            epoch /= 1000.0
+        ts = datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+    elif time_format:
+        ts = datetime.strptime(value, time_format)
+    else:
+        ts = datetime.fromisoformat(value.replace('/', '-'))
+
+    if settings.USE_TZ and timezone.is_naive(ts):
+        return timezone.make_aware(ts)
+    if not settings.USE_TZ and timezone.is_aware(ts):
+        return timezone.make_naive(ts)
+    return ts
+
+
+def _converters(model, mapping):
+    converters = {}
+    for i, name in mapping.items():
+        field = model._meta.get_field(name)
+        if isinstance(field, (models.IntegerField, models.BigIntegerField)):
+            converters[i] = lambda v: int(round(float(v)))
+        else:
+            converters[i] = float
+    return converters
+
+
+def read_rows(path, model, overrides=None, time_format=None, counts=None):
+    """
+    로그 파일을 모델 필드 dict로 한 줄씩 변환 (모든 행이 같은 키를 가짐, COPY 컬럼 순서 고정)
+    counts: {'read', 'skipped', 'unmapped'}를 채울 dict
+    """
+    counts = counts if counts is not None else {}
+    counts.setdefault('read', 0)
+    counts.setdefault('skipped', 0)
+
+    with open_log(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        mapping, counts['unmapped'] = column_map(header, model, overrides)
+        ts_index = next(i for i, name in mapping.items() if name == 'timestamp')
+        converters = _converters(model, {i: n for i, n in mapping.items() if n != 'timestamp'})
+
+        for line in reader:
+            counts['read'] += 1
+            try:
+                row = {'timestamp': parse_timestamp(line[ts_index], time_format)}
+                for i, convert in converters.items():
+                    value = line[i].strip() if i < len(line) else ''
+                    row[mapping[i]] = None if value.lower() in MISSING else convert(value)
+            except (ValueError, IndexError, OverflowError):
+                counts['skipped'] += 1
+                continue
+            yield row
+
+
+def _q(name):
+    return connection.ops.quote_name(name)
+
+
+def _insert_copy(model, rows):
+    """
+    PostgreSQL: 임시 staging 테이블에 COPY -> 기존에 없는 timestamp만 한 번에 INSERT ... SELECT
+    반환: (staging에 넣은 행 수, 실제로 넣은 행 수, 최소 timestamp, 최대 timestamp)
+    """
+    table = model._meta.db_table
+    stage = f"{table}_import_{os.getpid()}"
+    columns = None
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # 기본값(id 시퀀스)은 가져오지 않고 id 열은 뺌
+            cursor.execute(f'CREATE TEMP TABLE {_q(stage)} (LIKE {_q(table)}) ON COMMIT DROP')
+            cursor.execute(f'ALTER TABLE {_q(stage)} DROP COLUMN id')
+
+        def tracked():
+            nonlocal columns
+            for row in rows:
+                if columns is None:
+                    columns = list(row)
+                yield row
+
+        staged = bulkload.copy_rows(model, tracked(), table=stage)
+        if not staged:
+            return 0, 0, None, None
+
+        quoted = ', '.join(_q(model._meta.get_field(c).column) for c in columns)
+        with connection.cursor() as cursor:
+            # 같은 테이블을 여러 프로세스가 동시에 가져올 때 중복 확인 ~ INSERT를 한 번에 하나씩
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [table])
+            cursor.execute(
+                f'INSERT INTO {_q(table)} ({quoted}) '
+                f'SELECT DISTINCT ON ("timestamp") {quoted} FROM {_q(stage)} s '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {_q(table)} t WHERE t."timestamp" = s."timestamp") '
+                f'ORDER BY "timestamp"'
+            )
+            inserted = cursor.rowcount
+            cursor.execute(f'SELECT min("timestamp"), max("timestamp") FROM {_q(stage)}')
+            first, last = cursor.fetchone()
+    return staged, inserted, first, last
+
+
+def _insert_batches(model, rows, batch_size=BATCH_SIZE):
+    """COPY를 못 쓰는 DB: batch_size씩 기존 timestamp를 확인하고 bulk_create"""
+    staged = inserted = 0
+    first = last = None
+
+    blocks = model._meta.model_name == 'rawdata' and rawblocks.enabled()
+
+    def flush(batch):
+        stamps = list(batch)
+        if blocks:
+            read = rawblocks.read(min(stamps), max(stamps) + timedelta(seconds=1), [])
+            existing = set(read['timestamp'].astype(datetime))
+        else:
+            existing = set(model.objects.filter(timestamp__range=(min(stamps), max(stamps)))
+                           .values_list('timestamp', flat=True))
+        new_objs = [model(**row) for ts, row in batch.items() if ts not in existing]
+        if new_objs:
+            if blocks:
+                rawblocks.append(new_objs)
+            else:
+                model.objects.bulk_create(new_objs)
+        return len(new_objs)
+
+    batch = {}
+    for row in rows:
+        ts = row['timestamp']
+        first = ts if first is None else min(first, ts)
+        last = ts if last is None else max(last, ts)
+        staged += 1
+        batch[ts] = row     # 파일 안에서 같은 timestamp면 나중 행
+        if len(batch) >= batch_size:
+            inserted += flush(batch)
+            batch = {}
+    if batch:
+        inserted += flush(batch)
+    return staged, inserted, first, last
+
+
+def import_file(model, path, overrides=None, time_format=None):
+    """
+    로그 파일 하나를 model 테이블로 가져옴 (이미 있는 timestamp는 건너뜀)
+    반환: {'path', 'read', 'inserted', 'duplicates', 'skipped', 'unmapped', 'first', 'last'}
+    """
+    counts = {}
+    rows = read_rows(path, model, overrides, time_format, counts)
+    use_copy = bulkload.copy_supported() and not (model._meta.model_name == 'rawdata' and rawblocks.enabled())
+    if use_copy:
+        staged, inserted, first, last = _insert_copy(model, rows)
+    else:
+        staged, inserted, first, last = _insert_batches(model, rows)
+    return {
+        'path': path,
+        'read': counts.get('read', 0),
+        'inserted': inserted,
+        'duplicates': staged - inserted,
+        'skipped': counts.get('skipped', 0),
+        'unmapped': counts.get('unmapped', []),
+        'first': first,
+        'last': last,
+    }
+
+
+def _import_worker(model_label, path, overrides, time_format):
+    try:
+        return import_file(apps.get_model(model_label), path, overrides, time_format)
+    finally:
+        connection.close()
+
+
+def import_files(model, paths, overrides=None, time_format=None, workers=None, on_done=None):
+    """
+    여러 로그 파일을 파일 단위로 여러 프로세스에서 동시에 가져옴 (SQLite면 한 프로세스에서 순서대로)
+    on_done(result): 파일 하나가 끝날 때마다 호출, 반환: 결과 목록
+    """
+    results = []
+    if workers == 1 or len(paths) == 1 or not bulkload.copy_supported():
+        for path in paths:
+            result = import_file(model, path, overrides, time_format)
+            results.append(result)
+            if on_done:
+                on_done(result)
+        return results
+
+    # fork된 자식이 부모의 DB 연결 / pool을 같이 쓰지 않도록 먼저 닫음
+    close_for_fork()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(_import_worker, model._meta.label, path, overrides, time_format) for path in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_done:
+                on_done(result)
+    return results
+
+
+# ===== FinalData 재생성 =====
+def _raw_samples(start, end):
+    """[start, end] 구간 RawData를 dict로 timestamp 순서대로 (블록 저장 모드 포함)"""
+    from omnitor.models import RawData
+    from .filtering import TARGET_FIELDS
+
+    fields = TARGET_FIELDS + ['tip_count']
+    if rawblocks.enabled():
+        arrays = rawblocks.read(start, end + timedelta(seconds=1), fields)
+        for i, ts in enumerate(arrays['timestamp']):
+            sample = {'timestamp': ts.astype(datetime)}
+            for field in fields:
+                value = arrays[field][i]
+                sample[field] = None if math.isnan(value) else value.item()
+            yield sample
+        return
+    rows = RawData.objects.filter(timestamp__range=(start, end)).order_by('timestamp')
+    yield from rows.values('timestamp', *fields).iterator(chunk_size=BATCH_SIZE)
+
+
+def _seed_accumulator(accumulator, start):
+    """start 직전의 같은 날 FinalData에서 하루 누적값을 이어받음 (없으면 0부터)"""
+    from omnitor.models import FinalData
+    from .accumulators import TIP_CAPACITY
+
+    previous = FinalData.objects.filter(timestamp__lt=start).order_by('-timestamp').first()
+    accumulator.loaded = True
+    accumulator.day = None
+    if previous is None:
+        return
+    accumulator.prev_weight = previous.weight or 0.0
+    day = timezone.localtime(previous.timestamp).date() if timezone.is_aware(previous.timestamp) \
+        else previous.timestamp.date()
+    start_day = timezone.localtime(start).date() if timezone.is_aware(start) else start.date()
+    if day == start_day:
+        accumulator.day = day
+        accumulator.total_insolation = previous.total_insolation or 0.0
+        accumulator.total_irrigation = previous.total_irrigation or 0.0
+        accumulator.tips = (previous.total_drainage or 0) // TIP_CAPACITY
+
+
+def final_rows(samples, accumulator, weight_slope=1.0, weight_intercept=0.0, skip=()):
+    """
+    1초 샘플 dict(timestamp 순서)를 1분 단위 FinalData 값 dict로 계산
+    실시간 경로(save_finaldata)와 같은 이동 평균 / 무게 보정 / VPD / 하루 누적 계산을 사용
+    skip에 있는 분은 만들지 않고, 샘플이 없는 분(수집 중단)도 만들지 않음
+    """
+    from .filtering import MovingAverageFilter
+
+    maf = MovingAverageFilter()
+
+    def final_row(minute, tip_count):
+        values = maf.values()
+        temp = values.get('air_temperature') or 0
+        hum = values.get('air_humidity') or 0
+        vpd = 0
+        if temp and hum:
+            vpd = ((0.6107 * 10 ** (7.5 * temp / (237.3 + temp))) * (1 - (hum / 100)))
+        weight = weight_slope * (values.get('weight') or 0) + weight_intercept
+        totals = accumulator.step(minute, values.get('insolation'), weight, tip_count)
+        row = {field: values.get(field) for field in (
+            'co2', 'insolation', 'water_temperature', 'water_ph', 'water_ec',
+            'soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph')}
+        row.update(timestamp=minute, air_temperature=temp, air_humidity=hum, vpd=vpd, weight=weight, **totals)
+        return row
+
+    minute = None
+    tip_count = None
+    for sample in samples:
+        sample_minute = rawblocks.minute_of(sample['timestamp'])
+        if minute is not None and sample_minute != minute:
+            # 분이 바뀌면 직전 분까지의 샘플로 다음 분 정각 값을 계산 (실시간 경로와 같은 시점)
+            at = minute + timedelta(minutes=1)
+            if at not in skip:
+                yield final_row(at, tip_count)
+        if minute is None and sample.get('tip_count') is not None:
+            accumulator.last_tip_count = sample['tip_count']
+        minute = sample_minute
+        if sample.get('tip_count') is not None:
+            tip_count = sample['tip_count']
+        maf.push(sample, live=False)
+    if minute is not None and minute + timedelta(minutes=1) not in skip:
+        yield final_row(minute + timedelta(minutes=1), tip_count)
+
+
+def regenerate_final(start, end):
+    """
+    [start, end] 구간 RawData로 FinalData를 1분 단위로 다시 계산 (이미 FinalData가 있는 분은 건너뜀)
+    계산은 final_rows(), 하루 누적값은 start 직전 FinalData에서 이어받음. 반환: 만든 행 수
+    """
+    from omnitor.models import CalibrationSettings, FinalData
+    from . import rollups
+    from .accumulators import DailyAccumulator
+
+    start = rawblocks.minute_of(start)
+    existing = {rawblocks.minute_of(ts) for ts in FinalData.objects.filter(
+        timestamp__gte=start, timestamp__lte=end + timedelta(minutes=1)).values_list('timestamp', flat=True)}
+
+    cal = CalibrationSettings.objects.filter(id=1).first()
+    accumulator = DailyAccumulator(state_file=None)
+    _seed_accumulator(accumulator, start)
+
+    rows = final_rows(_raw_samples(start, end), accumulator,
+                      weight_slope=cal.weight_slope if cal else 1.0,
+                      weight_intercept=cal.weight_intercept if cal else 0.0,
+                      skip=existing)
+    count = bulkload.load(FinalData, rows)
+    if count:
+        rollups.backfill(start, end + timedelta(minutes=1))
+    return count
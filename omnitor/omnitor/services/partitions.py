@@ -0,0 +1,204 @@
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+
+# 미리 만들어 둘 월 파티션 수 (이번 달 이후)
+MONTHS_AHEAD = getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+
+# 테이블별 보관 개월 수 (지난 파티션은 DETACH 해서 일반 테이블로 남김, None이면 계속 보관)
+RETENTION_MONTHS = getattr(settings, 'PARTITION_RETENTION_MONTHS', {
+    'omnitor_rawdata': None,
+    'omnitor_finaldata': None,
+})
+
+LEGACY_SUFFIX = '_legacy'    # 변환 전 데이터를 담은 파티션 (MINVALUE ~ 변환한 달 다음 달)
+
+
+def _models():
+    from omnitor.models import FinalData, RawData
+    return [RawData, FinalData]
+
+
+def supported():
+    """선언적 파티셔닝 / BRIN은 PostgreSQL 전용 (SQLite 등에서는 아무것도 하지 않음)"""
+    return connection.vendor == 'postgresql'
+
+
+def _month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d, months):
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(table, month):
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def _q(name):
+    return connection.ops.quote_name(name)
+
+
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions(table):
+    """[(파티션 이름, 범위 표현식)] (이름 순)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s
+            ORDER BY c.relname
+            """,
+            [table],
+        )
+        return cursor.fetchall()
+
+
+def ensure_brin(table):
+    """timestamp BRIN 인덱스 (삽입 순서 = 시간 순서라 아주 작은 인덱스로 긴 범위 조회를 걸러냄)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {_q(table + "_ts_brin")} ON {_q(table)} USING brin ("timestamp") '
+            f'WITH (pages_per_range = 32)'
+        )
+
+
+def convert(model):
+    """
+    기존 테이블을 timestamp 월 단위 RANGE 파티션 테이블로 변환
+    - 기존 테이블은 복사하지 않고 {table}_legacy 파티션(MINVALUE ~ 다음 달 1일)으로 그대로 붙임
+    - PK는 (id, timestamp) (파티션 키를 포함해야 함), id는 시퀀스 기본값으로 계속 증가
+    - 변환 후 ensure_partitions()로 다음 달부터 월 파티션 생성
+    """
+    table = model._meta.db_table
+    if is_partitioned(table):
+        return False
+
+    legacy = table + LEGACY_SUFFIX
+    sequence = table + '_id_part_seq'
+    cutover = _add_months(_month_start(datetime.now().date()), 1)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {_q(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {_q(table)} RENAME TO {_q(legacy)}')
+
+        # id: identity / serial 기본값을 떼고 새 부모 테이블의 시퀀스를 사용
+        cursor.execute(f'ALTER TABLE {_q(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {_q(legacy)} ALTER COLUMN id DROP DEFAULT')
+
+        # PK (id) -> (id, timestamp): ATTACH 할 때 부모 PK와 같은 PK가 있어야 함 (PK는 테이블당 하나)
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [legacy],
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {_q(legacy)} DROP CONSTRAINT {_q(name)}')
+        cursor.execute(f'ALTER TABLE {_q(legacy)} ADD PRIMARY KEY (id, "timestamp")')
+
+        cursor.execute(
+            f'CREATE TABLE {_q(table)} (LIKE {_q(legacy)} INCLUDING DEFAULTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'ALTER TABLE {_q(table)} ADD PRIMARY KEY (id, "timestamp")')
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {_q(sequence)} OWNED BY {_q(table)}.id')
+        cursor.execute(f"ALTER TABLE {_q(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT max(id) FROM {_q(legacy)}), 0) + 1, false)', [sequence])
+
+        # 최신 행 / 범위 조회용 btree (파티션마다 자동 생성)
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {_q(table + "_ts_btree")} ON {_q(table)} ("timestamp")')
+
+        cursor.execute(
+            f"ALTER TABLE {_q(table)} ATTACH PARTITION {_q(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)",
+            [cutover],
+        )
+
+    ensure_brin(table)
+    ensure_partitions(model)
+    return True
+
+
+def ensure_partitions(model, months_ahead=MONTHS_AHEAD, today=None):
+    """이번 달 ~ months_ahead개월 뒤까지 월 파티션을 미리 생성 (이미 있으면 건너뜀), 만든 이름 반환"""
+    table = model._meta.db_table
+    if not is_partitioned(table):
+        return []
+
+    existing = {name for name, _ in partitions(table)}
+    bounds = [bound for _, bound in partitions(table)]
+    month = _month_start(today or datetime.now().date())
+    created = []
+    for i in range(months_ahead + 1):
+        start = _add_months(month, i)
+        name = _partition_name(table, start)
+        if name in existing or _covered(bounds, start):
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {_q(name)} PARTITION OF {_q(table)} FOR VALUES FROM (%s) TO (%s)",
+                [start, _add_months(start, 1)],
+            )
+        created.append(name)
+    return created
+
+
+def _covered(bounds, month):
+    """legacy 파티션(MINVALUE ~ 컷오버)이 이미 이 달을 포함하는지"""
+    for bound in bounds:
+        if 'MINVALUE' in bound:
+            upper = bound.split("TO ('", 1)[1].split("'", 1)[0]
+            if month < datetime.fromisoformat(upper).date():
+                return True
+    return False
+
+
+def detach_expired(model, keep_months, today=None):
+    """
+    보관 기간이 지난 월 파티션을 DETACH (데이터는 지우지 않고 일반 테이블로 남김)
+    반환: DETACH 한 테이블 이름 목록 (보관 / 삭제는 별도로 처리)
+    """
+    table = model._meta.db_table
+    if keep_months is None or not is_partitioned(table):
+        return []
+
+    cutoff = _add_months(_month_start(today or datetime.now().date()), -keep_months)
+    detached = []
+    for name, _ in partitions(table):
+        if not name.startswith(table + '_p'):
+            continue
+        month = date(int(name[-6:-2]), int(name[-2:]), 1)
+        if _add_months(month, 1) <= cutoff:
+            with connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {_q(table)} DETACH PARTITION {_q(name)}')
+            detached.append(name)
+    return detached
+
+
+def maintain():
+    """월 파티션 미리 생성 + 보관 기간 지난 파티션 DETACH (apps.py 스케줄러에서 하루 한 번)"""
+    if not supported():
+        return {}
+    result = {}
+    for model in _models():
+        table = model._meta.db_table
+        if not is_partitioned(table):
+            continue
+        result[table] = {
+            'created': ensure_partitions(model),
+            'detached': detach_expired(model, RETENTION_MONTHS.get(table)),
+        }
+        if result[table]['created'] or result[table]['detached']:
+            print(f"[partitions] {table}: {result[table]}", flush=True)
+    return result
@@ -0,0 +1,173 @@
+from datetime import timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+# RawData 저장 방식: 'rows' (1초 1행, 기본) / 'blocks' (1분 1행, RawDataBlock)
+STORAGE = getattr(settings, 'RAWDATA_STORAGE', 'rows')
+
+SLOTS = 60    # 블록 하나의 칸 수 (1초 간격)
+
+# 블록에 담는 필드 (순서가 바이너리 배치이므로 바꾸면 기존 블록을 못 읽음, 새 필드는 끝에 추가)
+FIELDS = [
+    'air_temperature', 'air_humidity', 'co2', 'insolation',
+    'water_temperature', 'water_ph', 'water_ec',
+    'weight', 'tip_count',
+    'soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph',
+]
+INT_FIELDS = {'co2', 'water_temperature', 'tip_count'}    # RawData에서 정수 필드
+
+DTYPE = np.dtype('<f4')
+FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+
+def enabled():
+    return STORAGE == 'blocks'
+
+
+def minute_of(ts):
+    return ts.replace(second=0, microsecond=0)
+
+
+def _np_time(dt):
+    """DB 시각 -> numpy datetime64 (USE_TZ=True면 UTC 기준)"""
+    if timezone.is_aware(dt):
+        dt = timezone.make_naive(dt, dt_timezone.utc)
+    return np.datetime64(dt, 's')
+
+
+def _empty():
+    return np.zeros((len(FIELDS), SLOTS), dtype=DTYPE), np.zeros((len(FIELDS) + 1, SLOTS), dtype=bool)
+
+
+def _unpack(block):
+    values, valid = _empty()
+    data = np.frombuffer(bytes(block.values), dtype=DTYPE)
+    bits = np.unpackbits(np.frombuffer(bytes(block.valid), dtype=np.uint8))
+    # 필드가 늘어나기 전에 만든 블록은 앞쪽만 채움
+    fields = min(len(data) // SLOTS, len(FIELDS))
+    values[:fields] = data[:fields * SLOTS].reshape(fields, SLOTS)
+    valid[:fields + 1] = bits[:(fields + 1) * SLOTS].reshape(fields + 1, SLOTS).astype(bool)
+    return values, valid
+
+
+def _pack(values, valid):
+    return values.astype(DTYPE).tobytes(), np.packbits(valid).tobytes()
+
+
+def _get(sample, field):
+    if isinstance(sample, dict):
+        return sample.get(field)
+    return getattr(sample, field, None)
+
+
+def _write_block(minute, items):
+    """분 블록 하나에 (칸, 샘플) 목록을 써 넣음 (행이 있으면 잠그고 합침, 없으면 새로 INSERT)"""
+    from omnitor.models import RawDataBlock
+
+    block = RawDataBlock.objects.select_for_update().filter(minute=minute).first()
+    if block is None:
+        values, valid = _empty()
+        block = RawDataBlock(minute=minute)
+    else:
+        values, valid = _unpack(block)
+
+    for slot, sample in items:
+        valid[0, slot] = True
+        for i, field in enumerate(FIELDS):
+            value = _get(sample, field)
+            valid[i + 1, slot] = value is not None
+            values[i, slot] = value if value is not None else 0
+
+    block.values, block.valid = _pack(values, valid)
+    block.count = int(valid[0].sum())
+    block.save()
+
+
+def append(samples):
+    """
+    RawData 인스턴스(또는 dict) 목록을 분 단위 블록에 써 넣음 (ingest.RawDataWriter에서 배치마다 호출)
+    열린 분 블록에는 칸만 채워서 다시 저장, 같은 칸에 다시 쓰면 덮어씀 (스풀 재적재가 중복돼도 안전)
+    없는 행은 select_for_update로 잠글 수 없어서, 다른 프로세스(스풀 재적재 / 로그 적재)가 같은 분 블록을
+    먼저 INSERT하면 IntegrityError: 분마다 savepoint 안에서 쓰고, 충돌하면 이제 생긴 행을 잠그고 한 번 더 씀
+    """
+    by_minute = {}
+    for sample in samples:
+        ts = _get(sample, 'timestamp')
+        by_minute.setdefault(minute_of(ts), []).append((ts.second, sample))
+
+    with transaction.atomic():
+        for minute, items in sorted(by_minute.items()):
+            try:
+                with transaction.atomic():
+                    _write_block(minute, items)
+            except IntegrityError:
+                with transaction.atomic():
+                    _write_block(minute, items)
+    return len(samples)
+
+
+def read(start, end, fields=None):
+    """
+    [start, end) 구간의 샘플을 numpy 배열로 반환 (timestamp 순)
+    {'timestamp': datetime64[s] 배열, 필드: float64 배열 (값 없으면 NaN)}
+    1시간이면 블록 60행만 읽어서 한 번에 풀어냄
+    """
+    from omnitor.models import RawDataBlock
+
+    fields = [f for f in (fields or FIELDS) if f != 'timestamp']
+    blocks = list(RawDataBlock.objects.filter(minute__gte=minute_of(start), minute__lt=end)
+                  .order_by('minute').values_list('minute', 'values', 'valid'))
+
+    result = {'timestamp': np.array([], dtype='datetime64[s]')}
+    result.update({field: np.array([], dtype=np.float64) for field in fields})
+    if not blocks:
+        return result
+
+    count = len(blocks)
+    values = np.zeros((count, len(FIELDS), SLOTS), dtype=DTYPE)
+    valid = np.zeros((count, len(FIELDS) + 1, SLOTS), dtype=bool)
+    for i, (minute, data, bits) in enumerate(blocks):
+        values[i], valid[i] = _unpack(RawDataBlock(values=data, valid=bits))
+
+    minutes = np.array([_np_time(minute) for minute, _, _ in blocks], dtype='datetime64[s]')
+    stamps = minutes[:, None] + np.arange(SLOTS).astype('timedelta64[s]')
+
+    keep = valid[:, 0, :] & (stamps >= _np_time(start)) & (stamps < _np_time(end))
+    result['timestamp'] = stamps[keep]
+    for field in fields:
+        i = FIELD_INDEX[field]
+        column = values[:, i, :].astype(np.float64)
+        column[~valid[:, i + 1, :]] = np.nan
+        result[field] = column[keep]
+    return result
+
+
+def _to_rawdata(minute, slot, values, valid):
+    from omnitor.models import RawData
+
+    row = RawData(timestamp=minute + timedelta(seconds=slot))
+    for i, field in enumerate(FIELDS):
+        if valid[i + 1, slot]:
+            value = values[i, slot].item()
+            setattr(row, field, int(round(value)) if field in INT_FIELDS else value)
+        else:
+            setattr(row, field, None)
+    return row
+
+
+def recent(n):
+    """최신 샘플 n개를 RawData 인스턴스로 (최신 -> 오래된 순, ingest.recent_rawdata에서 사용)"""
+    from omnitor.models import RawDataBlock
+
+    rows = []
+    for block in RawDataBlock.objects.order_by('-minute')[:n // SLOTS + 2]:
+        values, valid = _unpack(block)
+        for slot in range(SLOTS - 1, -1, -1):
+            if valid[0, slot]:
+                rows.append(_to_rawdata(block.minute, slot, values, valid))
+                if len(rows) >= n:
+                    return rows
+    return rows
@@ -0,0 +1,249 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import FloatField, Max, Min, Q, Sum
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+# 요약 단계 (이름, 분)
+TIERS = [('10m', 10), ('1h', 60), ('1d', 1440)]
+TIER_MINUTES = dict(TIERS)
+
+# 요약할 FinalData 필드
+METRICS = [
+    'air_temperature', 'air_humidity', 'vpd', 'co2', 'insolation', 'total_insolation',
+    'water_temperature', 'water_ph', 'water_ec',
+    'weight', 'irrigation', 'total_irrigation', 'total_drainage',
+    'soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph',
+]
+
+# 그래프에 쓸 대표값: 하루 누적값은 구간 마지막 값, 관수량은 구간 합계, 나머지는 평균
+LAST_METRICS = {'total_insolation', 'total_irrigation', 'total_drainage'}
+SUM_METRICS = {'irrigation'}
+
+BACKFILL_CHUNK = 20000
+
+
+def bucket_start(ts, minutes):
+    """ts가 속한 구간의 시작 시각 (현지 시간 기준, 1일 = 현지 자정)"""
+    aware = timezone.is_aware(ts)
+    local = timezone.localtime(ts) if aware else ts
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if minutes >= 1440:
+        start = day
+    else:
+        offset = (local.hour * 60 + local.minute) // minutes * minutes
+        start = day + timedelta(minutes=offset)
+    if aware:
+        start = timezone.make_aware(start.replace(tzinfo=None))
+    return start
+
+
+def _merge(stats, values, timestamp, last_timestamp):
+    """stats(JSON)에 FinalData 한 행의 값을 반영"""
+    newer = last_timestamp is None or timestamp >= last_timestamp
+    for field in METRICS:
+        value = values.get(field)
+        if value is None:
+            continue
+        s = stats.get(field)
+        if s is None:
+            stats[field] = {'n': 1, 'sum': value, 'min': value, 'max': value, 'last': value}
+            continue
+        s['n'] += 1
+        s['sum'] += value
+        s['min'] = min(s['min'], value)
+        s['max'] = max(s['max'], value)
+        if newer:
+            s['last'] = value
+    return stats
+
+
+def add(final):
+    """FinalData 한 행을 모든 단계의 요약에 반영 (save_finaldata에서 저장 직후 호출)"""
+    from omnitor.models import FinalDataRollup
+
+    values = {field: getattr(final, field) for field in METRICS}
+    with transaction.atomic():
+        for tier, minutes in TIERS:
+            row, _ = FinalDataRollup.objects.select_for_update().get_or_create(
+                tier=tier, bucket=bucket_start(final.timestamp, minutes),
+            )
+            row.stats = _merge(row.stats, values, final.timestamp, row.last_timestamp)
+            row.count += 1
+            if row.last_timestamp is None or final.timestamp >= row.last_timestamp:
+                row.last_timestamp = final.timestamp
+            row.save(update_fields=['stats', 'count', 'last_timestamp'])
+
+
+def backfill(start=None, end=None, on_progress=None):
+    """
+    기존 FinalData로 [start, end) 구간의 요약을 다시 계산해서 덮어씀 (upsert), 처리한 FinalData 행 수 반환
+    구간 경계가 잘리지 않도록 start는 하루 시작, end는 다음 날 시작으로 넓힘
+    """
+    from omnitor.models import FinalData, FinalDataRollup
+
+    rows = FinalData.objects.order_by('timestamp')
+    if start is not None:
+        start = bucket_start(start, 1440)
+        rows = rows.filter(timestamp__gte=start)
+    if end is not None:
+        end = bucket_start(end, 1440) + timedelta(days=1)
+        rows = rows.filter(timestamp__lt=end)
+
+    pending = {}    # (tier, bucket) -> FinalDataRollup
+    processed = 0
+
+    def flush(before=None):
+        # 시간 순으로 읽으므로 before보다 앞선 구간은 더 바뀌지 않음
+        done = [key for key, row in pending.items() if before is None or row.last_timestamp < before]
+        if not done:
+            return
+        FinalDataRollup.objects.bulk_create(
+            [pending.pop(key) for key in done],
+            update_conflicts=True, unique_fields=['tier', 'bucket'],
+            update_fields=['stats', 'count', 'last_timestamp'],
+        )
+
+    for values in rows.values('timestamp', *METRICS).iterator(chunk_size=BACKFILL_CHUNK):
+        ts = values['timestamp']
+        for tier, minutes in TIERS:
+            key = (tier, bucket_start(ts, minutes))
+            row = pending.get(key)
+            if row is None:
+                row = pending[key] = FinalDataRollup(tier=tier, bucket=key[1], stats={})
+            _merge(row.stats, values, ts, row.last_timestamp)
+            row.count += 1
+            row.last_timestamp = ts
+        processed += 1
+        if processed % BACKFILL_CHUNK == 0:
+            flush(before=bucket_start(ts, 1440))
+            if on_progress:
+                on_progress(processed, ts)
+    flush()
+    return processed
+
+
+def tier_for(unit_minutes):
+    """
+    그래프 단위(분)에 쓸 수 있는 가장 큰 요약 단계 (없으면 None -> FinalData 그대로)
+    예: 180(3h) -> '1h', 10 -> '10m', 1 -> None
+    """
+    if not unit_minutes:
+        return None
+    usable = [tier for tier, minutes in TIERS if minutes <= unit_minutes and unit_minutes % minutes == 0]
+    return usable[-1] if usable else None
+
+
+def covers(tier, start, end):
+    """
+    [start, end)의 FinalData가 요약에 다 반영돼 있는지 (backfill 전 옛 데이터면 False)
+    구간 안의 가장 오래된 / 최근 FinalData가 들어갈 요약 행이 있는지로 판단
+    """
+    from omnitor.models import FinalData, FinalDataRollup
+
+    in_range = FinalData.objects.filter(timestamp__range=(start, end))
+    first = in_range.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if first is None:
+        return True
+    last = in_range.order_by('-timestamp').values_list('timestamp', flat=True).first()
+    minutes = TIER_MINUTES[tier]
+    buckets = {bucket_start(first, minutes), bucket_start(last, minutes)}
+    return FinalDataRollup.objects.filter(tier=tier, bucket__in=buckets).count() == len(buckets)
+
+
+def values(tier, start, end, fields, how=None, unit_minutes=None):
+    """
+    FinalData.objects.values()와 같은 모양의 목록 [{'timestamp': 구간 시작, 필드: 대표값}]
+    대표값: how에 적힌 방법 ('mean' / 'min' / 'max' / 'sum' / 'last'),
+    없으면 LAST_METRICS는 마지막 값, SUM_METRICS는 합계, 나머지는 평균
+    unit_minutes가 단계보다 크면 (단계의 배수, 예: 1h 단계로 3h) 요약 행을 DB에서 다시 묶음 (_regroup)
+    """
+    from omnitor.models import FinalDataRollup
+
+    how = how or {}
+    methods = {}
+    for field in fields:
+        if field == 'timestamp':
+            continue
+        methods[field] = how.get(field) or ('last' if field in LAST_METRICS else
+                                            'sum' if field in SUM_METRICS else 'mean')
+
+    minutes = TIER_MINUTES[tier]
+    rows = FinalDataRollup.objects.filter(
+        tier=tier, bucket__gte=bucket_start(start, minutes), bucket__lte=end,
+    )
+    if unit_minutes and unit_minutes != minutes:
+        return _regroup(rows, unit_minutes, methods)
+
+    result = []
+    for bucket, stats in rows.order_by('bucket').values_list('bucket', 'stats'):
+        item = {'timestamp': bucket}
+        for field, method in methods.items():
+            s = stats.get(field)
+            if s is None:
+                item[field] = None
+            elif method == 'mean':
+                item[field] = s['sum'] / s['n']
+            else:
+                item[field] = s[method]
+        result.append(item)
+    return result
+
+
+def _stat(field, key):
+    """stats -> field -> key 값 (DB에서 숫자로)"""
+    return Cast(KeyTextTransform(key, KeyTransform(field, 'stats')), FloatField())
+
+
+def _regroup(rows, unit_minutes, methods):
+    """
+    요약 행(rows)을 unit_minutes 구간(aggregation.DateBin, FinalData 집계와 같은 경계)으로 다시 묶음
+    n / sum / min / max는 DB에서 합치고, last는 필드 값이 있는 가장 늦은 요약 행의 last
+    """
+    from .aggregation import LAST_FETCH_CHUNK, DateBin
+
+    annotations = {}
+    for field, method in methods.items():
+        if method == 'mean':
+            annotations[f'n_{field}'] = Sum(_stat(field, 'n'))
+            annotations[f'sum_{field}'] = Sum(_stat(field, 'sum'))
+        elif method == 'sum':
+            annotations[f'sum_{field}'] = Sum(_stat(field, 'sum'))
+        elif method == 'min':
+            annotations[f'min_{field}'] = Min(_stat(field, 'min'))
+        elif method == 'max':
+            annotations[f'max_{field}'] = Max(_stat(field, 'max'))
+        else:
+            annotations[f'last_{field}'] = Max('bucket', filter=Q(stats__has_key=field))
+
+    groups = list(
+        rows.annotate(bin=DateBin('bucket', unit_minutes * 60))
+        .values('bin')
+        .annotate(**annotations)
+        .order_by('bin')
+    )
+
+    # last: 구간마다 가장 늦은 요약 행의 stats만 따로 읽음 (구간 수만큼)
+    last_buckets = sorted({group[f'last_{field}'] for group in groups
+                           for field, method in methods.items() if method == 'last'} - {None})
+    last_stats = {}
+    for i in range(0, len(last_buckets), LAST_FETCH_CHUNK):
+        chunk = last_buckets[i:i + LAST_FETCH_CHUNK]
+        last_stats.update(rows.filter(bucket__in=chunk).values_list('bucket', 'stats'))
+
+    result = []
+    for group in groups:
+        item = {'timestamp': group['bin']}
+        for field, method in methods.items():
+            if method == 'mean':
+                n = group[f'n_{field}']
+                item[field] = group[f'sum_{field}'] / n if n else None
+            elif method == 'last':
+                stats = last_stats.get(group[f'last_{field}'], {})
+                item[field] = stats[field]['last'] if field in stats else None
+            else:
+                item[field] = group[f'{method}_{field}']
+        result.append(item)
+    return result
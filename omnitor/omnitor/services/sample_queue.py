@@ -0,0 +1,175 @@
+import itertools
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+# 드라이버 -> 수집 단계로 넘어가는 측정값 하나 (acquired_at: 측정 시각, time.time())
+Reading = namedtuple('Reading', ['field', 'value', 'acquired_at', 'source'])
+
+QUEUE_SIZE = 10000      # 수집 단계가 멈춰도 이 개수까지만 보관 (넘치면 오래된 것부터 버림)
+GRID_SECONDS = 1        # RawData 저장 간격 (초)
+STALE_AFTER = 10.0      # 측정 후 이 시간(초)이 지나면 오래된 값으로 보고 저장하지 않음
+
+# 이벤트가 있을 때만 들어오는 누적 카운터 (오래돼도 값이 유효함)
+HOLD_FIELDS = {'tip_count'}
+
+
+class SampleQueue:
+    """
+    드라이버가 측정할 때마다 값을 넣는 bounded 큐
+    deque(maxlen)의 append / popleft는 GIL 아래에서 원자적이라 락 없이 사용
+    버려진 개수는 (넣은 수 - 꺼낸 수 - 남은 수)로 계산
+    """
+
+    def __init__(self, maxlen=QUEUE_SIZE):
+        self._queue = deque(maxlen=maxlen)
+        self._published = itertools.count()
+        self._published_total = 0
+        self.consumed = 0
+
+    def publish(self, source, values, acquired_at=None):
+        """드라이버에서 호출: {필드: 값}을 측정 시각과 함께 큐에 넣음"""
+        if acquired_at is None:
+            acquired_at = time.time()
+        for field, value in values.items():
+            if value is None:
+                continue   # 읽기 실패는 넣지 않음 (마지막 값이 오래되면 stale 처리)
+            self._queue.append(Reading(field, value, acquired_at, source))
+            self._published_total = next(self._published) + 1
+
+    def drain(self):
+        """수집 단계에서 호출: 쌓인 값을 모두 꺼냄 (소비자는 하나)"""
+        readings = []
+        while True:
+            try:
+                readings.append(self._queue.popleft())
+            except IndexError:
+                break
+        self.consumed += len(readings)
+        return readings
+
+    def published(self):
+        return self._published_total
+
+    def dropped(self):
+        return max(0, self._published_total - self.consumed - len(self._queue))
+
+
+class SampleAligner:
+    """
+    큐에 들어온 측정값을 RawData 저장 격자(GRID_SECONDS)에 맞춤
+    - 필드마다 격자 시각 이전의 가장 최신 값을 사용
+    - 측정 후 STALE_AFTER초가 지난 값은 None으로 저장 (stale)
+    - 격자 시각은 항상 직전 행보다 뒤 (같은 초에 두 번 불리면 다음 칸으로, 시계가 뒤로 가면 건너뜀)
+    - 필드별 값의 나이(age)와 stale / 중복 횟수를 통계로 제공
+    """
+
+    def __init__(self, queue, grid_seconds=GRID_SECONDS, stale_after=STALE_AFTER):
+        self.queue = queue
+        self.grid_seconds = grid_seconds
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._latest = {}        # 필드 -> 가장 최신 Reading
+        self._future = []        # 격자 시각 이후에 측정되어 다음 행으로 미룬 값
+        self._used = {}          # 필드 -> 직전 행에 사용한 Reading
+        self._ages = {}          # 필드 -> 직전 행 기준 값의 나이 (초)
+        self._stale = {}         # 필드 -> stale 횟수
+        self._repeats = {}       # 필드 -> 새 측정 없이 같은 값을 다시 쓴 횟수
+        self._last_grid = None   # 직전 행의 격자 시각
+        self._advanced = 0       # 같은 격자 시각이 반복되어 다음 칸으로 넘긴 횟수
+        self._skipped = 0        # 시계가 뒤로 가서 행을 만들지 않은 횟수
+
+    def has_readings(self):
+        return self.queue.published() > 0
+
+    def align(self, now=None):
+        """
+        (격자 시각(epoch 초), {필드: 값}) 반환, 이번 행을 건너뛰어야 하면 None
+        격자 시각보다 나중에 측정된 값은 다음 행에서 사용
+        스케줄러 지연으로 같은 칸이 다시 나오면 바로 다음 칸을 쓰고 (RawData timestamp 중복 방지),
+        다음 칸이 현재 시각보다 한 칸 넘게 앞이면 (시계가 뒤로 감) 따라잡을 때까지 건너뜀
+        """
+        if now is None:
+            now = time.time()
+        grid = math.floor(now / self.grid_seconds) * self.grid_seconds
+
+        with self._lock:
+            if self._last_grid is not None and grid <= self._last_grid:
+                grid = self._last_grid + self.grid_seconds
+                if grid - now > self.grid_seconds:
+                    self._skipped += 1
+                    return None
+                self._advanced += 1
+            self._last_grid = grid
+
+            # 지난번에 격자 이후라서 미뤄둔 값 + 새로 들어온 값
+            candidates = self._future + self.queue.drain()
+            self._future = []
+            for reading in candidates:
+                if reading.acquired_at > grid:
+                    self._future.append(reading)
+                    continue
+                current = self._latest.get(reading.field)
+                if current is None or reading.acquired_at >= current.acquired_at:
+                    self._latest[reading.field] = reading
+
+            values = {}
+            for field, reading in self._latest.items():
+                age = grid - reading.acquired_at
+                self._ages[field] = age
+                if age > self.stale_after and field not in HOLD_FIELDS:
+                    self._stale[field] = self._stale.get(field, 0) + 1
+                    values[field] = None
+                    continue
+                if self._used.get(field) is reading:
+                    self._repeats[field] = self._repeats.get(field, 0) + 1
+                self._used[field] = reading
+                values[field] = reading.value
+        return grid, values
+
+    def field_ages(self):
+        """필드별 마지막 저장 행 기준 값의 나이 (초)"""
+        with self._lock:
+            return dict(self._ages)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'published': self.queue.published(),
+                'dropped': self.queue.dropped(),
+                'ages': dict(self._ages),
+                'stale': dict(self._stale),
+                'repeats': dict(self._repeats),
+                'advanced': self._advanced,
+                'skipped': self._skipped,
+            }
+
+
+class SampleQueueSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SampleQueue()
+            return cls._instance
+
+
+class SampleAlignerSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SampleAligner(SampleQueueSingleton.instance())
+            return cls._instance
+
+
+def publish(source, values, acquired_at=None):
+    """드라이버용 단축 함수"""
+    SampleQueueSingleton.instance().publish(source, values, acquired_at)
@@ -2,21 +2,90 @@ import os
 import sys
 import time
 import django
+from datetime import datetime, timezone as dt_timezone
 
-from django.db import connection, close_old_connections
-from django.db.models import Sum
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, connection, close_old_connections, transaction
 from django.utils import timezone
 
-from .filtering import maf_all
+from .filtering import maf_all, MovingAverageFilterSingleton
+from .ingest import RawDataWriterSingleton, latest_rawdata
+from .spool import SampleSpoolSingleton
+from .accumulators import DailyAccumulatorSingleton
+from .sample_queue import SampleAlignerSingleton
+from . import rollups
+
+
+# 센서에서 받아 RawData에 저장하는 필드
+RAW_FIELDS = [
+    'air_temperature', 'air_humidity', 'co2', 'insolation', 'weight', 'tip_count',
+    'water_ph', 'water_ec', 'water_temperature',
+    'soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph'
+]
+
+
+def _grid_datetime(epoch):
+    """격자 시각(epoch 초) -> RawData timestamp"""
+    if settings.USE_TZ:
+        return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+    return datetime.fromtimestamp(epoch)
+
+
+def _sample_from_queue(RawData, grid, values):
+    """
+    드라이버가 발행한 측정값(aligner.align()으로 1초 격자에 맞춘 값)을 RawData 인스턴스로 만듦
+    (오래된 값은 None, 측정값이 하나도 없으면 None 반환)
+    """
+    if not any(values.get(field) is not None for field in RAW_FIELDS if field != 'tip_count'):
+        return None
+    return RawData(timestamp=_grid_datetime(grid), **{field: values.get(field) for field in RAW_FIELDS})
+
+
+def _sample_from_snapshot(RawData, gpio, soil, water):
+    """큐에 발행하지 않는 드라이버용: 각 센서의 현재 값을 그대로 사용"""
+    try:
+        rpi_data = gpio.get_current_data()
+    except Exception:
+        rpi_data = None
+        print("[rawdata] GPIO Read Error", flush=True)
+
+    try:
+        soil_data = soil.get_current_data()
+    except Exception:
+        soil_data = None
+        print("[rawdata] Soil Read Error", flush=True)
+
+    try:
+        water_data = water.get_current_data()
+    except Exception:
+        water_data = None
+        print("[rawdata] Water Read Error", flush=True)
+
+    if not any([rpi_data, soil_data, water_data]):
+        return None
+
+    return RawData(
+        timestamp=timezone.now(),
+        air_temperature=rpi_data.get('temperature') if rpi_data else None,
+        air_humidity=rpi_data.get('humidity') if rpi_data else None,
+        co2=rpi_data.get('co2') if rpi_data else None,
+        insolation=rpi_data.get('insolation') if rpi_data else None,
+        weight=rpi_data.get('weight') if rpi_data else None,
+        tip_count=rpi_data.get('tip_count') if rpi_data else None,
+        water_ph=water_data.water_ph if water_data else None,
+        water_ec=water_data.water_ec if water_data else None,
+        water_temperature=water_data.water_temperature if water_data else None,
+        soil_temperature=soil_data.soil_temperature if soil_data else None,
+        soil_humidity=soil_data.soil_humidity if soil_data else None,
+        soil_ec=soil_data.soil_ec if soil_data else None,
+        soil_ph=soil_data.soil_ph if soil_data else None
+    )
 
-# 전역 변수
-tip_capacity = 5  # 티핑 게이지 한번 당 배액량 = 5 ml
-prev_weight = 0.0  # 이전 무게 값 (관수량 계산용)
 
 def save_rawdata(gpio, soil, water):
 
     """
-    센서 데이터를 읽어 RawData에 저장
+    센서 데이터를 읽어 RawData 버퍼에 추가 (DB 저장은 ingest.RawDataWriter가 묶어서 처리)
     """
 
     #print(f"[rawdata] save_rawdata start {timezone.now()}", flush=True)
@@ -26,44 +95,24 @@ def save_rawdata(gpio, soil, water):
     try:
         # close_old_connections()
 
-        try:
-            rpi_data = gpio.get_current_data()
-        except Exception:
-            rpi_data = None
-            print("[rawdata] GPIO Read Error", flush=True)
-
-        try:
-            soil_data = soil.get_current_data()
-        except Exception:
-            soil_data = None
-            print("[rawdata] Soil Read Error", flush=True)
+        aligner = SampleAlignerSingleton.instance()
+        if aligner.has_readings():
+            aligned = aligner.align()
+            if aligned is None:
+                return   # 시계가 뒤로 감: 직전 행보다 앞선 timestamp는 만들지 않음
+            sample = _sample_from_queue(RawData, *aligned)
+        else:
+            sample = _sample_from_snapshot(RawData, gpio, soil, water)
 
-        try:
-            water_data = water.get_current_data()
-        except Exception:
-            water_data = None
-            print("[rawdata] Water Read Error", flush=True)
-
-        if not any([rpi_data, soil_data, water_data]):
+        if sample is None:
             print("[rawdata] All sensors are offline. Skip DB save.", flush=True)
             return
-                
-        RawData.objects.create(
-            timestamp=timezone.now(),
-            air_temperature=rpi_data.get('temperature') if rpi_data else None,
-            air_humidity=rpi_data.get('humidity') if rpi_data else None,
-            co2=rpi_data.get('co2') if rpi_data else None,
-            insolation=rpi_data.get('insolation') if rpi_data else None,
-            weight=rpi_data.get('weight') if rpi_data else None,
-            tip_count=rpi_data.get('tip_count') if rpi_data else None,
-            water_ph=water_data.water_ph if water_data else None,
-            water_ec=water_data.water_ec if water_data else None,
-            water_temperature=water_data.water_temperature if water_data else None,
-            soil_temperature=soil_data.soil_temperature if soil_data else None,
-            soil_humidity=soil_data.soil_humidity if soil_data else None,
-            soil_ec=soil_data.soil_ec if soil_data else None,
-            soil_ph=soil_data.soil_ph if soil_data else None
-        )
+
+        # 이동 평균 필터에 바로 반영 (DB 조회 없이 maf_all에서 사용)
+        MovingAverageFilterSingleton.instance().push(sample)
+
+        if not RawDataWriterSingleton.instance().submit(sample):
+            print("[rawdata] Buffer full. Oldest sample dropped.", flush=True)
 
         # raw_data=RawData.objects.latest('timestamp')
 
@@ -72,6 +121,22 @@ def save_rawdata(gpio, soil, water):
     except Exception as e:
         print(f"[RawData Error] {e}")
 
+# DB 장애 중에도 FinalData를 만들어 스풀에 넣을 수 있도록 마지막으로 읽은 보정 설정을 보관
+_last_calibration = None
+
+
+def _calibration_settings():
+    """보정 설정 (id=1, 없으면 None). DB를 읽지 못하면 마지막으로 읽은 값"""
+    global _last_calibration
+    from omnitor.models import CalibrationSettings
+
+    try:
+        _last_calibration = CalibrationSettings.objects.filter(id=1).first()
+    except DatabaseError as e:
+        print(f"[finaldata] CalibrationSettings 조회 실패, 마지막 값 사용: {e}", flush=True)
+    return _last_calibration
+
+
 def save_finaldata():
     """
     RawData -> 필터링 & 보정 -> FinalData
@@ -80,19 +145,16 @@ def save_finaldata():
 
     # print(f"[save_final] save_finaldata start {timezone.now()}", flush=True)
 
-    global prev_weight
-    from omnitor.models import RawData, CalibrationSettings, FinalData
+    from omnitor.models import RawData, FinalData
     from . import save_calibrationsettings
 
     try:
         close_old_connections() 
         now = timezone.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
         # RawData 가져오기
-        try:
-            raw_latest = RawData.objects.latest('timestamp')
-        except RawData.DoesNotExist:
+        raw_latest = latest_rawdata()
+        if raw_latest is None:
             print("[finaldata] RawData does not exist.")
             return
 
@@ -116,12 +178,8 @@ def save_finaldata():
                 'soil_ph': raw_latest.soil_ph
             }
 
-        # 보정 설정 가져오기
-        try:
-            cal_settings = CalibrationSettings.objects.get(id=1)
-            # print(f"[finaldata] DB Settings Loaded: {cal_settings.__dict__}")
-        except CalibrationSettings.DoesNotExist:
-            cal_settings = None
+        # 보정 설정 가져오기 (DB 장애 중이면 마지막으로 읽은 값)
+        cal_settings = _calibration_settings()
 
         # DB에 설정이 없으면 '기울기 1, 절편 0'인 가짜 객체 생성
         if not cal_settings:
@@ -145,42 +203,30 @@ def save_finaldata():
 
         # 관수량 (급수량) 계산
         current_weight = (cal_settings.weight_slope * (filtered_data.get('weight')) + cal_settings.weight_intercept)
-        #print(f"[FinalData] Current Weight: {current_weight}, Previous Weight: {prev_weight}", flush=True)
 
-        irrigation = 0
-        
-        if prev_weight > 0 and current_weight > prev_weight + 100:
-            irrigation = current_weight - prev_weight
-            #print(f"[FinalData] Irrigation Detected: {irrigation} ml", flush=True)
-            
-        # 누적 데이터 계산
-        agg_result = FinalData.objects.filter(timestamp__gte=today_start).aggregate(
-            sum_insol=Sum('insolation'),
-            sum_irrig=Sum('irrigation')
-        )
-        
-        total_insolation = (agg_result['sum_insol'] or 0) + (filtered_data.get('insolation') or 0)
-        total_irrigation = (agg_result['sum_irrig'] or 0) + irrigation
+        # 하루 누적 데이터 계산 (관수량, 누적 일사량/관수량/배액량)
+        accumulator = DailyAccumulatorSingleton.instance()
+        totals = accumulator.step(now, filtered_data.get('insolation'), current_weight, raw_latest.tip_count)
 
         # 최종 저장
         # 수식: y = (x * slope) + intercept
         # 설정이 없으면: (값 * 1.0) + 0.0 = 값 (그대로 저장됨)
-        FinalData.objects.create(
+        final = FinalData(
             timestamp=now,
             
             air_temperature=temp,
             air_humidity=hum,
             co2=filtered_data.get('co2'),
             insolation=filtered_data.get('insolation'),
-            total_insolation=total_insolation,
+            total_insolation=totals['total_insolation'],
             vpd=vpd,
 
             # 무게 보정 적용
             weight=current_weight,
             
-            irrigation=irrigation, # 급수량
-            total_irrigation=total_irrigation, 
-            total_drainage=(raw_latest.tip_count) * tip_capacity, # 배액량
+            irrigation=totals['irrigation'], # 급수량
+            total_irrigation=totals['total_irrigation'],
+            total_drainage=totals['total_drainage'], # 오늘 누적 배액량
 
             water_temperature=filtered_data.get('water_temperature'),
             
@@ -196,11 +242,28 @@ def save_finaldata():
             soil_ph=filtered_data.get('soil_ph')
         )
 
+        try:
+            # FinalData와 구간 요약을 한 트랜잭션으로 커밋
+            # (그래프 캐시가 FinalData 최대 pk로 버전을 매기므로, 요약이 따로 커밋되면 그 사이 요청이 옛 요약을 새 버전으로 캐시함)
+            with transaction.atomic():
+                final.save()
+                # 요약 갱신 실패는 savepoint만 되돌림 (FinalData는 저장, backfill_rollups로 다시 맞출 수 있음)
+                try:
+                    with transaction.atomic():
+                        rollups.add(final)
+                except (OperationalError, InterfaceError):
+                    raise   # 연결 문제면 FinalData도 커밋되지 않으므로 스풀로
+                except Exception as e:
+                    print(f"[rollups] {e}", flush=True)
+        except Exception as e:
+            # DB 장애 시 로컬 스풀에 기록해 두고 복구 후 재적재
+            print(f"[FinalData Error] {e} -> spooled", flush=True)
+            SampleSpoolSingleton.instance().append('final', [final])
+
         # final_data=FinalData.objects.latest('timestamp')
 
         # print(f"[12] FinalData saved at {now.strftime('%H:%M:%S')} : {final_data}", flush = True)
-        prev_weight = current_weight
-        #print(f"prev weight: {prev_weight}", flush=True)
+        accumulator.checkpoint()
         print("[save_data.py] saving Final Data")
 
     except Exception as e:
@@ -0,0 +1,218 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 작업이 아직 실행 중인데 다음 차례가 왔을 때
+OVERRUN_SKIP = 'skip'        # 이번 회차는 건너뜀
+OVERRUN_QUEUE = 'queue'      # 끝나는 대로 이어서 실행 (최대 1회 대기)
+
+# 스케줄러가 늦어서 여러 회차를 놓쳤을 때
+MISSED_SKIP = 'skip'         # 놓친 회차는 버리고 다음 시각부터
+MISSED_CATCH_UP = 'catch_up' # 놓친 회차를 바로 이어서 실행
+
+HISTORY_SIZE = 200           # 통계용으로 보관하는 최근 실행 기록 수
+
+
+def _wall_offset():
+    """로컬 시간 기준 현재 시각(초). 분/시 정각 정렬에 사용"""
+    now = time.time()
+    return now + time.localtime(now).tm_gmtoff
+
+
+class Job:
+    """스케줄러에 등록된 작업 하나 (전용 단일 워커에서 실행)"""
+
+    def __init__(self, name, func, interval, align, overrun, missed):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.align = align
+        self.overrun = overrun
+        self.missed = missed
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"job-{name}")
+        self.deadline = None
+        self.boundary = None     # 정렬 작업의 다음 벽시계 경계 (로컬 초)
+        self.active = 0          # 실행 중 + 대기 중인 횟수
+
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.durations = deque(maxlen=HISTORY_SIZE)   # 실행 시간 (ms)
+        self.lags = deque(maxlen=HISTORY_SIZE)        # 예정 시각 대비 시작 지연 (ms)
+
+    def first_deadline(self, now):
+        if self.align:
+            wall = _wall_offset()
+            self.boundary = (wall // self.interval + 1) * self.interval
+            return now + (self.boundary - wall)
+        return now + self.interval
+
+    def next_deadline(self, now):
+        """
+        다음 실행 시각 계산 (이전 예정 시각 + interval 이라서 실행 시간만큼 밀리지 않음)
+        정렬 작업은 벽시계 경계(boundary) 기준으로 계산해서 시계 보정이 있어도 :00에 맞춤
+        """
+        if self.align:
+            wall = _wall_offset()
+            boundary = self.boundary + self.interval
+            if boundary <= wall and self.missed == MISSED_SKIP:
+                behind = int((wall - boundary) // self.interval) + 1
+                with self._lock:
+                    self.missed_ticks += behind
+                boundary += behind * self.interval
+            self.boundary = boundary
+            return now + (boundary - wall)
+
+        deadline = self.deadline + self.interval
+        if deadline <= now and self.missed == MISSED_SKIP:
+            behind = int((now - deadline) // self.interval) + 1
+            with self._lock:
+                self.missed_ticks += behind
+            deadline += behind * self.interval
+        return deadline
+
+    def run(self, deadline):
+        """워커 스레드에서 실행"""
+        started = time.monotonic()
+        try:
+            self.func()
+            failed = False
+        except Exception as e:
+            failed = True
+            print(f"[scheduler] {self.name} Error: {e}", flush=True)
+        finished = time.monotonic()
+
+        with self._lock:
+            self.active -= 1
+            self.runs += 1
+            if failed:
+                self.errors += 1
+            self.durations.append((finished - started) * 1000.0)
+            self.lags.append((started - deadline) * 1000.0)
+
+    def stats(self):
+        with self._lock:
+            durations = sorted(self.durations)
+            lags = sorted(self.lags)
+            result = {
+                'interval': self.interval,
+                'runs': self.runs,
+                'errors': self.errors,
+                'overruns': self.overruns,
+                'missed': self.missed_ticks,
+                'running': self.active > 0,
+            }
+        result.update(_summary('duration_ms', durations))
+        result.update(_summary('lag_ms', lags))
+        return result
+
+
+def _summary(prefix, values):
+    if not values:
+        return {f"{prefix}_avg": None, f"{prefix}_p95": None, f"{prefix}_max": None}
+    return {
+        f"{prefix}_avg": sum(values) / len(values),
+        f"{prefix}_p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        f"{prefix}_max": values[-1],
+    }
+
+
+class JobScheduler:
+    """
+    monotonic deadline 힙 기반 스케줄러
+    - 작업마다 전용 워커 스레드가 있어서 느린 작업(카메라, LCD)이 1초 작업을 막지 않음
+    - align=True 작업은 로컬 벽시계 경계(예: 매분 :00)에 맞춰 실행
+    - 작업별 실행 시간 / 지연(lag) 통계 제공
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.running = False
+
+    def every(self, seconds, func, name=None, align=False, overrun=OVERRUN_SKIP, missed=MISSED_SKIP):
+        """작업 등록. align=True면 interval 경계(로컬 시간 기준 :00 등)에 맞춰 실행"""
+        name = name or func.__name__
+        job = Job(name, func, seconds, align, overrun, missed)
+        with self._cond:
+            self._jobs[name] = job
+            job.deadline = job.first_deadline(time.monotonic())
+            heapq.heappush(self._heap, (job.deadline, next(self._seq), job))
+            self._cond.notify_all()
+        return job
+
+    def run(self):
+        """스케줄러 루프 (호출한 스레드에서 계속 실행)"""
+        with self._cond:
+            # 등록 후 시작까지 걸린 시간은 놓친 회차로 세지 않도록 시작 시점 기준으로 다시 계산
+            now = time.monotonic()
+            self._heap = []
+            for job in self._jobs.values():
+                job.deadline = job.first_deadline(now)
+                heapq.heappush(self._heap, (job.deadline, next(self._seq), job))
+            self.running = True
+        while True:
+            with self._cond:
+                while self.running:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+                if not self.running:
+                    return
+                deadline, _, job = heapq.heappop(self._heap)
+
+            self._dispatch(job, deadline)
+
+            with self._cond:
+                job.deadline = job.next_deadline(time.monotonic())
+                heapq.heappush(self._heap, (job.deadline, next(self._seq), job))
+
+    def start(self):
+        """별도 데몬 스레드에서 run() 실행"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self, wait=False):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for job in self._jobs.values():
+            job.executor.shutdown(wait=wait)
+
+    def _dispatch(self, job, deadline):
+        with job._lock:
+            limit = 1 if job.overrun == OVERRUN_SKIP else 2
+            if job.active >= limit:
+                job.overruns += 1
+                return
+            job.active += 1
+        job.executor.submit(job.run, deadline)
+
+    def stats(self):
+        """작업별 실행 통계 {이름: {...}}"""
+        with self._cond:
+            jobs = list(self._jobs.values())
+        return {job.name: job.stats() for job in jobs}
+
+
+class JobSchedulerSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = JobScheduler()
+            return cls._instance
@@ -0,0 +1,365 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, connection, transaction
+
+from . import rawblocks
+
+# 스풀 설정 (settings.py에서 덮어쓰기 가능)
+SPOOL_DIR = getattr(settings, 'SPOOL_DIR', os.path.join(settings.BASE_DIR, 'spool'))
+SPOOL_MAX_BYTES = getattr(settings, 'SPOOL_MAX_BYTES', 256 * 1024 * 1024)   # 전체 스풀 최대 크기
+SPOOL_SEGMENT_BYTES = getattr(settings, 'SPOOL_SEGMENT_BYTES', 4 * 1024 * 1024)
+SPOOL_FSYNC_EVERY = getattr(settings, 'SPOOL_FSYNC_EVERY', 30)              # N개 기록마다 fsync
+SPOOL_FSYNC_INTERVAL = getattr(settings, 'SPOOL_FSYNC_INTERVAL', 5.0)       # 또는 N초마다 fsync
+SPOOL_REPLAY_INTERVAL = getattr(settings, 'SPOOL_REPLAY_INTERVAL', 10.0)
+SPOOL_REPLAY_BATCH = getattr(settings, 'SPOOL_REPLAY_BATCH', 500)
+
+# 레코드 형식: [길이 4byte][crc32 4byte][JSON payload]
+HEADER = struct.Struct('>II')
+CHECKPOINT_NAME = 'replay.pos'
+
+
+def _model_for(kind):
+    from omnitor.models import RawData, FinalData
+    return {'raw': RawData, 'final': FinalData}[kind]
+
+
+def _encode(kind, obj):
+    """모델 인스턴스 -> 스풀 레코드 bytes"""
+    fields = {}
+    for field in obj._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        value = getattr(obj, field.attname)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        fields[field.attname] = value
+    payload = json.dumps({'m': kind, 'f': fields}, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(payload):
+    """스풀 레코드 payload -> (kind, 저장되지 않은 모델 인스턴스)"""
+    record = json.loads(payload)
+    kind = record['m']
+    fields = record['f']
+    fields['timestamp'] = datetime.fromisoformat(fields['timestamp'])
+    return kind, _model_for(kind)(**fields)
+
+
+class SampleSpool:
+    """
+    DB 저장에 실패한 샘플을 보관하는 append-only 로컬 스풀
+    - 세그먼트 파일(spool-00000001.log ...)에 길이+crc 헤더를 붙여 순서대로 기록
+    - fsync는 SPOOL_FSYNC_EVERY개 / SPOOL_FSYNC_INTERVAL초 단위로 묶어서 수행
+    - 전체 크기가 SPOOL_MAX_BYTES를 넘으면 가장 오래된 세그먼트부터 삭제
+    - 백그라운드 스레드가 DB가 복구되면 bulk_create로 재적재 (timestamp 기준 중복 제거)
+    - 저장할 수 없는 레코드는 {세그먼트}.bad 파일로 격리하고 다음 레코드로 진행
+    """
+
+    def __init__(self, directory=SPOOL_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.running = False
+        self.thread = None
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._stats = {
+            'appended': 0,
+            'fsyncs': 0,
+            'dropped_segments': 0,
+            'replayed': 0,
+            'duplicates_skipped': 0,
+            'corrupt_records': 0,
+            'quarantined': 0,
+        }
+
+    # ===== 기록 =====
+    def append(self, kind, objs):
+        """
+        모델 인스턴스 목록을 스풀에 기록 (kind: 'raw' 또는 'final')
+        실패하면 예외를 그대로 올림 (디스크 full 등)
+        """
+        data = b''.join(_encode(kind, obj) for obj in objs)
+        with self._lock:
+            if self._file is None or self._file.tell() >= SPOOL_SEGMENT_BYTES:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._unsynced += len(objs)
+            self._stats['appended'] += len(objs)
+            if (self._unsynced >= SPOOL_FSYNC_EVERY
+                    or time.monotonic() - self._last_sync >= SPOOL_FSYNC_INTERVAL):
+                self._sync()
+        self._enforce_cap()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._file is None or not self._unsynced:
+            return
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._stats['fsyncs'] += 1
+
+    def _rotate(self):
+        """현재 세그먼트를 닫고 새 세그먼트 열기 (lock 안에서 호출)"""
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+            if self._segment and os.path.getsize(self._segment) == 0:
+                os.remove(self._segment)
+
+        segments = self._segments()
+        last_seq = int(os.path.basename(segments[-1])[6:14]) if segments else 0
+        self._segment = os.path.join(self.directory, f"spool-{last_seq + 1:08d}.log")
+        self._file = open(self._segment, 'ab')
+
+    def _segments(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith('spool-') and n.endswith('.log'))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _enforce_cap(self):
+        """전체 크기 제한: 넘으면 가장 오래된 닫힌 세그먼트부터 삭제"""
+        with self._lock:
+            segments = [s for s in self._segments() if s != self._segment]
+            total = sum(os.path.getsize(s) for s in self._segments())
+            while segments and total > SPOOL_MAX_BYTES:
+                oldest = segments.pop(0)
+                total -= os.path.getsize(oldest)
+                os.remove(oldest)
+                self._stats['dropped_segments'] += 1
+                if self._read_checkpoint()[0] == os.path.basename(oldest):
+                    self._write_checkpoint(None, 0)
+                print(f"[spool] 용량 초과로 세그먼트 삭제: {os.path.basename(oldest)}", flush=True)
+
+    def pending_bytes(self):
+        with self._lock:
+            return sum(os.path.getsize(s) for s in self._segments())
+
+    # ===== 재적재 =====
+    def start(self):
+        """재적재 스레드 시작 (apps.py에서 호출)"""
+        if self.running:
+            return True
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def _loop(self):
+        while self.running:
+            time.sleep(SPOOL_REPLAY_INTERVAL)
+            if not self.pending_bytes():
+                continue
+            try:
+                close_old_connections()
+                connection.ensure_connection()
+            except Exception:
+                continue   # DB가 아직 복구되지 않음
+            try:
+                self.replay()
+            except Exception as e:
+                print(f"[spool] 재적재 실패: {e}", flush=True)
+
+    def replay(self):
+        """
+        스풀에 쌓인 레코드를 DB로 재적재
+        세그먼트 이름 + offset을 checkpoint 파일에 남겨, 중간에 재시작해도 이어서 진행
+        (checkpoint 직전에 죽어도 timestamp 중복 확인으로 두 번 저장되지 않음)
+        레코드 자체가 문제면 격리(_quarantine)하고 넘어가서 한 레코드 때문에 재적재가 멈추지 않음
+        """
+        with self._lock:
+            # 쓰는 중인 세그먼트도 닫아서 재적재 대상에 포함
+            if self._file is not None and self._file.tell() > 0:
+                self._rotate()
+            segments = [s for s in self._segments() if s != self._segment]
+
+        for path in segments:
+            name = os.path.basename(path)
+            pos_name, offset = self._read_checkpoint()
+            if pos_name != name:
+                offset = 0
+
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                while True:
+                    batch, offset, read = self._read_batch(f, offset, name)
+                    if not read:
+                        break
+                    if batch:
+                        self._store_or_quarantine(batch, name)
+                    self._write_checkpoint(name, offset)
+
+            remaining = os.path.getsize(path) - offset
+            if remaining > 0:
+                # 다 읽지 못한 세그먼트는 지우지 않음 (checkpoint부터 다음 재적재 때 다시 시도)
+                print(f"[spool] {name}: 읽지 못한 {remaining} bytes가 남아 세그먼트 유지", flush=True)
+                continue
+
+            # checkpoint를 먼저 지워야 같은 이름의 새 세그먼트를 건너뛰는 일이 없음
+            self._write_checkpoint(None, 0)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read_batch(self, f, offset, name):
+        """
+        세그먼트에서 최대 SPOOL_REPLAY_BATCH개 읽기 -> ([(kind, 인스턴스, payload)], offset, 읽은 레코드 수)
+        파일 끝에서 잘린 레코드(기록 도중 끊긴 꼬리)는 버리고,
+        길이는 맞는데 CRC가 틀리거나 풀 수 없는 레코드는 격리한 뒤 다음 레코드로 진행
+        """
+        batch = []
+        read = 0
+        while read < SPOOL_REPLAY_BATCH:
+            header = f.read(HEADER.size)
+            if not header:
+                break
+            length, crc = HEADER.unpack(header) if len(header) == HEADER.size else (None, None)
+            payload = f.read(length) if length is not None else b''
+            if length is None or len(payload) < length:
+                # 짧게 읽혔다는 건 파일 끝이라는 뜻 -> 끊긴 꼬리만 버림
+                self._stats['corrupt_records'] += 1
+                offset = f.tell()
+                break
+            offset += HEADER.size + length
+            read += 1
+            if zlib.crc32(payload) != crc:
+                self._stats['corrupt_records'] += 1
+                self._quarantine(name, payload, 'CRC 불일치')
+                continue
+            try:
+                kind, obj = _decode(payload)
+            except Exception as e:
+                self._quarantine(name, payload, e)
+                continue
+            batch.append((kind, obj, payload))
+        return batch, offset, read
+
+    def _store_or_quarantine(self, batch, name):
+        """
+        배치를 저장하고, 실패하면 레코드별로 다시 시도해서 저장할 수 없는 레코드만 격리
+        DB 연결 문제는 그대로 올려서 다음 재적재 때 같은 위치부터 다시 시도
+        """
+        try:
+            self._store([(kind, obj) for kind, obj, _ in batch])
+            return
+        except (OperationalError, InterfaceError):
+            raise
+        except Exception as e:
+            print(f"[spool] {name}: 배치 저장 실패, 레코드별로 다시 시도: {e}", flush=True)
+
+        for kind, obj, payload in batch:
+            try:
+                self._store([(kind, obj)])
+            except (OperationalError, InterfaceError):
+                raise
+            except Exception as e:
+                self._quarantine(name, payload, e)
+
+    def _quarantine(self, name, payload, error):
+        """재적재할 수 없는 레코드를 같은 형식으로 {세그먼트}.bad 파일에 옮겨 두고 넘어감 (원인 확인 / 수동 복구용)"""
+        path = os.path.join(self.directory, name[:-len('.log')] + '.bad')
+        with open(path, 'ab') as f:
+            f.write(HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._stats['quarantined'] += 1
+        print(f"[spool] {name}: 레코드 격리 -> {os.path.basename(path)} ({error})", flush=True)
+
+    def _store(self, batch):
+        """모델별로 나눠 이미 DB에 있는 timestamp는 건너뛰고 bulk_create"""
+        by_kind = {}
+        for kind, obj in batch:
+            by_kind.setdefault(kind, {})[obj.timestamp] = obj
+
+        for kind, objs in by_kind.items():
+            if kind == 'raw' and rawblocks.enabled():
+                # 블록 저장은 같은 칸을 덮어쓰므로 중복 확인 없이 그대로 기록
+                rawblocks.append(list(objs.values()))
+                self._stats['replayed'] += len(objs)
+                continue
+            model = _model_for(kind)
+            stamps = list(objs)
+            existing = set(model.objects.filter(
+                timestamp__range=(min(stamps), max(stamps))
+            ).values_list('timestamp', flat=True))
+            new_objs = [obj for ts, obj in objs.items() if ts not in existing]
+            if new_objs:
+                # FinalData와 요약을 한 트랜잭션으로 커밋 (save_data.save_finaldata와 같은 이유, 그래프 캐시 버전)
+                with transaction.atomic():
+                    model.objects.bulk_create(new_objs, batch_size=SPOOL_REPLAY_BATCH)
+                    if kind == 'final':
+                        # 요약 갱신 실패는 레코드 문제가 아님 (savepoint만 되돌림, backfill_rollups로 다시 맞춤)
+                        from . import rollups
+                        try:
+                            with transaction.atomic():
+                                for obj in new_objs:
+                                    rollups.add(obj)
+                        except (OperationalError, InterfaceError):
+                            raise
+                        except Exception as e:
+                            print(f"[rollups] {e}", flush=True)
+            self._stats['replayed'] += len(new_objs)
+            self._stats['duplicates_skipped'] += len(objs) - len(new_objs)
+
+    def _read_checkpoint(self):
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_NAME)) as f:
+                name, offset = f.read().split()
+                return name, int(offset)
+        except (OSError, ValueError):
+            return None, 0
+
+    def _write_checkpoint(self, name, offset):
+        path = os.path.join(self.directory, CHECKPOINT_NAME)
+        if name is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(f"{name} {offset}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def stats(self):
+        result = dict(self._stats)
+        result['pending_bytes'] = self.pending_bytes()
+        return result
+
+
+class SampleSpoolSingleton:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = SampleSpool()
+            return cls._instance
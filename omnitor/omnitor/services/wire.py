@@ -0,0 +1,148 @@
+import gzip
+import json
+
+import numpy as np
+from django.http import HttpResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# 그래프 응답 인코딩 (graph_api ?format=)
+#   json: 기본 / msgpack: pip install msgpack / arrow: Arrow IPC stream (pyarrow)
+FORMATS = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+DECIMALS = 3                # 열 형식 값 소수점 자릿수 (센서 정밀도보다 충분히 작게)
+MIN_COMPRESS_BYTES = 1024   # 이보다 작으면 압축하지 않음
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5          # 라즈베리파이에서 실시간 응답용 (11은 너무 느림)
+
+
+def available(fmt):
+    return fmt == 'json' or (fmt == 'msgpack' and msgpack is not None) or (fmt == 'arrow' and pa is not None)
+
+
+def _epoch_ms(times):
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    return times.to_numpy().astype('datetime64[ms]').astype(np.int64)
+
+
+def columns(df, time_column='timestamp', decimals=DECIMALS):
+    """
+    DataFrame -> 열 형식 dict
+    {'t0': 시작 epoch ms, 'step': 간격 ms} (간격이 일정할 때) 또는 {'t': [epoch ms, ...]},
+    {'fields': {필드: [값 또는 None, ...]}}
+    키 이름은 한 번만, 값 없음은 null
+    """
+    stamps = _epoch_ms(df[time_column])
+    result = {'count': len(stamps)}
+    steps = np.diff(stamps)
+    if len(stamps) > 1 and (steps == steps[0]).all():
+        result['t0'] = int(stamps[0])
+        result['step'] = int(steps[0])
+    else:
+        result['t'] = stamps.tolist()
+
+    fields = {}
+    for column in df.columns:
+        if column == time_column:
+            continue
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan).round(decimals)
+        missing = np.isnan(values)
+        items = values.tolist()
+        if missing.any():
+            for i in np.flatnonzero(missing):
+                items[i] = None
+        fields[column] = items
+    result['fields'] = fields
+    return result
+
+
+def _arrow(df, summary):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({'summary': json.dumps(summary)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(df, summary, fmt='json', layout='records', time_column='timestamp'):
+    """
+    응답 본문을 한 번에 만듦 (bytes, content type)
+    - json + records: 기존 형식 {'data': [{...}, ...], 'summary': {...}} (to_json 결과를 그대로 이어 붙임)
+    - json + columns / msgpack: {'layout': 'columns', ...columns(), 'summary': {...}}
+    - arrow: Arrow IPC stream (summary는 schema metadata)
+    """
+    if fmt == 'arrow':
+        return _arrow(df, summary), FORMATS['arrow']
+
+    if fmt == 'json' and layout == 'records':
+        data = df.to_json(orient='records', date_format='iso')
+        body = '{"data":' + data + ',"summary":' + json.dumps(summary) + '}'
+        return body.encode(), FORMATS['json']
+
+    payload = {'layout': 'columns', **columns(df, time_column), 'summary': summary}
+    if fmt == 'msgpack':
+        return msgpack.packb(payload, use_bin_type=True), FORMATS['msgpack']
+    return json.dumps(payload, separators=(',', ':')).encode(), FORMATS['json']
+
+
+def _accepted(accept_encoding):
+    """Accept-Encoding 헤더 -> 받을 수 있는 인코딩 집합 (q=0 제외)"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                pass
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress(body, accept_encoding):
+    """클라이언트가 받는 압축 중 가장 작은 것으로 (brotli > gzip), 반환: (본문, Content-Encoding 또는 None)"""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), 'gzip'
+    return body, None
+
+
+def response(request, df, summary, fmt='json', layout='records', time_column='timestamp'):
+    """encode + 압축 협상으로 HttpResponse 생성"""
+    body, content_type = encode(df, summary, fmt, layout, time_column)
+    return respond(request, body, content_type)
+
+
+def respond(request, body, content_type):
+    """인코딩된 본문 (캐시에 보관한 것 등) -> 압축 협상 후 HttpResponse"""
+    body, encoding = compress(body, request.META.get('HTTP_ACCEPT_ENCODING'))
+    result = HttpResponse(body, content_type=content_type)
+    result['Vary'] = 'Accept-Encoding'
+    if encoding:
+        result['Content-Encoding'] = encoding
+    return result
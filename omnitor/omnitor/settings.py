@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'omnitor.middleware.QueryCountMiddleware',
 ]
 
 ROOT_URLCONF = 'omnitor.urls'
@@ -74,16 +75,66 @@ WSGI_APPLICATION = 'omnitor.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'omnitor',   
-        'USER': 'omnitor',    
-        'PASSWORD': 'meta0902',     
-        'HOST': 'localhost',   
-        'PORT': '5432',            
+# DB 프로필: 'postgresql' (기본) / 'sqlite' (작은 라즈베리파이용 내장 DB, 환경변수 OMNITOR_DB=sqlite)
+DATABASE_PROFILE = os.environ.get('OMNITOR_DB', 'postgresql')
+
+if DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('OMNITOR_SQLITE_PATH', os.path.join(BASE_DIR, 'omnitor.sqlite3')),
+            'OPTIONS': {
+                # 연결마다 적용 (WAL: 쓰는 동안에도 그래프 조회가 막히지 않음, NORMAL: 커밋마다 fsync 안 함)
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'     # 256MB
+                    'PRAGMA cache_size=-16000;'       # 16MB
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA wal_autocheckpoint=1000;'
+                ),
+                # 쓰기 트랜잭션은 시작할 때 잠금 (중간에 SQLITE_BUSY로 실패하지 않고 timeout까지 대기)
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+            # manage.py bench용 테스트 DB도 파일로 (기본 in-memory면 측정이 의미 없음)
+            'TEST': {'NAME': os.path.join(BASE_DIR, 'omnitor_test.sqlite3')},
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': 'omnitor',   
+            'USER': 'omnitor',    
+            'PASSWORD': 'meta0902',     
+            'HOST': os.environ.get('OMNITOR_DB_HOST', 'localhost'),   
+            'PORT': os.environ.get('OMNITOR_DB_PORT', '5432'),            
+        }
+    }
+
+# DB 연결 수명 (services/dbconn.py)
+# - 웹 요청 / 스케줄러 작업마다 새로 연결하지 않고 CONN_MAX_AGE초 동안 재사용, 재사용 전에 연결 상태 확인
+# - DB_POOL=True면 프로세스마다 psycopg 연결 pool 사용 (pip install "psycopg[pool]", CONN_MAX_AGE는 0이어야 함)
+# - PgBouncer(transaction pooling) 뒤에 둘 때는 OMNITOR_PGBOUNCER=1 (서버 측 커서 사용 안 함, pool은 PgBouncer가 담당)
+DB_POOL = os.environ.get('OMNITOR_DB_POOL') == '1'
+DB_POOL_OPTIONS = {
+    'min_size': 2,      # 스케줄러 워커 + 웹 요청이 바로 쓸 수 있게 유지할 연결 수
+    'max_size': 10,
+    'timeout': 10,      # pool이 비었을 때 기다리는 시간 (초)
+    'max_idle': 300,    # 이 시간 동안 안 쓰면 min_size까지 정리
+    'max_lifetime': 3600,
 }
+PGBOUNCER = os.environ.get('OMNITOR_PGBOUNCER') == '1'
+
+DATABASES['default']['CONN_MAX_AGE'] = 60
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if DATABASE_PROFILE != 'sqlite':
+    if PGBOUNCER:
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif DB_POOL:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {'pool': DB_POOL_OPTIONS}
 
 
 
@@ -130,3 +181,68 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'omnitor', 'media')
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# RawData 배치 저장 설정 (services/ingest.py)
+RAWDATA_BATCH_SIZE = 30        # 30개(약 30초) 모이면 한 번에 저장
+RAWDATA_FLUSH_INTERVAL = 30.0  # 개수가 덜 찼어도 30초마다 저장
+RAWDATA_MAX_PENDING = 3600     # DB 장애 시 메모리에 최대 1시간 분량 보관
+RAWDATA_STORAGE = 'rows'       # 'rows' (1초 1행) / 'blocks' (1분치를 한 행에 묶어 저장, services/rawblocks.py)
+
+# DB 장애 시 로컬 스풀 설정 (services/spool.py)
+SPOOL_DIR = os.path.join(BASE_DIR, 'spool')
+SPOOL_MAX_BYTES = 256 * 1024 * 1024   # 최대 256MB (넘으면 오래된 세그먼트부터 삭제)
+SPOOL_FSYNC_EVERY = 30                # 30개 기록마다 fsync
+SPOOL_FSYNC_INTERVAL = 5.0            # 또는 5초마다 fsync
+
+# 이동 평균 필터 필드별 윈도우 크기 (services/filtering.py, 기본 5)
+FILTER_WINDOW_SIZES = {
+    # 'weight': 300,
+}
+
+# 하루 누적값(일사량/관수량/배액량) 체크포인트 파일 (services/accumulators.py)
+ACCUMULATOR_STATE_FILE = os.path.join(BASE_DIR, 'state', 'daily_totals.json')
+
+# 센서 수집 방식: 'threads' (센서마다 스레드) / 'asyncio' (이벤트 루프 하나에서 모두 읽음, devices/engine.py)
+ACQUISITION_ENGINE = 'threads'
+
+# RS-485 버스 매니저 사용 여부 (devices/modbus_bus.py). True면 포트마다 스레드 하나로 여러 slave를 읽음
+MODBUS_BUS_MANAGER = False
+
+# 버스 매니저에 추가로 등록할 토양/배액 프로브
+MODBUS_PROBES = [
+    # {'kind': 'soil', 'name': 'soil-2', 'port': '/dev/ttyUSB1', 'slave': 2, 'period': 1.0},
+]
+
+# GPIO 센서별 읽기 주기 (초, devices/gpio.py 기본값을 덮어씀)
+GPIO_SAMPLE_PERIODS = {
+    # 'weight': 0.1,
+}
+GPIO_WEIGHT_OVERSAMPLE = 1          # HX711 한 번 읽을 때 샘플 수
+GPIO_WEIGHT_REDUCER = 'median'      # 'median' / 'mean'
+
+# 장치 구현: 'hardware' (라즈베리파이 실제 센서) / 'simulated' (하드웨어 없이 전체 스택 실행, devices/simulated.py)
+DEVICE_BACKEND = 'hardware'
+
+# 시뮬레이터 설정 (devices/simulated.py 기본값을 덮어씀)
+SIMULATED_DEVICES = {
+    # 'sample_rates': {'gpio': 1000.0, 'soil': 2.0, 'water': 1.0},
+    # 'fault_rate': 0.0,
+    # 'seed': 42,
+}
+
+# 응답 헤더에 요청별 DB 쿼리 수 / 시간 추가 (omnitor/middleware.py, manage.py loadtest에서 사용)
+QUERY_COUNT_HEADER = False
+
+# RawData / FinalData 월 파티션 (services/partitions.py, manage.py partitions --convert로 변환, PostgreSQL 전용)
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_RETENTION_MONTHS = {
+    'omnitor_rawdata': None,     # 예: 3 -> 3개월 지난 파티션은 DETACH
+    'omnitor_finaldata': None,
+}
+
+# RawData 보관 정책 (services/archive.py, pyarrow 필요)
+# 이 기간(일)보다 오래된 RawData는 하루 단위 Parquet(zstd) 파일로 옮기고 DB에서 삭제, None이면 보관 안 함
+# (기본은 None: 켜면 DB에서 행이 지워지므로 직접 설정, 예: 30)
+RAWDATA_RETENTION_DAYS = None
+RAWDATA_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive', 'rawdata')
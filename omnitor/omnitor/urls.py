@@ -5,7 +5,7 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
-from .views import api_dashboard, api_calibrate, api_journal, api_graph
+from .views import api_dashboard, api_calibrate, api_journal, api_graph, api_status
 from .views import pages
 
 urlpatterns = [
@@ -20,6 +20,7 @@ urlpatterns = [
     path('calibrate_api/', api_calibrate.calibrate_api, name='calibrate_api'),
     path('journal_api/', api_journal.journal_api, name='journal_api'),
     path('graph_api/', api_graph.graph_api, name='graph_api'),
+    path('status_api/', api_status.status_api, name='status_api'),
 ]
 
 if settings.DEBUG:
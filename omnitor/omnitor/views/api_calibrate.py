@@ -1,8 +1,9 @@
 import json
 import datetime
-from omnitor.models import RawData, CalibrationSettings
+from omnitor.models import CalibrationSettings
 from omnitor.services.save_calibrationsettings import calibrate_all
 from omnitor.services.filtering import avg
+from omnitor.services.ingest import latest_rawdata
 from django.http import JsonResponse, HttpResponseBadRequest
 
 def calibrate_api(request):
@@ -13,7 +14,7 @@ def calibrate_api(request):
     :param request: Description
     """
     if request.method == 'GET':
-        raw = RawData.objects.last()
+        raw = latest_rawdata()
         cal_settings = CalibrationSettings.objects.get(id=1)
         if not cal_settings:
             print ("Not cal_settings. setting default values.")
@@ -45,7 +46,7 @@ def calibrate_api(request):
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
         obj = CalibrationSettings.objects.get(id=1)
-        raw = RawData.objects.last()
+        raw = latest_rawdata()
         if not obj:
             obj = CalibrationSettings.objects.create()
 
@@ -15,7 +15,7 @@ def dashboard_api(request):
     if request.method == 'GET':
         try:
             # 최신 데이터 1개 조회 (timestamp 기준 내림차순 정렬 후 첫 번째 or last())
-            latest_data = FinalData.objects.last()
+            latest_data = FinalData.objects.order_by('-timestamp').first()
 
             # 데이터가 아예 없는 경우 예외 처리
             if latest_data is None:
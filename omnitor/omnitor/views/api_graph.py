@@ -1,12 +1,65 @@
 import pandas as pd
-import json
 from datetime import timedelta, datetime, time
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils.dateparse import parse_date, parse_datetime
 from omnitor.models import FinalData
+from omnitor.services import aggregation, downsample, export, graphcache, rollups, wire
 import pytz
 
+def _parse_agg(value, fields):
+    """?agg= 값 -> {필드: 방법} ('max' 하나면 모든 필드, 'field:how,...'면 필드별)"""
+    if not value:
+        return {}
+    how = {}
+    for item in value.split(','):
+        field, sep, method = item.strip().partition(':')
+        if not sep:
+            field, method = None, field
+        if method not in aggregation.AGGREGATES:
+            raise ValueError(f"알 수 없는 집계 방법: {method}")
+        if field is None:
+            how.update({f: method for f in fields if f != 'timestamp'})
+        elif field in fields and field != 'timestamp':
+            how[field] = method
+        else:
+            raise ValueError(f"알 수 없는 필드: {field}")
+    return how
+
+
+def _query(start, end, fields, unit_val, how):
+    """
+    [start, end] FinalData 조회 -> (행 목록, 구간 집계 여부)
+    단위가 있으면 DB에서 구간별로 집계해서 구간 수만큼만 가져옴
+    - 요약이 구간을 다 덮으면 요약 테이블 (단위가 요약 단계의 배수면 요약 행을 다시 묶음, 예: 3h <- 1h)
+    - 아니면 FinalData를 DB에서 date_bin + GROUP BY
+    """
+    tier = rollups.tier_for(unit_val)
+    if tier and rollups.covers(tier, start, end) and (
+            rollups.TIER_MINUTES[tier] == unit_val or aggregation.supported()):
+        return rollups.values(tier, start, end, fields, how, unit_val), True
+    if unit_val and aggregation.supported():
+        return aggregation.aggregate(FinalData, start, end, unit_val * 60, fields, how), True
+    # DB 조회
+    data = FinalData.objects.filter(
+        timestamp__range=(start, end)
+    ).values(*fields).order_by('timestamp')
+    return list(data), False
+
+
+def _cache_headers(response, etag, last_modified):
+    """다음 요청에 브라우저가 If-None-Match / If-Modified-Since를 보내서 304를 받을 수 있도록"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+
 def graph_api(request):
     if request.method == 'GET':
         start_date_str = request.GET.get('start_date')
@@ -26,6 +79,32 @@ def graph_api(request):
         if range_val and unit_val and unit_val > range_val:
             return JsonResponse({'error': f'단위({time_unit})가 범위({time_range})보다 큽니다.'}, status=400)
 
+        # 응답 전체 최대 행 수 (?max_points=8000&downsample=lttb|minmax), 시리즈마다 max_points / 시리즈 수 만큼 고름
+        # 내보내기에는 적용 안 함
+        max_points = request.GET.get('max_points')
+        method = request.GET.get('downsample', 'lttb')
+        if max_points is not None:
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if max_points < 3:
+                return JsonResponse({'error': 'max_points는 3 이상의 정수여야 합니다.'}, status=400)
+        if method not in downsample.METHODS:
+            return JsonResponse({'error': f'알 수 없는 downsample 방법: {method}'}, status=400)
+
+        # 응답 형식 (?format=json|msgpack|arrow|csv|excel, ?layout=records|columns)
+        layout = request.GET.get('layout', 'records')
+        source = request.GET.get('source', 'final')
+        if source not in ('final', 'raw') or (source == 'raw' and fmt not in export.FORMATS):
+            return JsonResponse({'error': '?source=raw는 csv / excel 내보내기에서만 쓸 수 있습니다.'}, status=400)
+        if fmt not in export.FORMATS:
+            fmt = fmt or 'json'
+            if fmt not in wire.FORMATS or layout not in ('records', 'columns'):
+                return JsonResponse({'error': f'지원하지 않는 형식: {fmt} / {layout}'}, status=400)
+            if not wire.available(fmt):
+                return JsonResponse({'error': f'서버에 {fmt} 인코더가 설치되어 있지 않습니다.'}, status=406)
+
         # 기본 시간 설정 (현재 시간 기준)
         end_time = timezone.now()
         start_time = end_time - timedelta(minutes=10)
@@ -77,19 +156,75 @@ def graph_api(request):
             print(f"Date Parsing Error: {e}")
             return JsonResponse({'error': '날짜 형식이 올바르지 않습니다.'}, status=400)
 
-        # DB 조회
-        data = FinalData.objects.filter(
-            timestamp__range=(start_time, end_time)
-        ).values(
+        fields = (
             'timestamp', 
             'air_temperature', 'air_humidity', 'co2', 'insolation', 'vpd',
             'weight', 'irrigation', 'total_drainage',
             'water_temperature', 'water_ph', 'water_ec',
             'soil_temperature', 'soil_humidity', 'soil_ec', 'soil_ph',
             'total_insolation', 'total_irrigation'
-        ).order_by('timestamp')
+        )
+
+        # USE_TZ=False면 DB 시각은 naive 현지 시각 (SQLite는 aware 값으로 조회하면 에러)
+        query_start, query_end = start_time, end_time
+        if not settings.USE_TZ:
+            query_start = timezone.make_naive(start_time) if timezone.is_aware(start_time) else start_time
+            query_end = timezone.make_naive(end_time) if timezone.is_aware(end_time) else end_time
 
-        data_list = list(data)
+        # 필드별 구간 대표값 (?agg=max 또는 ?agg=air_temperature:max,weight:min, 기본은 aggregation.default_how)
+        try:
+            how = _parse_agg(request.GET.get('agg'), fields)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        # 내보내기는 DataFrame 없이 커서에서 읽는 대로 바로 써 보냄 (?source=raw면 1초 RawData)
+        if fmt in export.FORMATS:
+            if source == 'raw':
+                header = export.raw_fields()
+                rows = export.raw_rows(query_start, query_end, header)
+                prefix = 'rawdata'
+            elif unit_val and aggregation.supported():
+                header = list(fields)
+                rows = export.bucket_rows(query_start, query_end, unit_val, header, how)
+                prefix = 'sensor_data'
+            else:
+                header = list(fields)
+                rows = export.final_rows(query_start, query_end, header)
+                prefix = 'sensor_data'
+            content_type, extension = export.FORMATS[fmt]
+            response = StreamingHttpResponse(export.stream(fmt, rows, header), content_type=content_type)
+            filename = f"{prefix}_{start_time.strftime('%Y%m%d')}_{end_time.strftime('%Y%m%d')}.{extension}"
+            response['Content-Disposition'] = f'attachment; filename={filename}'
+            response['X-Accel-Buffering'] = 'no'     # nginx가 모아서 보내지 않도록
+            return response
+
+        # 같은 화면 요청이 같은 키가 되도록 범위를 구간 경계로 맞춤 (단위가 없으면 1분)
+        # 닫힌 구간은 캐시에서, 열린 구간은 새 FinalData가 들어왔을 때만 다시 조회 (services/graphcache.py)
+        step = unit_val * 60 if unit_val else graphcache.RAW_STEP
+        query_start, query_end = graphcache.quantize(query_start, query_end, step)
+        if graphcache.ENABLED:
+            cache = graphcache.GraphCacheSingleton.instance()
+            series_key = (unit_val, fields, tuple(sorted(how.items())))
+            response_key = (series_key, query_start, query_end, fmt, layout, max_points, method)
+            now = timezone.now()
+            mark = cache.sync()
+            version = cache.version(series_key, step, query_end, now, mark)
+            etag = cache.etag(response_key, version)
+            cached = cache.response(response_key, version)
+            last_modified = int(cached[2]) if cached else None
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                cache.not_modified()
+                return _cache_headers(not_modified, etag, last_modified)
+            if cached:
+                return _cache_headers(wire.respond(request, cached[0], cached[1]), etag, last_modified)
+
+            data_list = cache.rows(series_key, step, query_start, query_end, now, mark,
+                                   lambda start, end: _query(start, end, fields, unit_val, how)[0])
+            bucketed = bool(unit_val) and aggregation.supported()
+        else:
+            data_list, bucketed = _query(query_start, query_end, fields, unit_val, how)
         if not data_list:
             return JsonResponse({'error': '해당 기간에 데이터가 없습니다.'}, status=404)
 
@@ -118,7 +253,7 @@ def graph_api(request):
             start_time_kr = start_time.astimezone(korea_tz)
             end_time_kr = end_time.astimezone(korea_tz)
 
-            if freq:
+            if freq and not bucketed:
                 target_times = pd.date_range(start=start_time_kr, end=end_time_kr, freq=freq)
 
                 if target_times.tz is None:
@@ -139,20 +274,8 @@ def graph_api(request):
             if df_resampled.columns.duplicated().any():
                 df_resampled = df_resampled.loc[:, ~df_resampled.columns.duplicated()]
 
-            if fmt == 'excel':
-                response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-                filename = f"sensor_data_{start_time.strftime('%Y%m%d')}_{end_time.strftime('%Y%m%d')}.xlsx" # 파일명 포맷도 날짜 위주로 살짝 변경 추천
-                response['Content-Disposition'] = f'attachment; filename={filename}'
-                
-                df_excel = df_resampled.copy()
-                if 'timestamp' in df_excel.columns:
-                    df_excel['timestamp'] = df_excel['timestamp'].apply(lambda x: x.strftime('%Y-%m-%d %H:%M:%S') if pd.notnull(x) else x)
-
-                df_excel.to_excel(response, index=False, engine='openpyxl')
-                return response
-
-            result_json_str = df_resampled.to_json(orient='records', date_format='iso')
-            result_data = json.loads(result_json_str)
+            # 시리즈마다 모양을 유지하는 점을 골라 max_points행 이하로 줄임 (요약은 줄이기 전 마지막 행으로)
+            df_output = downsample.frame(df_resampled, max_points, method) if max_points else df_resampled
 
             summary_data = {}
             if not df_resampled.empty:
@@ -171,10 +294,12 @@ def graph_api(request):
             else:
                  summary_data = {'total_insolation': 0, 'total_irrigation': 0, 'total_drainage': 0}
 
-            return JsonResponse({
-                'data': result_data,
-                'summary': summary_data
-            }, safe=False)
+            # 한 번에 직렬화 + Accept-Encoding에 맞춰 gzip / brotli 압축 (본문은 다음 요청을 위해 보관)
+            body, content_type = wire.encode(df_output, summary_data, fmt, layout)
+            if not graphcache.ENABLED:
+                return wire.respond(request, body, content_type)
+            modified = cache.store_response(response_key, version, body, content_type)
+            return _cache_headers(wire.respond(request, body, content_type), etag, int(modified))
 
         except Exception as e:
             print(f"Graph API Error: {e}")
@@ -0,0 +1,44 @@
+from django.http import JsonResponse
+
+from omnitor.devices.engine import AcquisitionEngineSingleton
+from omnitor.devices import backends
+from omnitor.services import archive, dbconn, dbprofile
+from omnitor.services.graphcache import GraphCacheSingleton
+from omnitor.services.ingest import RawDataWriterSingleton
+from omnitor.services.sample_queue import SampleAlignerSingleton
+from omnitor.services.scheduler import JobSchedulerSingleton
+from omnitor.services.spool import SampleSpoolSingleton
+
+
+def status_api(request):
+
+    """
+    [API] 수집 파이프라인 상태 조회
+    스케줄러 작업별 실행 시간/지연, RawData 배치 저장, 로컬 스풀, 센서 읽기 지연, RS-485 slave별 지연/오류율, 필드별 값 나이(age)/stale 통계를 반환합니다.
+    """
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    result = {
+        'scheduler': JobSchedulerSingleton.instance().stats(),
+        'ingest': RawDataWriterSingleton.instance().stats(),
+        'spool': SampleSpoolSingleton.instance().stats(),
+        'devices': AcquisitionEngineSingleton.instance().stats(),
+        'samples': SampleAlignerSingleton.instance().stats(),
+        'archive': archive.stats(),
+        'database': dbprofile.stats(),
+        'connections': dbconn.stats(),
+        'graph_cache': GraphCacheSingleton.instance().stats(),
+        'backend': {'name': backends.BACKEND, 'simulated': backends.stats()},
+    }
+
+    # RS-485 버스는 하드웨어 모듈이므로 import할 수 있을 때만 포함
+    try:
+        from omnitor.devices.modbus_bus import BusManagerSingleton
+    except ImportError:
+        pass
+    else:
+        result['modbus'] = BusManagerSingleton.instance().stats()
+
+    return JsonResponse(result)